@@ -0,0 +1,124 @@
+import numpy as np
+
+from distance import haversine_pairwise
+from spatial_index import SpatialIndex
+
+
+#union-find over the rows 0..n-1
+class DisjointSet:
+    """
+    Disjoint sets with path halving and union by size.
+
+    Parameters:
+    - n (int): Number of elements.
+    """
+
+    def __init__(self, n):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.size = np.ones(n, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return int(x)
+
+    #merges the sets of a and b, returns False if they were in the same set already
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+    #union of every pair (a[i], b[i])
+    def union_many(self, a, b):
+        for x, y in zip(np.asarray(a).tolist(), np.asarray(b).tolist()):
+            self.union(x, y)
+
+    #root of every element (all at once, by jumping to the parent of the parent)
+    def roots(self):
+        roots = self.parent.copy()
+        while True:
+            next_roots = roots[roots]
+            if np.array_equal(next_roots, roots):
+                return roots
+            roots = next_roots
+
+    #cluster number of every element, numbered in the order of their first element
+    def labels(self):
+        _, first, labels = np.unique(self.roots(), return_index=True, return_inverse=True)
+        #np.unique numbers by root, renumber by the first element of every cluster
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first, kind='stable')] = np.arange(len(first))
+        return rank[labels]
+
+
+#clusters all points which are connected by steps of at most distance (km)
+#returns the cluster number of every point (0, 1, ... in the order of the points)
+def cluster_points(lats, lons, distance, index=None):
+    """
+    Proximity clustering with a KD-tree and union-find.
+
+    Parameters:
+    - lats, lons (array like): Coordinates of the points.
+    - distance (float): Points nearer than this (km) end up in the same cluster (also over other points).
+    - index (SpatialIndex): Optional index over the same points.
+
+    Returns:
+    - array: Cluster number of every point.
+    """
+    if index is None:
+        index = SpatialIndex(lats, lons)
+    sets = DisjointSet(len(index))
+    sets.union_many(*index.pairs(distance))
+    return sets.labels()
+
+
+#returns (lats, lons) of the mean of every cluster
+def cluster_centroids(lats, lons, labels):
+    labels = np.asarray(labels, dtype=np.int64)
+    count = np.bincount(labels)
+    lats = np.bincount(labels, weights=np.asarray(lats, dtype=np.float64)) / count
+    lons = np.bincount(labels, weights=np.asarray(lons, dtype=np.float64)) / count
+    return lats, lons
+
+
+#returns for every point the row of the first point of its cluster
+def representatives(labels):
+    labels = np.asarray(labels, dtype=np.int64)
+    _, first = np.unique(labels, return_index=True)
+    return first[labels]
+
+
+#merges all points within distance (km), the first point of every cluster represents it
+#returns (keep, representative): keep is True for the representatives,
+#representative is the row of the representative of every point
+def merge_near_points(lats, lons, distance, index=None):
+    labels = cluster_points(lats, lons, distance, index)
+    representative = representatives(labels)
+    return representative == np.arange(len(representative)), representative
+
+
+#returns a bool array, True for every point without another point within distance (km)
+#only the nearest other point of every point is searched (no pairs, so it is fast for big distances like 60km)
+def isolated_points(lats, lons, distance, index=None):
+    if index is None:
+        index = SpatialIndex(lats, lons)
+    n = len(index)
+    if n < 2:
+        return np.ones(n, dtype=bool)
+
+    _, found = index.tree.query(index.tree.data, k=2)
+    #with points at the same place the point itself can be the second one
+    rows = np.arange(n)
+    nearest_other = np.where(found[:, 0] == rows, found[:, 1], found[:, 0])
+    distances = haversine_pairwise(index.lat, index.lon, index.lat[nearest_other], index.lon[nearest_other])
+    return distances > distance
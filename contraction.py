@@ -0,0 +1,149 @@
+import numpy as np
+
+from csr_graph import CSRGraph
+from distance import haversine_polyline
+from node_arrays import as_node_arrays
+from way_arrays import as_way_arrays, drop_unknown_nodes
+
+
+#graph of the streets with every node of the ways (an edge for every segment)
+#node ids of the ways which aren't in nodes are left out
+def street_graph(nodes, ways):
+    nodes = as_node_arrays(nodes)
+    ways, rows = drop_unknown_nodes(nodes, as_way_arrays(ways))
+    segment_lengths = haversine_polyline(nodes.lat[rows], nodes.lon[rows])
+
+    #segments between the last node of a way and the first of the next one aren't streets
+    lengths = ways.lengths
+    is_last = np.zeros(len(rows), dtype=bool)
+    is_last[ways.offsets[1:][lengths > 0] - 1] = True
+    valid = ~is_last[:-1]
+    return CSRGraph.from_edges(ways.node_ids[:-1][valid], ways.node_ids[1:][valid], segment_lengths[valid], node_ids=np.unique(ways.node_ids))
+
+
+#result of contract_degree2: the small graph and the chains of the original graph behind its edges
+class Contraction:
+    """
+    Contracted graph with the mapping back to the original nodes.
+
+    Parameters:
+    - graph (CSRGraph): The contracted graph (kept nodes only).
+    - chains (dict): (id1, id2) with id1 <= id2 -> list of the original ids from id1 to id2 (both included).
+    - original (CSRGraph): The graph before the contraction.
+    """
+
+    def __init__(self, graph, chains, original):
+        self.graph = graph
+        self.chains = chains
+        self.original = original
+
+    #the original nodes of the edge a - b, from a to b
+    def expand_edge(self, a, b):
+        if a <= b:
+            return list(self.chains[(a, b)])
+        return list(reversed(self.chains[(b, a)]))
+
+    #the original nodes of a path (ids) of the contracted graph
+    def expand(self, path):
+        if len(path) == 0:
+            return []
+        full = [path[0]]
+        for a, b in zip(path, path[1:]):
+            full.extend(self.expand_edge(a, b)[1:])
+        return full
+
+    #factor the graph got smaller (nodes)
+    @property
+    def ratio(self):
+        return self.original.num_nodes / max(self.graph.num_nodes, 1)
+
+
+#every chain of not kept nodes between two kept nodes, found once (also parallel chains and loops back to the same node)
+#circles without any kept node get one kept node (kept is changed)
+#returns a list of (rows, step weights): rows from the first kept node to the last one, weights of the edges between them
+def degree2_chains(graph, kept):
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    weights = graph.weights.tolist()
+    kept_list = kept.tolist()
+    visited = kept.copy()
+    chains = []
+
+    def walk(start, first_pos):
+        prev, current = start, indices[first_pos]
+        rows, steps = [start, current], [weights[first_pos]]
+        while not kept_list[current]:
+            visited[current] = True
+            a, b = indptr[current], indptr[current] + 1
+            pos = b if indices[a] == prev else a
+            prev, current = current, indices[pos]
+            rows.append(current)
+            steps.append(weights[pos])
+        return rows, steps
+
+    def walk_all(start):
+        for pos in range(indptr[start], indptr[start + 1]):
+            rows, steps = walk(start, pos)
+            #every chain is found from both ends, only the one with the smaller start is used
+            if (rows[0], rows[1]) < (rows[-1], rows[-2]):
+                chains.append((rows, steps))
+
+    for start in np.flatnonzero(kept).tolist():
+        walk_all(start)
+
+    #circles without any kept node: one node of every circle is kept
+    for start in np.flatnonzero(~visited).tolist():
+        if visited[start]:
+            continue
+        kept[start] = True
+        kept_list[start] = True
+        visited[start] = True
+        walk_all(start)
+    return chains
+
+
+#collapses every chain of degree-2 nodes into one edge (the weight is the sum of the chain)
+#kept are the nodes in keep (stations, junctions, ...) and all nodes with a degree other than 2 (endpoints, crossings)
+def contract_degree2(graph, keep=None):
+    """
+    Degree-2 chain contraction.
+
+    Parameters:
+    - graph (CSRGraph): The graph.
+    - keep (array or set): Bool per row, or ids of the nodes which must stay.
+
+    Returns:
+    - Contraction: The contracted graph and the chains to expand its edges.
+    """
+    degree = graph.degree()
+    kept = degree != 2
+    if keep is not None:
+        if isinstance(keep, np.ndarray) and keep.dtype == bool:
+            kept |= keep
+        else:
+            rows = graph.rows(keep)
+            kept[rows[rows >= 0]] = True
+
+    #(start row, end row) -> (weight, rows of the chain), loops are dropped and of parallel chains the shortest is used
+    best = {}
+    for rows, steps in degree2_chains(graph, kept):
+        if rows[0] == rows[-1]:
+            continue
+        if rows[0] > rows[-1]:
+            rows = rows[::-1]
+        weight = sum(steps)
+        key = (rows[0], rows[-1])
+        if key not in best or weight < best[key][0]:
+            best[key] = (weight, rows)
+
+    ids = graph.node_ids
+    src = np.array([key[0] for key in best], dtype=np.int64)
+    dst = np.array([key[1] for key in best], dtype=np.int64)
+    edge_weights = np.array([value[0] for value in best.values()], dtype=np.float64)
+    contracted = CSRGraph.from_edges(ids[src], ids[dst], edge_weights, node_ids=ids[kept])
+
+    id_list = ids.tolist()
+    chains = {(id_list[start], id_list[end]): [id_list[row] for row in rows] for (start, end), (_, rows) in best.items()}
+    for key in [key for key in chains if key[0] > key[1]]:
+        chains[(key[1], key[0])] = chains.pop(key)[::-1]
+    return Contraction(contracted, chains, graph)
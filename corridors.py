@@ -0,0 +1,123 @@
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from contraction import degree2_chains
+
+
+#the corridors of a graph: the paths between two hubs (junctions, ends) over nodes with degree 2
+#returns a list of (rows, along): the rows from hub to hub and the cumulative distance of every row from the first hub
+def corridors(graph, hubs=None):
+    """
+    Junction to junction decomposition of a (contracted) graph.
+
+    Parameters:
+    - graph (CSRGraph): The graph.
+    - hubs (array): Bool per row of the nodes where corridors end, default all nodes with a degree other than 2.
+
+    Returns:
+    - list: (rows, along) of every corridor.
+    """
+    kept = graph.degree() != 2
+    if hubs is not None:
+        kept |= np.asarray(hubs, dtype=bool)
+    result = []
+    for rows, steps in degree2_chains(graph, kept):
+        along = np.zeros(len(rows))
+        np.cumsum(steps, out=along[1:])
+        result.append((np.array(rows, dtype=np.int64), along))
+    return result
+
+
+#greedy sweep along one corridor, optimal for the points on a line:
+#the first uncovered target gets the farthest candidate which still reaches it
+#start_gap / end_gap: distance from the hubs at the ends to the nearest charger outside of the corridor
+#returns the positions (in the corridor) of the chosen candidates
+def sweep_corridor(along, is_candidate, is_target, max_distance, start_gap=np.inf, end_gap=np.inf):
+    candidates = np.flatnonzero(is_candidate).tolist()
+    positions = along.tolist()
+    length = positions[-1]
+
+    #the chargers behind the hubs cover the ends of the corridor
+    covered_until = max_distance - start_gap
+    covered_from = length + end_gap - max_distance
+
+    chosen = []
+    j = -1
+    for target in np.flatnonzero(is_target).tolist():
+        x = positions[target]
+        if x <= covered_until or x >= covered_from:
+            continue
+        #farthest candidate which reaches x
+        while j + 1 < len(candidates) and positions[candidates[j + 1]] <= x + max_distance:
+            j += 1
+        if j < 0 or positions[candidates[j]] < x - max_distance:
+            #no candidate on the corridor reaches the target
+            continue
+        chosen.append(candidates[j])
+        covered_until = positions[candidates[j]] + max_distance
+    return chosen
+
+
+#distance of every node to its nearest chosen charger (inf if there is none within max_distance)
+def charger_distances(graph, chosen_rows, max_distance):
+    if len(chosen_rows) == 0:
+        return np.full(graph.num_nodes, np.inf)
+    return dijkstra(graph.to_scipy(), directed=False, indices=chosen_rows, limit=max_distance, min_only=True)
+
+
+#charger placement corridor by corridor, every corridor is solved by sweep_corridor in linear time
+#the corridors are stitched at the hubs: the distance of every hub to its nearest chosen charger is passed on
+#to the corridors which are solved later (the long corridors first). afterwards the real distances to the chargers
+#are computed (one dijkstra from all chargers) and the corridors with targets which are still open are swept again
+#targets which can only be reached from a candidate on another corridor get the nearest candidate (all in one dijkstra)
+#returns the rows of the chosen candidates
+def corridor_cover(graph, max_distance, candidates, targets, hubs=None):
+    """
+    Linear time placement along the corridors of the graph.
+
+    Parameters:
+    - graph (CSRGraph): The (contracted) graph.
+    - max_distance (float): Range R.
+    - candidates (array): Bool per row of the nodes which can get a charger.
+    - targets (array): Bool per row of the nodes which need a charger within R.
+    - hubs (array): Optional bool per row of additional corridor ends (e.g. junctions).
+
+    Returns:
+    - array: Rows of the chosen candidates.
+    """
+    gap = np.full(graph.num_nodes, np.inf)
+    chosen = set()
+    all_corridors = corridors(graph, hubs)
+    all_corridors.sort(key=lambda el: -el[1][-1])
+
+    #nodes without any edge
+    alone = (graph.degree() == 0) & candidates & targets
+    chosen.update(np.flatnonzero(alone).tolist())
+    gap[alone] = 0
+
+    while True:
+        open_targets = targets & (gap > max_distance)
+        before = len(chosen)
+        for rows, along in all_corridors:
+            if not open_targets[rows].any():
+                continue
+            start, end = rows[0], rows[-1]
+            picked = sweep_corridor(along, candidates[rows], open_targets[rows], max_distance, gap[start], gap[end])
+            if len(picked) == 0:
+                continue
+            chosen.update(rows[picked].tolist())
+            gap[start] = min(gap[start], along[picked[0]])
+            gap[end] = min(gap[end], along[-1] - along[picked[-1]])
+        if len(chosen) == before:
+            break
+        gap = charger_distances(graph, np.array(sorted(chosen)), max_distance)
+
+    #the rest: every open target gets its nearest candidate over the network,
+    #one dijkstra from all candidates gives the nearest one of every node (targets without one within range stay open)
+    rest = np.flatnonzero(targets & (gap > max_distance))
+    candidate_rows = np.flatnonzero(candidates)
+    if len(rest) > 0 and len(candidate_rows) > 0:
+        dist, _, nearest = dijkstra(graph.to_scipy(), directed=False, indices=candidate_rows, limit=max_distance, min_only=True, return_predecessors=True)
+        rest = rest[np.isfinite(dist[rest])]
+        chosen.update(nearest[rest].tolist())
+    return np.array(sorted(chosen), dtype=np.int64)
@@ -1,10 +1,24 @@
 import json
-import math
 import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.basemap import Basemap
-from collections import Counter
+from node_store import NodeStore, as_node_store
+from distance import haversine, haversine_pairwise
+from node_arrays import as_node_arrays, point_is_junction
+from spatial_index import SpatialIndex
+from service_areas import reduce_service_areas
+from snapping import insert_snapped_nodes
+from street_finder import NeighbourStreetFinder
+from edge_builder import chain_edges
+from csr_graph import CSRGraph
+from shortest_paths import bounded_all_pairs, get_path, floyd_warshall as fw_all_pairs
+from data_cache import load_overpass_cached
+from street_arrays import StreetArrays
+from pipeline import Pipeline
+from contraction import contract_degree2, street_graph
+from placement import place_chargers
+from incremental import IncrementalPlacement
 
 
 def load_json_data(file_path):
@@ -42,7 +56,7 @@ def split_array_service_stations(json_data):
 
         else:
             print("ERROR: There shouldn't be another type (exept node and way)")
-    return (nodes, ways)  
+    return (NodeStore(nodes), ways)  
   
 #splits the json_data and returns a touple (nodes, highway)
 def split_array_highway(json_data):
@@ -59,190 +73,106 @@ def split_array_highway(json_data):
             highway.append(el)
         else:
             print("ERROR: There shouldn't be another type (exept node and way)")
-    return (nodes, highway)  
+    return (NodeStore(nodes), highway)  
 
 #returns a touple of (lat, lon)
 def get_coords(id, nodes):
     
-    #find the node with the 'own_id'
-    row = next((node for node in nodes if node['id'] == id), None)
+    #find the node with the overpass id
+    row = as_node_store(nodes).get(id)
 
     #returns the lat and long
     return(row['lat'], row['lon'])
 
 def get_line(id, nodes):
-    row = next((node for node in nodes if node['id'] == id), None)
+    row = as_node_store(nodes).get(id)
     if(row == None):
         print("Thats a Problem! No Line found")
     return row
 
 #returns the (lat, lon) of the centrois of every sercice station way
-def merge_area_to_point(way_service, nodes_service): # service node
-
-    #calcualte for every area the centroid
-    centroids = []
-    for el in way_service:
-        id = -1
-        lats = []
-        lons = []
-        #get the coordinates for every node and add to list
-        for ids in el['nodes']:
-            lat, lon = get_coords(ids, nodes_service)
-            lats.append(lat)
-            lons.append(lon)
-        
-        #calculate centroid
-        centroid_lat = sum(lats) / len(lats)
-        centroid_lon = sum(lons) / len(lons)
-        centroids.append((centroid_lat, centroid_lon))
-
-    #deleate centroids, which are nearer than 0,2m
-    sorted_centroids = []
-    for lat1, lon1 in centroids:
-        for lat2, lon2 in centroids:
-            if(get_distance(lat1, lon1, lat2, lon2) < 0,1):
-                #don't inclde point
-                break
-        sorted_centroids.append((lat1, lon1))
-
-    return sorted_centroids
+#centroids which are nearer than merge_distance (km) to each other are merged into one point
+def merge_area_to_point(way_service, nodes_service, merge_distance=0.1, weighted=False): # service node
+    return reduce_service_areas(way_service, nodes_service, merge_distance, weighted)
 
 #calculates the distance between two points and returns the distance in km
 def get_distance(lat1, lon1, lat2, lon2):
+    return haversine(lat1, lon1, lat2, lon2)
 
-    R = 6371.0
-
-    # Convert latitude and longitude from degrees to radians
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    # Haversine formula
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-    
-    #return distance in km
-    return distance
-
-def point_is_junction(row):
-    #point is juction
-    if 'tags' in row and row['tags'] and 'highway' in row['tags'] and row['tags']['highway']:
-        if 'junction' in row['tags']['highway']:
-            return True
-        
-    return False
-
+#reduces every street to the nodes we need: junctions and nodes near a service station
+#returns a list of {'id': , 'old_ids': (way id, neighbour), 'nodes': [kept node ids]}
+def go_through_street(nodes_highway, way_highway, service_stations, radius=1, parallel_radius=0.1):
+    nodes_highway = as_node_arrays(nodes_highway)
 
-def go_through_street(nodes_highway, way_highway, service_stations):
+    #index over the service stations, to get the neares one of every street point
+    if len(service_stations) > 0:
+        service_lats, service_lons = zip(*service_stations)
+    else:
+        service_lats, service_lons = [], []
+    service_index = SpatialIndex(service_lats, service_lons)
+
+    #point is near servicesation (junctions are always kept)
+    near_service = np.zeros(len(nodes_highway), dtype=bool)
+    if len(service_index) > 0:
+        min_distance, _ = service_index.nearest_many(nodes_highway.lat, nodes_highway.lon)
+        near_service = min_distance <= radius
+
+    return reduce_streets(nodes_highway, way_highway, nodes_highway.junction | near_service, parallel_radius)
+
+#like go_through_street, but every service station is projected onto its nearest street segment
+#and gets its own node there (negative id), so it doesn't depend on how dense the street nodes are.
+#only junctions and the station nodes are kept
+#returns (nodes_highway with the new nodes, way_highway with the new nodes, streets like go_through_street)
+def go_through_street_snapped(nodes_highway, way_highway, service_stations, radius=1, parallel_radius=0.1):
+    nodes_highway, way_highway, station_node_ids, _ = insert_snapped_nodes(nodes_highway, way_highway, service_stations, radius)
+    station_nodes = [el for el in station_node_ids if el is not None]
+
+    keep = nodes_highway.junction.copy()
+    keep[nodes_highway.rows(station_nodes)] = True
+    return nodes_highway, way_highway, reduce_streets(nodes_highway, way_highway, keep, parallel_radius)
+
+#reduces every street to the nodes where keep (bool per row of nodes_highway) is True
+#returns a list of {'id': , 'old_ids': (way id, neighbour), 'nodes': [kept node ids]}
+def reduce_streets(nodes_highway, way_highway, keep, parallel_radius=0.1):
+    nodes_highway = as_node_arrays(nodes_highway)
+    finder = NeighbourStreetFinder(nodes_highway, way_highway)
+    junction = nodes_highway.junction
 
     street_data = []
-    node_data = []
     street_id_counter = 0
 
     #for every street 
     for el in way_highway:
-        '''
-        street data
-        id = 1
-        old_ids = (10 ,11 )
-        nodes = [1 ,2 ,3 , , ]
-        ,
-        street data
-        id = 2
-        old_ids = (11 ,10 )
-        nodes = [4 ,5 ,6 , , ]
-
-        '''
-
-        '''
-        node
-        id = 
-        lat = 
-        lon = 
-        is_junction = 
-        '''
-
         street_id = el['id']
-        
-        radius = 1
-
-        #array of the points of a street
-        street_nodes_ids = []
-
-        #for every point on the street
-        for street_point in el['nodes']:
-
-            point = get_line(street_point, nodes_highway)
-            id = point['id']
-            lat = point['lat']
-            lon = point['lon']
-
-
-
-            #point is juction
-            if 'tags' in point and point['tags'] and 'highway' in point['tags'] and point['tags']['highway']:
-                if 'junction' in point['tags']['highway']:
-                    street_nodes_ids.append(id)
-                    continue
-            
-            #point is near servicesation
-            else:
-                #get neares service staion
-                min_distance = 900 #km
-                for service_lat, service_lon in service_stations:
-                    distance = get_distance(lat, lon, service_lat, service_lon)
-                    if min_distance > distance:
-                        min_distance = distance
-                
-                #if service station nearer than radius, keep street node
-                if min_distance <= radius:
-                    street_nodes_ids.append(id)
-
-            #useless 
-             
-            #get parallel streets
-            #loop through every street node in 100m and add the street id to possible_streets_ids
-            possible_streets_ids = []
-            for second_street_point in nodes_highway:
-                second_street_id = second_street_point['id']
-                if 0.1 >= get_distance(lat, lon, second_street_point['lat'], second_street_point['lon']):
-                    #currently all points in the radius
-                    
-                    for find_street in way_highway:
-                        if second_street_id in find_street['nodes']:
-                            possible_streets_ids.append(second_street_id)
-
-
-        #1,2,1,2,1,1,1,1,1,,1,1,1,
-        #(1,2,)(6,1)
-        counter = Counter(possible_streets_ids)
-        neighbour_street_id =  counter.most_common(1)[0][0]
-
+        #node ids which aren't in nodes_highway are left out
+        rows = nodes_highway.rows(el['nodes'])
+        rows = rows[rows >= 0]
+        is_junction = junction[rows]
+        street_nodes_ids = [int(id) for id in nodes_highway.ids[rows[keep[rows]]]]
+
+        #get parallel streets
+        #the nodes within parallel_radius of the last street point, which isn't a junction, vote for the neighbour.
+        #every node votes once per street it is on, the first node with the most votes wins
+        #(like the old version, the neighbour is the id of that node)
+        neighbour_street_id = None
+        not_junction = np.flatnonzero(~is_junction)
+        if len(not_junction) > 0:
+            last = rows[not_junction[-1]]
+            node_ids, votes = finder.node_votes(nodes_highway.lat[last], nodes_highway.lon[last], parallel_radius)
+            if len(node_ids) > 0:
+                neighbour_street_id = int(node_ids[np.argmax(votes)])
 
         dict_entry = {'id': street_id_counter, 'old_ids': (street_id, neighbour_street_id), 'nodes': street_nodes_ids}
         street_id_counter += 1
 
-
         street_data.append(dict_entry)
 
-                
-
-        #find parallel street
-        
-
-        #create dict and add to street_
-
-
-
-        #get other street
-    print(street_data)
     return street_data
 
 def filter_own_streets(streets):
+    #StreetArrays: only the streets are selected, the node arrays are shared
+    if isinstance(streets, StreetArrays):
+        return streets.select(streets.lengths > 1)
 
     #delete empty streets
     filtered_streets = []
@@ -339,6 +269,10 @@ def create_graph4(nodes, ids, coords):
 
 
 def temp(nodes_highway, our_data):
+    #StreetArrays: array of the node ids (a view if nothing was removed)
+    if isinstance(our_data, StreetArrays):
+        return our_data.all_node_ids()
+
     important_node_ids = []
     for el in our_data:
         for node_id in el['nodes']:
@@ -364,179 +298,64 @@ def merge_streets(own_data, nodes):
         li.append(el)
     return li
 
+'''
+
 def merge_points_on_streets(own_data, nodes):
+    #StreetArrays: returns the streets with a mask, nothing is changed or copied
+    if isinstance(own_data, StreetArrays):
+        return merge_points_on_street_arrays(own_data, nodes)
 
     for i, street in enumerate(own_data):
         new_list = []
         new_list.append(street['nodes'][0])
-        for i in range (1, len(street['nodes'])):
-            lat, lon = get_coords(street['nodes'][i], nodes)
-            lat2, lon2 = get_coords(street['nodes'][i-1], nodes)
+        for j in range (1, len(street['nodes'])):
+            lat, lon = get_coords(street['nodes'][j], nodes)
+            lat2, lon2 = get_coords(street['nodes'][j-1], nodes)
             if(get_distance(lat, lon, lat2, lon2) > 1):  #1km
-                new_list.append(street['nodes'][i])
+                new_list.append(street['nodes'][j])
 
         #safe the list
         own_data[i]['nodes'] = new_list
     
     return own_data
 
-#doesn't work proporly
-def create_edges1(nodes, own_data):
-    #get all junction (for opimisation)
-    junction_array = []
-    street_array = []
-    for row in own_data:
-        if point_is_junction(row):
-            junction_array.append(row)
-        else:
-            street_array.append(row)
-
-    all_edges = []
-    #go through all streets
-    for street in own_data:
-        
-        #go through all nodes in the street
-        for i, street_id in enumerate(street['nodes']):
-            dis = 0
-
-            if i == len(street['nodes']):
-                #last element, no futher action needed
-                continue
-
-
-            #!!! street_node and next_street_node are youst ids
-            street_row = get_line(street_id, nodes)
-
-
-            next_street_id = street['nodes'][i]
-            next_street_row = get_line(next_street_id, nodes)
-            if(next_street_row == None):
-                print(next_street_id)
-
-
-            if(point_is_junction(street_row)):
-            #street_node is junction
-
-                if(point_is_junction(next_street_row)):
-                    #next node ist junction
-                    print("Please NOT!!!!!!")
-                    #TODO?
-
-
-                else:
-                    #next node is street_node
-                    
-                    dis_from_junction_to_next_node = get_distance(street_row['lat'], street_row['lon'], next_street_row['lat'], next_street_row['lon'])
-                    all_nodes_from_junction = get_all_nodes_from_junction(next_street_id, nodes, own_data)
-                    for junc_neighbour_id in all_nodes_from_junction:
-                        junc_node_row = get_line(junc_neighbour_id, junction_array)
-                        sec_dis = get_distance(street_row['lat'], street_row['lon'], junc_node_row['lat'], junc_node_row['lon'])
-                        all_edges.append(street_id, junc_neighbour_id, dis_from_junction_to_next_node + sec_dis)
-
-            else:
-            #street_node is street_node
-
-                if(point_is_junction(next_street_row)):
-                    #next node ist junction
-                    all_nodes_from_junction = get_all_nodes_from_junction(next_street_id, nodes, own_data)
-                    dis = get_distance(street_row['lat'], street_row['lon'], next_street_row['lat'], next_street_row['lon'])
-                    for junc_neighbour_id in all_nodes_from_junction:
-                        junc_node_row = get_line(junc_neighbour_id, junction_array)
-                        sec_dis = get_distance(next_street_row['lat'], next_street_row['lon'], junc_node_row['lat'], junc_node_row['lon'])
-                        all_edges.append(street_id, junc_neighbour_id, dis + sec_dis)
-
-                else:
-                    #next node is street_node
-                    dis = get_distance(street_row['lat'], street_row['lon'], next_street_row['lat'], next_street_row['lon'])
-                    all_edges.append((street_id, next_street_id, dis))
-
-
-     #deleate doube edges
-    unique_edges = []
-    unique_edges_without_dis = []
-    for edge in all_edges:
-            if edge not in unique_edges_without_dis and (edge[1], edge[0]) not in unique_edges_without_dis and edge[0] != edge[1]:
-                unique_edges.append(edge)
-                unique_edges.append[edge[0], edge[1]]
-
-    
-
-    
-    #delete edges > 60km
-    final_edges = []
-    for a, b, dis in unique_edges:
-        if dis < 60:
-            final_edges.append((a,b, dis))
-    
-    return final_edges
-
-
-    return all_edges
-
-
-
-def get_all_nodes_from_junction(junction_id, nodes, own_data):
-    all_nodes_ids= []
-    #TODO
-
-    #for all streets
-    for street in own_data:
-        before = []
-        now = []
-        after = []
-        for i in range (0, len(street['nodes'])):
-            now = street['nodes'][i]
-            #if el is the junction 
-            if(now['id'] == junction_id):
-
-                #if it is the first element
-                if i == 0:
-                    after = street['nodes'][i+1]
-                    all_nodes_ids.append(after)
-
-                #if it is the last element
-                elif i == len(street['nodes'] - 1):
-                    all_nodes_ids.append(now)
-
-
-                #if it is a middle element
-                else:
-                    after = now
-                    now = before
-                    before = street['nodes'][i+1]
-                    #now is the junction
-
-                    all_nodes_ids.append(before)
-                    all_nodes_ids.append(after)
-    
-    print(f"All found nodes from get_all_nodes_from_junction: \{all_nodes_ids}")
-
-    return all_nodes_ids
-
+#same as merge_points_on_streets for StreetArrays
+#a node is kept if it is the first of its street or more than 1km away from the node before it
+def merge_points_on_street_arrays(streets, nodes):
+    nodes = as_node_arrays(nodes)
+    if streets.mask is not None:
+        #the node before has to be the one before in the reduced street
+        streets = streets.compact()
+
+    rows = nodes.rows(streets.node_ids)
+    distance_before = np.full(len(rows), np.inf)
+    distance_before[1:] = haversine_pairwise(nodes.lat[rows[1:]], nodes.lon[rows[1:]], nodes.lat[rows[:-1]], nodes.lon[rows[:-1]])
+
+    keep = distance_before > 1 #1km
+    keep[streets.starts[streets.ends > streets.starts]] = True
+    return streets.with_mask(keep)
+
+#creates the edges (id1, id2, distance) between the following nodes of the reduced streets on every way
+#ways are the full ways (every street node, with the station nodes of go_through_street_snapped),
+#so the weight is the length along the road, not the straight line between the kept nodes
+def create_edges_along_ways(nodes, ways, reduced_streets, max_distance=60):
+    builder = chain_edges(nodes, ways, np.unique(np.asarray(temp(nodes, reduced_streets), dtype=np.int64)))
+    return builder.to_list(max_distance)
+
+#creates the graph out of the edges (CSRGraph, networkx only for drawing), draws it and returns it
 def create_graph_with_edges(nodes, ids, edges):
-    # Create a graph
-    g = nx.Graph()
-
-    # Add nodes
-    sc = 0
-    for el in nodes:
-        temp_id = el['id']
-        if temp_id in ids:
-            if 'tags' in el and el['tags'] and 'highway' in el['tags'] and el['tags']['highway'] and 'junction' in el['tags']['highway']:
-                #junction
-                g.add_node(el['id'], pos=(el['lat'], el['lon']), color='green')
-            else:
-                #service station
-                sc += 1
-                g.add_node(el['id'], pos=(el['lat'], el['lon']), color='red')
-
-               
-    # Add edges with distance
-    for el in edges:
-        g.add_edge(el[0], el[1], weight=el[2])
+    nodes = as_node_arrays(nodes)
 
+    # Create a graph
+    graph = CSRGraph.from_edge_list(edges, node_ids=list(dict.fromkeys(ids)))
 
-    
+    # junctions are green, service stations red
+    rows = nodes.rows(graph.node_ids.astype(np.int64))
+    junction = nodes.junction[rows]
+    node_ids = graph.node_ids.tolist()
+    pos = {node_id: (float(nodes.lat[row]), float(nodes.lon[row])) for node_id, row in zip(node_ids, rows.tolist())}
+    color = {node_id: 'green' if is_junction else 'red' for node_id, is_junction in zip(node_ids, junction.tolist())}
+    g = graph.to_networkx(pos=pos, color=color)
 
     # Extract node positions and colors
     node_positions = {node: (lon, lat) for node, (lat, lon) in nx.get_node_attributes(g, 'pos').items()}
@@ -557,74 +376,86 @@ def create_graph_with_edges(nodes, ids, edges):
     plt.axis('off')  # Turn off axis labels
     plt.show()
 
+    return graph
+
+#draws the contracted graph, every edge as the line of the street nodes it stands for
+#contraction: Contraction out of contract_degree2, nodes have to contain all original nodes
+def create_graph_contracted(nodes, contraction):
+    nodes = as_node_arrays(nodes)
+    graph = contraction.graph
+
+    # junctions are green, the other kept nodes (service stations, ends of streets) red
+    rows = nodes.rows(graph.node_ids.astype(np.int64))
+    colors = np.where(nodes.junction[rows], 'green', 'red')
+
+    plt.figure(figsize=(8, 6))
+    for chain in contraction.chains.values():
+        chain_rows = nodes.rows(chain)
+        plt.plot(nodes.lon[chain_rows], nodes.lat[chain_rows], color='gray', linewidth=2, alpha=0.5)
+    plt.scatter(nodes.lon[rows], nodes.lat[rows], s=100, c=colors, alpha=0.7)
+
+    # Display the plot
+    plt.title("Contracted graph")
+    plt.axis('off')  # Turn off axis labels
+    plt.show()
+
 #takes an array out of used nodes and edges
 #nodes = {'id = 1 , 'lat' = , 'lon'} no junctions
 #edges = (id1, id2, distance)
 #returns a array out of (id1, id2, dis, [points also on the path] )
 def floyd_warshall(nodes, edges, max_distance=60):
 
-    #add own id for table
-    i = 0
-    for node in nodes:
-        node['own_id'] = i
-
-    
+    #add own id for table (the rows of NodeArrays have it already and can't be changed)
+    for i, node in enumerate(nodes):
+        if node.get('own_id') != i:
+            node['own_id'] = i
 
+    graph = CSRGraph.from_edge_list(edges, node_ids=[node['id'] for node in nodes])
+    dist, prev = fw_all_pairs(graph)
 
-    w, h = len(nodes), len(nodes)
-    dist = [[int('inf') for x in range(w)] for y in range(h)]
-    prev = [[0 for x in range(w)] for y in range(h)]
+    #get path of every pair within max_distance
+    paths = []
+    ids = graph.node_ids.tolist()
+    u_rows, v_rows = np.nonzero(np.triu(dist <= max_distance, k=1))
+    for u, v in zip(u_rows.tolist(), v_rows.tolist()):
+        path = get_path_fw(u, v, dist, prev)
+        paths.append((ids[u], ids[v], float(dist[u][v]), [ids[el] for el in path]))
+    return paths
 
-    for edge in edges:
-        own_id1 = get_own_id_fw(edge[0], nodes)
-        own_id2 = get_own_id_fw(edge[1], nodes)
-
-        dist[own_id1, own_id2] = edge[2]
-        prev[own_id1, own_id2] = own_id1
-    
-    for node in nodes:
-        dist[node['own_id'], node['own_id']] = 0
-        prev[node['own_id'], node['own_id']] = node['own_id']
-
-    for k in range(1, len(nodes)):
-        for i in range(1, len(nodes)):
-            for j in range(1, len(nodes)):
-                if dist[i][j] > dist[i,k] + dist[k][j]:
-                    dist[i][j] = dist[i][k] + dist[k][j]
-                    prev[i][j] = prev[k][j]
-
-    #get path
-    
+#returns the own ids of the path from u to v ([] if there is no path)
 def get_path_fw(u, v, dist, prev):
-    if prev[u][v] == 0:
+    if np.isinf(dist[u][v]):
         return []
-    path = [v]
-    while ( u != v):
-        v = prev[u][v]
-        path.appent(v)
-    return path
+    return get_path(u, v, prev)
 
 
 def get_own_id_fw(id, nodes):
-    #find the node with the 'own_id'
-    row = next((node for node in nodes if node['id'] == id), None)
+    #find the node with the overpass id
+    row = as_node_store(nodes).get(id)
 
     return row['own_id']
-    '''
 
 filepath_service = "export_1.json"
-json_data_service = load_json_data(filepath_service)
-
 filepath_highway = "street-Nodes-Aquitaine.json"
-json_data_highway = load_json_data(filepath_highway)
 
 
 
 
-#nodes_... is a list of dict containing all nodes (of that type)
-#way is a list of dict containing all ways of streets or rest areas
-nodes_service, way_service = split_array_service_stations(json_data_service)
-nodes_highway, way_highway = split_array_highway(json_data_highway)
+#the steps are stages of a pipeline, the result of every stage is stored in cache/pipeline
+#under a hash of its parameters and inputs, so only stages where something changed are computed again
+pipeline = Pipeline()
+
+#nodes_... are NodeArrays containing all nodes (of that type), iterating gives the node dicts
+#way are WayArrays containing all ways of streets or rest areas, iterating gives the way dicts
+#the files are parsed element by element (load_json_data + split_array_... did the same with the whole file in memory)
+#the parsed arrays are cached in cache/ and only parsed again if the json file changed
+@pipeline.stage('service_data', params={'file_path': filepath_service}, files=('file_path',), cache=False)
+def parse_service(file_path):
+    return load_overpass_cached(file_path)
+
+@pipeline.stage('highway_data', params={'file_path': filepath_highway}, files=('file_path',), cache=False)
+def parse_highway(file_path):
+    return load_overpass_cached(file_path)
 
 #nodes_service: nodes of the edges of service sations
 # array of: {'type': 'node', 'id': 304610017, 'lat': 44.8883184, 'lon': -0.5799906}, {'type': 'node', 'id': 304610018, 'lat': 44.888388, 'lon': -0.5796747}
@@ -637,41 +468,102 @@ nodes_highway, way_highway = split_array_highway(json_data_highway)
 
 
 #service is a list of points (lat, lon), the centroid of every service station
-service = merge_area_to_point(way_service, nodes_service)
-
-
-
-'''our_data = go_through_street(nodes_highway, way_highway, service)
-save_json_data(our_data, 'streets1-1.json')
-
-
-json_data = load_json_data('streets1-1.json')
-
-filtered_streets = filter_own_streets(json_data)
-
-save_json_data(filtered_streets, 'streets2-1.json')'''
-
-
-json_data = load_json_data('streets2-1.json')
+@pipeline.stage('centroid', inputs=('service_data',), params={'merge_distance': 0.1, 'weighted': False})
+def centroid_stage(service_data, merge_distance, weighted):
+    nodes_service, way_service = service_data
+    return merge_area_to_point(way_service, nodes_service, merge_distance, weighted)
+
+#the streets reduced to junctions and the nodes of the service stations (was saved in streets1-1.json)
+#mode 'segment': every station gets a new node on its nearest street segment (go_through_street_snapped)
+#mode 'radius': the street nodes within radius of a station are kept (go_through_street)
+#returns (nodes_highway, way_highway, streets), nodes and ways contain the new station nodes
+@pipeline.stage('snap', inputs=('highway_data', 'centroid'), params={'mode': 'segment', 'radius': 1, 'parallel_radius': 0.1})
+def snap_stage(highway_data, service, mode, radius, parallel_radius):
+    nodes_highway, way_highway = highway_data
+    if mode == 'segment':
+        nodes_highway, way_highway, streets = go_through_street_snapped(nodes_highway, way_highway, service, radius, parallel_radius)
+    else:
+        streets = go_through_street(nodes_highway, way_highway, service, radius, parallel_radius)
+    return nodes_highway, way_highway, StreetArrays.from_streets(streets)
+
+#streets with more than one node (was saved in streets2-1.json), nodes nearer than 1km to the one before are removed
+@pipeline.stage('street_reduction', inputs=('snap',))
+def street_reduction_stage(snap):
+    nodes_highway, _, streets = snap
+    return merge_points_on_streets(filter_own_streets(streets), nodes_highway).compact()
+
+#edges between the nodes of the reduced streets, the distance is measured along the full snapped ways
+@pipeline.stage('edges', inputs=('snap', 'street_reduction'), params={'max_distance': 60})
+def edges_stage(snap, streets, max_distance):
+    nodes_highway, way_highway, _ = snap
+    return create_edges_along_ways(nodes_highway, way_highway, streets, max_distance)
+
+#the whole street network (every node of the ways) with the stations snapped onto it,
+#the chains of degree-2 nodes are contracted to single edges (weight = length along the street)
+#only junctions, station nodes and nodes with another degree (ends of streets, crossings) are left
+#returns (nodes_highway with the station nodes, Contraction, ids of the station nodes), contraction.expand() gives the street nodes of a path
+@pipeline.stage('routing_graph', inputs=('highway_data', 'centroid'), params={'radius': 1}, version=1)
+def routing_graph_stage(highway_data, service, radius):
+    nodes_highway, way_highway = highway_data
+    nodes_highway, way_highway, station_node_ids, _ = insert_snapped_nodes(nodes_highway, way_highway, service, radius)
+    station_nodes = list(dict.fromkeys(el for el in station_node_ids if el is not None))
+    keep = set(nodes_highway.ids[nodes_highway.junction].tolist()) | set(station_nodes)
+    return nodes_highway, contract_degree2(street_graph(nodes_highway, way_highway), keep), station_nodes
+
+#all pairs which are within the range of a car (instead of floyd_warshall), on the contracted graph
+@pipeline.stage('reachable', inputs=('routing_graph',), params={'max_distance': 60})
+def reachable_stage(routing_graph, max_distance):
+    _, contraction, _ = routing_graph
+    return bounded_all_pairs(contraction.graph, max_distance)
+
+#chargers at the service stations, so that every point of the roads has one within max_distance
+#the roads are split into pieces of at most segment_length km (None: only the nodes are covered)
+#mode 'greedy', 'exact' or 'corridor' (see place_chargers)
+@pipeline.stage('placement', inputs=('routing_graph', 'reachable'), params={'max_distance': 60, 'mode': 'greedy', 'segment_length': 10})
+def placement_stage(routing_graph, reachable, max_distance, mode, segment_length):
+    _, contraction, station_nodes = routing_graph
+    candidates = contraction.graph.rows(station_nodes)
+    return place_chargers(contraction.graph, max_distance, candidates=candidates, mode=mode, reachable=reachable, segment_length=segment_length)
+
+
+nodes_service, way_service = pipeline.run('service_data')
+nodes_highway, way_highway = pipeline.run('highway_data')
+service = pipeline.run('centroid')
+
+nodes_highway, _, json_data = pipeline.run('snap')
 nodes_ids = temp(nodes_highway, json_data)
-
-
-#te = merge_streets(json_data, nodes_highway)
 create_graph4(nodes_highway, nodes_ids, service)
 
-
-new_own_data = merge_points_on_streets(json_data, nodes_highway)
+new_own_data = pipeline.run('street_reduction')
 te = temp(nodes_highway, new_own_data)
 create_graph4(nodes_highway, te, service)
 
-all_edges = create_edges1(nodes_highway, new_own_data)
+all_edges = pipeline.run('edges')
 print(all_edges)
 
-
-
-
 create_graph_with_edges(nodes_highway, te, all_edges)
 
+nodes_routing, contraction, station_nodes = pipeline.run('routing_graph')
+print(f"routing graph: {contraction.original.num_nodes} nodes contracted to {contraction.graph.num_nodes} ({contraction.ratio:.0f}x smaller)")
+create_graph_contracted(nodes_routing, contraction)
+
+reachable = pipeline.run('reachable')
+print(f"pairs within 60km: {len(reachable)}")
+
+placement = pipeline.run('placement')
+print(placement.report())
+
+#when service stations open or close, the placement is repaired instead of running everything again
+#example: a station opens next to the middle of the longest street of the routing graph and the first charger closes
+#(the repair covers the nodes of the routing graph, the roads between them aren't split like in the placement stage)
+incremental = IncrementalPlacement.from_contraction(nodes_routing, contraction, station_nodes, 60, chosen=placement.chosen, reachable=reachable)
+longest = max(contraction.chains.values(), key=len)
+lat, lon = nodes_routing.coords(longest[len(longest) // 2])
+new_id = min(int(nodes_routing.ids.min()), 0) - 1
+closed_id = int(placement.ids[0])
+opened, closed = incremental.apply_delta([(new_id, incremental.station_edges(lat + 0.001, lon))], [closed_id])
+print(f"station {new_id} opened, {closed_id} closed: chargers {opened} opened, {closed} closed in {incremental.runtime:.3f}s")
+
 junction = 0
 street = 0
 for row in new_own_data:
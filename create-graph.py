@@ -1,8 +1,13 @@
 import json
-import math
 import networkx as nx
 import matplotlib.pyplot as plt
 from mpl_toolkits.basemap import Basemap
+from node_store import NodeStore, as_node_store
+from distance import haversine, haversine_pairwise
+from node_arrays import as_node_arrays
+from spatial_index import SpatialIndex
+from service_areas import reduce_service_areas
+from edge_builder import EdgeBuilder, chain_edges
 
 def load_json_data(file_path):
     """
@@ -26,20 +31,20 @@ def save_json_data(data, file_path):
 #returns a touple of (lat, lon)
 def get_coords(id, nodes):
     
-    #find the node with the 'own_id'
-    row = next((node for node in nodes if node['id'] == id), None)
+    #find the node with the overpass id
+    row = as_node_store(nodes).get(id)
 
     #returns the lat and long
     return(row['lat'], row['lon'])
 
 def get_line(id, nodes):
-    row = next((node for node in nodes if node['id'] == id), None)
+    row = as_node_store(nodes).get(id)
 
     return row
 
 #return 1 if true, 0 if false
 def check_if_node_is_junction(id, nodes):
-    row = next((node for node in nodes if node['id'] == id), None)
+    row = as_node_store(nodes).get(id)
 
     if 'tags' in row:
         tags = row['tags']
@@ -49,24 +54,7 @@ def check_if_node_is_junction(id, nodes):
 
 #calculates the distance between two points and returns the distance in km
 def get_distance(lat1, lon1, lat2, lon2):
-
-    R = 6371.0
-
-    # Convert latitude and longitude from degrees to radians
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    # Haversine formula
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-    
-    #return distance in km
-    return distance
+    return haversine(lat1, lon1, lat2, lon2)
 
 #splits the json_data and returns a touple (nodes, ways)
 def split_array_service_stations(json_data):
@@ -84,7 +72,7 @@ def split_array_service_stations(json_data):
 
         else:
             print("ERROR: There shouldn't be another type (exept node and way)")
-    return (nodes, ways)  
+    return (NodeStore(nodes), ways)  
   
 #splits the json_data and returns a touple (nodes, highway)
 def split_array_highway(json_data):
@@ -101,59 +89,25 @@ def split_array_highway(json_data):
             highway.append(el)
         else:
             print("ERROR: There shouldn't be another type (exept node and way)")
-    return (nodes, highway)  
+    return (NodeStore(nodes), highway)  
 
 #returns the (lat, lon) of the centrois of every sercice station way
-def merge_area_to_point(way_service, nodes_service): # service node
-
-    #calcualte for every area the centroid
-    centroids = []
-    for el in way_service:
-        lats = []
-        lons = []
-        #get the coordinates for every node and add to list
-        for ids in el['nodes']:
-            lat, lon = get_coords(ids, nodes_service)
-            lats.append(lat)
-            lons.append(lon)
-        
-        #calculate centroid
-        centroid_lat = sum(lats) / len(lats)
-        centroid_lon = sum(lons) / len(lons)
-        centroids.append((centroid_lat, centroid_lon))
-
-    #deleate centroids, which are nearer than 0,2m
-    sorted_centroids = []
-    for lat1, lon1 in centroids:
-        for lat2, lon2 in centroids:
-            if(get_distance(lat1, lon1, lat2, lon2) < 0,1):
-                #don't inclde point
-                break
-        sorted_centroids.append((lat1, lon1))
-
-    return sorted_centroids
+#centroids which are nearer than merge_distance (km) to each other are merged into one point
+def merge_area_to_point(way_service, nodes_service, merge_distance=0.1, weighted=False): # service node
+    return reduce_service_areas(way_service, nodes_service, merge_distance, weighted)
 
 #returns a list of id. All the nodes in this list repesent a rest area
+#every service station gets the nearest highway node, which isn't taken by another service station yet
 def add_service_to_highway(nodes_highway, service):
-    marked_street_nodes = []
+    nodes_highway = as_node_arrays(nodes_highway)
+    if len(service) == 0:
+        return []
 
-    for lat, lon in service:
-        # Find nearest point in nodes
-        nearest_id = "" 
-        nearest_distance = float('inf')  # Initialize with positive infinity
-
-        for el in nodes_highway:
-            distance = get_distance(lat, lon, el['lat'], el['lon'])
-            
-             # Check if the ID is not in marked_street_nodes before updating
-            if el['id'] not in marked_street_nodes and distance < nearest_distance:
-                nearest_id = el['id']
-                nearest_distance = distance
-
-        # Add nearest point to the marked list
-        if nearest_id not in marked_street_nodes:
-            marked_street_nodes.append(nearest_id)
+    index = SpatialIndex.from_nodes(nodes_highway)
+    lats, lons = zip(*service)
+    distances, rows = index.nearest_unique(lats, lons)
 
+    marked_street_nodes = nodes_highway.ids[rows[rows >= 0]].tolist()
     return marked_street_nodes
 
 
@@ -181,13 +135,17 @@ def add_own_id(nodes):
     for el in nodes:
         el['own_id'] = i
         i += 1
+
+    #the own_id index of the store has to know the new ids
+    if isinstance(nodes, NodeStore):
+        nodes.reindex()
     return nodes
     
-#gets the lat and long of the node with own_id == id
+#gets the lat and long of the node with id == id
 def get_position_id(id, nodes):
     
-    #find the node with the 'own_id'
-    row = next((node for node in nodes if node['id'] == id), None)
+    #find the node with the overpass id
+    row = as_node_store(nodes).get(id)
 
     #returns the lat and long
     return(row['lat'], row['lon'])
@@ -196,57 +154,46 @@ def get_position_id(id, nodes):
 def get_position_own_id(id, nodes):
     
     #find the node with the 'own_id'
-    row = next((node for node in nodes if node['own_id'] == id), None)
+    row = as_node_store(nodes).get_own_id(id)
 
     #returns the lat and long
     return(row['lat'], row['lon'])
 
-def create_edges_array(nodes, ways):
-    
+#returns a list of (own_id1, own_id2, distance) for all neighbouring nodes of the ways
+#double edges (also in the other direction) are only added once, edges >= max_distance are dropped
+def create_edges_array(nodes, ways, max_distance=60):
+    nodes = as_node_store(nodes)
 
     #get all edges with own_id (not the overpass_id)   
-    edges = []
+    src_nodes = []
+    dst_nodes = []
     for el in ways:
         way_nodes = el['nodes']
         num = len(way_nodes)
         for i in range (0, num-1):
-            #get overpass id
-            overpass_id_a = int(way_nodes[i])
-            overpass_id_b = int(way_nodes[i+1])
-
-            #get own_id
-            anode = next((node for node in nodes if node['id'] == overpass_id_a), None)
-            bnode = next((node for node in nodes if node['id'] == overpass_id_b), None)
-            
-            aid = anode['own_id']
-            bid = bnode['own_id']
-
-            #add edge with own_ids
-            edges.append((aid, bid))
-            print(edges)
-    
-    
+            #get the node of the overpass id
+            src_nodes.append(nodes.get(int(way_nodes[i])))
+            dst_nodes.append(nodes.get(int(way_nodes[i+1])))
+
+    #get lenght of edges (all at once)
+    distances = haversine_pairwise([el['lat'] for el in src_nodes], [el['lon'] for el in src_nodes],
+                                   [el['lat'] for el in dst_nodes], [el['lon'] for el in dst_nodes])
+
     #deleate doube edges
-    unique_edges = []
-    for edge in edges:
-            if edge not in unique_edges and (edge[1], edge[0]) not in unique_edges:
-                unique_edges.append(edge)
-
-    #get lenght of edges
-    unique_distance_edges = []
-    for a, b in unique_edges:
-        lata, lona = get_position_own_id(a, nodes)
-        latb, lonb = get_position_own_id(b, nodes)
-        distance = get_distance(lata, lona, latb, lonb)
-        unique_distance_edges.append((a, b, distance))
-    
+    builder = EdgeBuilder(rule='first')
+    builder.add_many([el['own_id'] for el in src_nodes], [el['own_id'] for el in dst_nodes], distances)
+
     #delete edges > 60km
-    final_edges = []
-    for a, b, dis in unique_distance_edges:
-        if dis < 60:
-            final_edges.append((a,b, dis))
-    
-    return final_edges
+    return builder.to_list(max_distance)
+
+#creates the edges (own_id1, own_id2, distance) between the following marked nodes of every street
+#works on the full streets (before delete_usless_highway_nodes), so the distance is the length along the street
+def create_edges_along_ways(nodes, ways, marked_ids, max_distance=60):
+    nodes = as_node_store(nodes)
+    builder = chain_edges(nodes, ways, marked_ids, rule='first')
+
+    #overpass ids -> own ids, delete edges > 60km
+    return [(nodes.get(a)['own_id'], nodes.get(b)['own_id'], dis) for a, b, dis in builder.to_list(max_distance)]
 
 #deletes all nodes which aren't in the to_keep_ids list (overpass id)
 def delete_useless_street_nodes_of_nodes_array(nodes, to_keep_ids):
@@ -553,6 +500,7 @@ create_graph(nodes_highway, [])
 #merge to nearest street node
 #marked_street_nodes are a list of nodes_highway, which were the clostest to a rest area (only a list of ids)
 marked_street_nodes = add_service_to_highway(nodes_highway, service)
+marked_street_nodes_set = set(marked_street_nodes)
 
 create_graph3(nodes_highway, [], marked_street_nodes)
 
@@ -570,7 +518,7 @@ for el in way_highway:
         #print(get_line(node_id, nodes_highway))
         #check if nodes are marked, if yes add to list
         junc_check = check_if_node_is_junction(node_id, nodes_highway)
-        if node_id in marked_street_nodes or junc_check == 1:
+        if node_id in marked_street_nodes_set or junc_check == 1:
             if(junc_check == 1):
                 junction_ids.append(node_id)
 
@@ -580,6 +528,13 @@ for el in way_highway:
         marked_ways.append(marked_ids)  
 print(marked_ways)
 
+#edges between the marked nodes (service stations and junctions), weight is the distance along the street
+marked_ids = marked_street_nodes_set | set(junction_ids)
+edges_along_ways = create_edges_along_ways(nodes_highway, way_highway, marked_ids)
+
+#graph of the marked nodes only, with the edges along the ways
+create_graph(delete_useless_street_nodes_of_nodes_array(nodes_highway, marked_ids), edges_along_ways)
+
 '''way_highway_only_marked = []
 for el in nodes_highway:
     if el['id'] in marked_street_nodes:
@@ -0,0 +1,130 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+
+
+#undirected weighted graph in CSR form (indptr / indices / weights)
+#the neighbours of row i are indices[indptr[i]:indptr[i+1]]
+class CSRGraph:
+    """
+    Compressed sparse row adjacency for the algorithms (shortest paths, coverage, ...).
+    networkx is only used for plotting, see to_networkx().
+
+    Parameters:
+    - indptr (array): Start of the neighbours of every row in indices (length n+1).
+    - indices (array): Rows of the neighbours.
+    - weights (array): Weight (km) of every entry in indices.
+    - node_ids (array): Id (e.g. overpass id) of every row.
+
+    Every undirected edge is stored in both directions.
+    """
+
+    def __init__(self, indptr, indices, weights, node_ids):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.node_ids = np.asarray(node_ids)
+        self.index = {node_id: row for row, node_id in enumerate(self.node_ids.tolist())}
+
+    #builds the graph out of edge arrays (e.g. EdgeBuilder.to_arrays())
+    #node_ids gives the nodes (and their order), default are all ids used by the edges
+    #if an edge is given twice, the smaller weight is kept
+    @classmethod
+    def from_edges(cls, src, dst, weights, node_ids=None):
+        src = np.asarray(src)
+        dst = np.asarray(dst)
+        weights = np.asarray(weights, dtype=np.float64)
+        if node_ids is None:
+            node_ids = np.unique(np.concatenate((src, dst)))
+        node_ids = list(np.asarray(node_ids).tolist())
+        index = {node_id: row for row, node_id in enumerate(node_ids)}
+
+        #nodes which are only in the edges are added at the end (like networkx does)
+        for node_id in src.tolist() + dst.tolist():
+            if node_id not in index:
+                index[node_id] = len(node_ids)
+                node_ids.append(node_id)
+        node_ids = np.array(node_ids)
+
+        #ids -> rows, both directions, no self loops
+        src_rows = np.fromiter((index[el] for el in src.tolist()), dtype=np.int64, count=len(src))
+        dst_rows = np.fromiter((index[el] for el in dst.tolist()), dtype=np.int64, count=len(dst))
+        keep = src_rows != dst_rows
+        rows = np.concatenate((src_rows[keep], dst_rows[keep]))
+        cols = np.concatenate((dst_rows[keep], src_rows[keep]))
+        both_weights = np.concatenate((weights[keep], weights[keep]))
+
+        #sort by (row, col, weight) and keep the first (smallest) of every (row, col)
+        order = np.lexsort((both_weights, cols, rows))
+        rows, cols, both_weights = rows[order], cols[order], both_weights[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols, both_weights = rows[first], cols[first], both_weights[first]
+
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(node_ids)), out=indptr[1:])
+        return cls(indptr, cols, both_weights, node_ids)
+
+    #builds the graph out of a list of (id1, id2, weight)
+    @classmethod
+    def from_edge_list(cls, edges, node_ids=None):
+        edges = list(edges)
+        src = [el[0] for el in edges]
+        dst = [el[1] for el in edges]
+        weights = [el[2] for el in edges]
+        if node_ids is None:
+            node_ids = list(dict.fromkeys(src + dst))
+        return cls.from_edges(np.array(src), np.array(dst), weights, node_ids)
+
+    #builds the graph out of a networkx graph (weights from the edge attribute weight)
+    @classmethod
+    def from_networkx(cls, g, weight='weight'):
+        edges = [(a, b, data.get(weight, 1.0)) for a, b, data in g.edges(data=True)]
+        return cls.from_edge_list(edges, node_ids=list(g.nodes()))
+
+    #networkx graph for plotting, node attributes can be given as dict id -> value
+    def to_networkx(self, **node_attributes):
+        g = nx.Graph()
+        for node_id in self.node_ids.tolist():
+            g.add_node(node_id, **{name: values[node_id] for name, values in node_attributes.items() if node_id in values})
+
+        src, dst, weights = self.edges()
+        ids = self.node_ids.tolist()
+        g.add_weighted_edges_from((ids[a], ids[b], w) for a, b, w in zip(src.tolist(), dst.tolist(), weights.tolist()))
+        return g
+
+    #scipy sparse matrix of the graph (for scipy.sparse.csgraph)
+    def to_scipy(self):
+        n = self.num_nodes
+        return csr_matrix((self.weights, self.indices, self.indptr), shape=(n, n))
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    #number of undirected edges
+    @property
+    def num_edges(self):
+        return len(self.indices) // 2
+
+    #returns the edges (src rows, dst rows, weights) with src < dst
+    def edges(self):
+        rows = np.repeat(np.arange(self.num_nodes), np.diff(self.indptr))
+        upper = rows < self.indices
+        return rows[upper], self.indices[upper].astype(np.int64), self.weights[upper]
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    #returns (neighbour rows, weights) of a row
+    def neighbours(self, row):
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    #row of a node id, -1 if the node isn't in the graph
+    def row(self, node_id):
+        return self.index.get(node_id, -1)
+
+    def rows(self, node_ids):
+        return np.array([self.index.get(node_id, -1) for node_id in node_ids], dtype=np.int64)
+
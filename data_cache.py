@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from node_arrays import NodeArrays
+from overpass_stream import load_overpass
+from street_arrays import StreetArrays
+from way_arrays import WayArrays
+
+CACHE_DIR = "cache"
+#has to be changed if the stored arrays change
+CACHE_VERSION = 2
+
+#name of the file -> attribute of the NodeArrays / WayArrays
+NODE_COLUMNS = ('ids', 'lat', 'lon', 'junction_bits', 'order')
+WAY_COLUMNS = ('ids', 'offsets', 'node_ids')
+
+
+#sha1 of the file, read in blocks
+def file_hash(file_path, block_size=1 << 20):
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+#mtime and size of the file, to see without reading it if it changed
+def file_stat(file_path):
+    stat = os.stat(file_path)
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+#folder of the cache of one source file
+def cache_path(file_path, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, os.path.basename(file_path))
+
+
+def _load_manifest(folder):
+    try:
+        with open(os.path.join(folder, "manifest.json"), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_manifest(folder, manifest):
+    #write to a temp file first, the manifest is the last thing written and marks the cache as valid
+    temp_path = os.path.join(folder, "manifest.json.tmp")
+    with open(temp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(temp_path, os.path.join(folder, "manifest.json"))
+
+
+#returns True if the cache in folder belongs to the current version of file_path
+#mtime and size are checked first, the hash only if they changed (e.g. after a git checkout)
+def cache_is_valid(file_path, folder):
+    manifest = _load_manifest(folder)
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False
+    #two files with the same name share the folder
+    if manifest['source'] != os.path.abspath(file_path):
+        return False
+
+    stat = file_stat(file_path)
+    if manifest['mtime'] == stat['mtime'] and manifest['size'] == stat['size']:
+        return True
+    if manifest['size'] != stat['size'] or manifest['sha1'] != file_hash(file_path):
+        return False
+
+    #same content, only touched: remember the new mtime
+    manifest.update(stat)
+    _save_manifest(folder, manifest)
+    return True
+
+
+#writes the arrays as .npy files and the manifest
+def save_cache(file_path, nodes, ways, cache_dir=CACHE_DIR):
+    folder = cache_path(file_path, cache_dir)
+    os.makedirs(folder, exist_ok=True)
+
+    #old manifest away first, so a half written cache is never used
+    manifest_path = os.path.join(folder, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    save_node_arrays(folder, nodes)
+    save_way_arrays(folder, ways)
+
+    manifest = {'version': CACHE_VERSION, 'source': os.path.abspath(file_path), 'sha1': file_hash(file_path)}
+    manifest.update(file_stat(file_path))
+    _save_manifest(folder, manifest)
+    return folder
+
+
+#memory maps the arrays of the cache, nothing is read until it is used
+def load_cache(folder, mmap_mode='r'):
+    return (load_node_arrays(folder, mmap_mode), load_way_arrays(folder, mmap_mode))
+
+
+#writes the columns of the nodes as node_<column>.npy, the tags as node_tags.json
+def save_node_arrays(folder, nodes):
+    for name in NODE_COLUMNS:
+        np.save(os.path.join(folder, f"node_{name}.npy"), getattr(nodes, name))
+    #the tags are only on a few nodes, they are stored as [row, tags] pairs (null if the nodes have no tags at all)
+    with open(os.path.join(folder, "node_tags.json"), 'w') as file:
+        json.dump(None if nodes.tags is None else [[row, tags] for row, tags in nodes.tags.items()], file)
+
+
+def load_node_arrays(folder, mmap_mode='r'):
+    columns = {name: np.load(os.path.join(folder, f"node_{name}.npy"), mmap_mode=mmap_mode) for name in NODE_COLUMNS}
+    with open(os.path.join(folder, "node_tags.json"), 'r') as file:
+        pairs = json.load(file)
+    tags = None if pairs is None else {row: node_tags for row, node_tags in pairs}
+    return NodeArrays(tags=tags, **columns)
+
+
+def save_way_arrays(folder, ways):
+    for name in WAY_COLUMNS:
+        np.save(os.path.join(folder, f"way_{name}.npy"), getattr(ways, name))
+
+
+def load_way_arrays(folder, mmap_mode='r'):
+    return WayArrays(**{name: np.load(os.path.join(folder, f"way_{name}.npy"), mmap_mode=mmap_mode) for name in WAY_COLUMNS})
+
+
+#the columnar stores which are written as .npy files instead of being pickled (kind -> class, save, load)
+ARRAY_KINDS = {
+    'nodes': (NodeArrays, save_node_arrays, load_node_arrays),
+    'ways': (WayArrays, save_way_arrays, load_way_arrays),
+    'streets': (StreetArrays, lambda folder, streets: streets.save(folder), StreetArrays.load),
+}
+
+
+#returns the kind of value in ARRAY_KINDS, None if it isn't one of the columnar stores
+def array_kind(value):
+    for kind, (cls, _, _) in ARRAY_KINDS.items():
+        if isinstance(value, cls):
+            return kind
+    return None
+
+
+#writes NodeArrays, WayArrays or StreetArrays into folder, returns the kind which is needed to load them again
+def save_arrays(folder, value):
+    kind = array_kind(value)
+    os.makedirs(folder, exist_ok=True)
+    ARRAY_KINDS[kind][1](folder, value)
+    return kind
+
+
+#memory maps arrays written by save_arrays
+def load_arrays(folder, kind, mmap_mode='r'):
+    return ARRAY_KINDS[kind][2](folder, mmap_mode)
+
+
+#replaces load_overpass: parses the file only if there is no valid cache of it
+def load_overpass_cached(file_path, cache_dir=CACHE_DIR):
+    """
+    Loads an overpass export out of the binary cache (parses and caches it first if needed).
+
+    Parameters:
+    - file_path (str): The path to the JSON file.
+    - cache_dir (str): Folder of the caches, every source file gets its own subfolder.
+
+    Returns:
+    - tuple: (NodeArrays, WayArrays), the arrays are memory mapped (read only).
+    """
+    folder = cache_path(file_path, cache_dir)
+    if not cache_is_valid(file_path, folder):
+        nodes, ways = load_overpass(file_path)
+        save_cache(file_path, nodes, ways, cache_dir)
+    return load_cache(folder)
@@ -0,0 +1,107 @@
+import numpy as np
+
+#radius of the earth in km
+EARTH_RADIUS = 6371.0
+
+#default tile size (rows and columns) for the distance matrices
+BLOCK_SIZE = 2048
+
+
+#calculates the distance between two points and returns the distance in km
+#thin wrapper of haversine_pairwise, so single pairs and batches give exactly the same distances
+def haversine(lat1, lon1, lat2, lon2):
+    return float(haversine_pairwise(lat1, lon1, lat2, lon2))
+
+
+#haversine on arrays (the arrays are broadcasted against each other), coordinates in radians
+def _haversine_rad(lat1_rad, lon1_rad, lat2_rad, lon2_rad, cos_lat1=None, cos_lat2=None):
+    if cos_lat1 is None:
+        cos_lat1 = np.cos(lat1_rad)
+    if cos_lat2 is None:
+        cos_lat2 = np.cos(lat2_rad)
+
+    dlon = lon2_rad - lon1_rad
+    dlat = lat2_rad - lat1_rad
+    sin_dlat = np.sin(dlat / 2)
+    sin_dlon = np.sin(dlon / 2)
+    a = sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * (sin_dlon * sin_dlon)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return c * a.dtype.type(EARTH_RADIUS)
+
+
+def _radians(values, dtype):
+    return np.radians(np.asarray(values, dtype=np.float64)).astype(dtype, copy=False)
+
+
+#returns the distances (km) between the points of two arrays, element by element
+def haversine_pairwise(lats1, lons1, lats2, lons2, dtype=np.float64):
+    """
+    Element wise haversine distance.
+
+    Parameters:
+    - lats1, lons1, lats2, lons2 (array like): Coordinates in degrees, broadcastable against each other.
+    - dtype: np.float64 (default) or np.float32 (half the memory, ~1m precision).
+
+    Returns:
+    - array: Distances in km.
+    """
+    return _haversine_rad(_radians(lats1, dtype), _radians(lons1, dtype), _radians(lats2, dtype), _radians(lons2, dtype))
+
+
+#returns the distances (km) from one point to every point of the arrays
+def haversine_one_to_many(lat, lon, lats, lons, dtype=np.float64):
+    return haversine_pairwise(lat, lon, lats, lons, dtype=dtype)
+
+
+#returns the lenght (km) of every segment of a polyline (n points -> n-1 segments)
+def haversine_polyline(lats, lons, dtype=np.float64):
+    lat_rad = _radians(lats, dtype)
+    lon_rad = _radians(lons, dtype)
+    return _haversine_rad(lat_rad[:-1], lon_rad[:-1], lat_rad[1:], lon_rad[1:])
+
+
+#yields (row_start, column_start, tile) for the distance matrix between two point sets
+#only one tile of block_size x block_size is in memory at the same time
+def iter_haversine_tiles(lats1, lons1, lats2=None, lons2=None, block_size=BLOCK_SIZE, dtype=np.float64):
+    """
+    Streams the many-to-many distance matrix in tiles.
+
+    Parameters:
+    - lats1, lons1 (array like): Coordinates of the rows in degrees.
+    - lats2, lons2 (array like): Coordinates of the columns in degrees (default: the rows again).
+    - block_size (int): Rows and columns per tile.
+    - dtype: np.float64 or np.float32.
+
+    Yields:
+    - (int, int, array): Start row, start column and the tile of distances in km.
+    """
+    if lats2 is None:
+        lats2, lons2 = lats1, lons1
+
+    lat1_rad = _radians(lats1, dtype)
+    lon1_rad = _radians(lons1, dtype)
+    lat2_rad = _radians(lats2, dtype)
+    lon2_rad = _radians(lons2, dtype)
+    cos1 = np.cos(lat1_rad)
+    cos2 = np.cos(lat2_rad)
+
+    for i in range(0, len(lat1_rad), block_size):
+        rows = slice(i, i + block_size)
+        for j in range(0, len(lat2_rad), block_size):
+            cols = slice(j, j + block_size)
+            tile = _haversine_rad(lat1_rad[rows, None], lon1_rad[rows, None], lat2_rad[None, cols], lon2_rad[None, cols], cos1[rows, None], cos2[None, cols])
+            yield i, j, tile
+
+
+#returns the full distance matrix (km) between two point sets, computed tile by tile
+#out can be a np.memmap, if the matrix doesn't fit into the RAM
+def haversine_matrix(lats1, lons1, lats2=None, lons2=None, block_size=BLOCK_SIZE, dtype=np.float64, out=None):
+    if lats2 is None:
+        lats2, lons2 = lats1, lons1
+
+    if out is None:
+        out = np.empty((len(lats1), len(lats2)), dtype=dtype)
+
+    for i, j, tile in iter_haversine_tiles(lats1, lons1, lats2, lons2, block_size=block_size, dtype=dtype):
+        out[i:i + tile.shape[0], j:j + tile.shape[1]] = tile
+    return out
@@ -0,0 +1,112 @@
+import numpy as np
+
+from distance import haversine_polyline
+from node_arrays import as_node_arrays
+from way_arrays import as_way_arrays, drop_unknown_nodes
+
+
+#collects undirected edges without duplicates
+#(a, b) and (b, a) are the same edge, the key in the dict is always (smaller id, bigger id)
+class EdgeBuilder:
+    """
+    Undirected edge list with O(1) duplicate checks.
+
+    Parameters:
+    - rule (str): What to do with an edge which is added a second time:
+      'min' keeps the smallest weight (default), 'first' keeps the weight of the first one.
+
+    Edges from a node to itself are ignored.
+    """
+
+    RULES = ('min', 'first')
+
+    def __init__(self, rule='min'):
+        if rule not in self.RULES:
+            raise ValueError(f"unknown rule {rule}, has to be one of {self.RULES}")
+        self.rule = rule
+        self.edges = {}
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __contains__(self, edge):
+        a, b = edge[0], edge[1]
+        return ((a, b) if a <= b else (b, a)) in self.edges
+
+    def add(self, a, b, weight):
+        if a == b:
+            return
+        key = (a, b) if a <= b else (b, a)
+        old = self.edges.get(key)
+        if old is None or (self.rule == 'min' and weight < old):
+            self.edges[key] = weight
+
+    #adds a list of (a, b, weight) or three arrays
+    def add_many(self, src, dst=None, weights=None):
+        if dst is None:
+            for a, b, weight in src:
+                self.add(a, b, weight)
+        else:
+            for a, b, weight in zip(np.asarray(src).tolist(), np.asarray(dst).tolist(), np.asarray(weights).tolist()):
+                self.add(a, b, weight)
+
+    #returns the edges as NumPy arrays (src, dst, weight), src < dst
+    #edges with a weight >= max_distance are left out (None keeps all)
+    def to_arrays(self, max_distance=None):
+        count = len(self.edges)
+        src = np.fromiter((key[0] for key in self.edges), dtype=np.int64, count=count)
+        dst = np.fromiter((key[1] for key in self.edges), dtype=np.int64, count=count)
+        weight = np.fromiter(self.edges.values(), dtype=np.float64, count=count)
+
+        if max_distance is not None:
+            keep = weight < max_distance
+            src, dst, weight = src[keep], dst[keep], weight[keep]
+        return src, dst, weight
+
+    #returns the edges as list of (a, b, weight), like the old edge functions
+    def to_list(self, max_distance=None):
+        src, dst, weight = self.to_arrays(max_distance)
+        return list(zip(src.tolist(), dst.tolist(), weight.tolist()))
+
+
+#walks through every way once and connects the following retained nodes of the way
+#the weight is the length of the street between them (sum of all segments), not the straight line
+def chain_edges(nodes, ways, retained, rule='min'):
+    """
+    Edges between the retained nodes (service stations, junctions, ...) along the ways.
+
+    Parameters:
+    - nodes (NodeArrays or list): All nodes of the ways.
+    - ways (WayArrays or list): The ways with all their nodes (ids which aren't in nodes are left out).
+    - retained (array or set): Bool per row of nodes, or the ids of the retained nodes.
+    - rule (str): Rule of the EdgeBuilder for an edge which is on two ways.
+
+    Returns:
+    - EdgeBuilder: The edges (overpass ids) with the distances along the ways (km).
+    """
+    nodes = as_node_arrays(nodes)
+    ways = as_way_arrays(ways)
+    if not (isinstance(retained, np.ndarray) and retained.dtype == bool):
+        ids = np.fromiter(retained, dtype=np.int64)
+        retained = np.zeros(len(nodes), dtype=bool)
+        rows = nodes.rows(ids)
+        retained[rows[rows >= 0]] = True
+
+    #distance from the start of the way for every entry of the ways (prefix sums of the segments)
+    ways, rows = drop_unknown_nodes(nodes, ways)
+    lengths = ways.lengths
+    steps = np.zeros(len(rows))
+    steps[1:] = haversine_polyline(nodes.lat[rows], nodes.lon[rows])
+    steps[ways.offsets[:-1][lengths > 0]] = 0
+    along = np.cumsum(steps)
+
+    #following retained entries on the same way
+    kept = np.flatnonzero(retained[rows])
+    way_of_entry = np.repeat(np.arange(len(ways)), lengths)
+    src, dst = kept[:-1], kept[1:]
+    same_way = way_of_entry[src] == way_of_entry[dst]
+    src, dst = src[same_way], dst[same_way]
+
+    builder = EdgeBuilder(rule)
+    builder.add_many(ways.node_ids[src], ways.node_ids[dst], along[dst] - along[src])
+    return builder
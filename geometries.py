@@ -0,0 +1,47 @@
+import numpy as np
+import shapely
+
+#shapely type ids
+POINT = 0
+POLYGON = 3
+MULTIPOLYGON = 6
+GEOMETRYCOLLECTION = 7
+
+
+#converts a whole array of geometries at once with the shapely 2 array functions
+#Polygon -> centroid, MultiPolygon -> MultiPoint of the centroids of its polygons, Point stays,
+#GeometryCollection -> GeometryCollection of its converted parts, everything else -> None
+def convert_geometry_array(geoms):
+    geoms = np.asarray(geoms, dtype=object)
+    type_ids = shapely.get_type_id(geoms)
+    result = np.full(len(geoms), None, dtype=object)
+
+    is_point = type_ids == POINT
+    result[is_point] = geoms[is_point]
+    is_polygon = type_ids == POLYGON
+    result[is_polygon] = shapely.centroid(geoms[is_polygon])
+
+    # If it's a MultiPolygon, calculate the centroid of each polygon and return as a MultiPoint
+    multi = np.flatnonzero(type_ids == MULTIPOLYGON)
+    if len(multi) > 0:
+        parts, index = shapely.get_parts(geoms[multi], return_index=True)
+        out = np.full(len(multi), shapely.MultiPoint(), dtype=object)
+        result[multi] = shapely.multipoints(shapely.centroid(parts), indices=index, out=out)
+
+    # GeometryCollection: all parts of all collections are converted with one call (one per nesting level)
+    collection = np.flatnonzero(type_ids == GEOMETRYCOLLECTION)
+    if len(collection) > 0:
+        parts, index = shapely.get_parts(geoms[collection], return_index=True)
+        converted = convert_geometry_array(parts)
+        keep = ~shapely.is_missing(converted)
+        out = np.full(len(collection), shapely.GeometryCollection(), dtype=object)
+        result[collection] = shapely.geometrycollections(converted[keep], indices=index[keep], out=out)
+
+    return result
+
+
+#the same for one geometry
+def convert_geometries_to_points(geom):
+    geoms = np.empty(1, dtype=object)
+    geoms[0] = geom
+    return convert_geometry_array(geoms)[0]
@@ -0,0 +1,233 @@
+import time
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+from csr_graph import CSRGraph
+from distance import haversine_polyline
+from node_arrays import as_node_arrays, NodeArrays
+from placement import Coverage, lazy_greedy_cover, place_chargers
+from shortest_paths import bounded_all_pairs, update_reachability
+from snapping import SegmentIndex
+from way_arrays import WayArrays
+
+
+#keeps a placement up to date when service stations open or close, without running the whole pipeline again
+#only the reachability of the nodes near the changes is computed again, then the placement is repaired there:
+#targets without a charger get one (lazy greedy) and chargers near the changes which aren't needed any more are removed
+#the repair only looks at the targets near the changes and the candidates which reach them
+class IncrementalPlacement:
+    """
+    Incremental charger placement.
+
+    Parameters:
+    - graph (CSRGraph): The (contracted) routing graph.
+    - max_distance (float): Range R.
+    - candidates (array): Rows of the service stations (the nodes which can get a charger).
+    - targets (array): Rows of the nodes which need a charger within R, default all.
+    - chosen (array): Rows of the chargers of an existing placement, default a new greedy placement.
+    - reachable (Reachability): Optional bounded_all_pairs result of the graph with range max_distance.
+    """
+
+    def __init__(self, graph, max_distance, candidates, targets=None, chosen=None, reachable=None):
+        self.graph = graph
+        self.max_distance = max_distance
+        n = graph.num_nodes
+        self.candidates = np.zeros(n, dtype=bool)
+        self.candidates[np.asarray(candidates, dtype=np.int64)] = True
+        self.targets = np.ones(n, dtype=bool)
+        if targets is not None:
+            self.targets[:] = False
+            self.targets[np.asarray(targets, dtype=np.int64)] = True
+
+        self.reachable = reachable if reachable is not None else bounded_all_pairs(graph, max_distance)
+        if chosen is None:
+            chosen = place_chargers(graph, max_distance, np.flatnonzero(self.candidates), np.flatnonzero(self.targets), reachable=self.reachable).chosen
+        self.chosen = set(np.asarray(chosen, dtype=np.int64).tolist())
+        self.runtime = 0.0
+        #streets for station_edges, see from_contraction
+        self.nodes = None
+        self.chains = {}
+        self.segment_index = None
+        self.chain_keys = []
+
+    #builds it out of the routing_graph stage (nodes, Contraction, station node ids)
+    #the streets behind the contracted edges are kept, so new stations can be snapped with station_edges()
+    @classmethod
+    def from_contraction(cls, nodes, contraction, station_nodes, max_distance, chosen=None, reachable=None):
+        graph = contraction.graph
+        placement = cls(graph, max_distance, graph.rows(station_nodes), chosen=chosen, reachable=reachable)
+        placement.nodes = as_node_arrays(nodes)
+        placement.chains = dict(contraction.chains)
+        placement._index_streets()
+        return placement
+
+    #every chain is a way of its street nodes, chain_keys[way row] is the (id1, id2) of the chain
+    def _index_streets(self):
+        self.chain_keys = list(self.chains)
+        lengths = [len(self.chains[key]) for key in self.chain_keys]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        node_ids = np.array([node_id for key in self.chain_keys for node_id in self.chains[key]], dtype=np.int64)
+        self.segment_index = SegmentIndex(self.nodes, WayArrays(np.arange(len(lengths)), offsets, node_ids))
+
+    @property
+    def chosen_ids(self):
+        return self.graph.node_ids[sorted(self.chosen)]
+
+    #edges of a new station at (lat, lon): it is snapped onto the nearest street (within radius km)
+    #and connected to both ends of that contracted edge, returns [] if there is no street near it
+    def station_edges(self, lat, lon, radius=1):
+        result = self.segment_index.snap(lat, lon, radius)
+        if result is None:
+            return []
+        a, b = self.chain_keys[result['way']]
+        length = self.segment_index.along[self.segment_index.ways.offsets[result['way'] + 1] - 1]
+        return [(a, result['along']), (b, length - result['along'])]
+
+    #puts a new station into the street it was snapped onto (station_edges: the two ends of one chain)
+    #the chain is split at the station, so later stations are connected to it. returns False if it isn't on a chain
+    def _insert_station(self, station, edges):
+        if self.segment_index is None or len(edges) != 2 or self.nodes.row(station) >= 0:
+            return False
+        (a, distance_a), (b, distance_b) = edges
+        key = (a, b) if a <= b else (b, a)
+        chain = self.chains.get(key)
+        if chain is None:
+            return False
+
+        #position on the chain (from key[0]) and the point there
+        x = distance_a if a == key[0] else distance_b
+        rows = self.nodes.rows(chain)
+        along = np.zeros(len(rows))
+        along[1:] = np.cumsum(haversine_polyline(self.nodes.lat[rows], self.nodes.lon[rows]))
+        pos = int(np.clip(np.searchsorted(along, x, side='right') - 1, 0, len(rows) - 2))
+        t = float(np.clip((x - along[pos]) / max(along[pos + 1] - along[pos], 1e-12), 0, 1))
+        lat = self.nodes.lat[rows[pos]] + t * (self.nodes.lat[rows[pos + 1]] - self.nodes.lat[rows[pos]])
+        lon = self.nodes.lon[rows[pos]] + t * (self.nodes.lon[rows[pos + 1]] - self.nodes.lon[rows[pos]])
+
+        nodes = self.nodes
+        junction = np.append(nodes.junction, False)
+        self.nodes = NodeArrays(np.append(nodes.ids, station), np.append(nodes.lat, lat), np.append(nodes.lon, lon), np.packbits(junction), tags=nodes.tags)
+        del self.chains[key]
+        self._set_chain(chain[:pos + 1] + [station])
+        self._set_chain([station] + chain[pos + 1:])
+        return True
+
+    #a closed station which is only a point on a street (the end of two chains, no junction) is taken out of the streets again
+    def _remove_station(self, station):
+        if self.segment_index is None:
+            return False
+        keys = [key for key in self.chains if station in key]
+        row = self.nodes.row(station)
+        if len(keys) != 2 or row < 0 or self.nodes.is_junction_row(row):
+            return False
+        first = self.chains[keys[0]] if keys[0][1] == station else self.chains[keys[0]][::-1]
+        second = self.chains[keys[1]] if keys[1][0] == station else self.chains[keys[1]][::-1]
+        merged = first + second[1:]
+        if merged[0] == merged[-1] or (min(merged[0], merged[-1]), max(merged[0], merged[-1])) in self.chains:
+            return False
+        del self.chains[keys[0]], self.chains[keys[1]]
+        self._set_chain(merged)
+        return True
+
+    #stores a chain under (smaller id, bigger id), from the smaller id to the bigger one
+    def _set_chain(self, ids):
+        if ids[0] <= ids[-1]:
+            self.chains[(ids[0], ids[-1])] = list(ids)
+        else:
+            self.chains[(ids[-1], ids[0])] = list(ids[::-1])
+
+    #applies the opened and closed stations and repairs the placement around them
+    #added: list of (station id, [(neighbour id, weight), ...]) (e.g. out of station_edges), removed: station ids
+    #returns (opened, closed): ids of the new chargers and of the chargers which aren't used any more
+    def apply_delta(self, added=(), removed=()):
+        start_time = time.perf_counter()
+        before = set(self.chosen)
+        affected = np.zeros(self.graph.num_nodes, dtype=bool)
+
+        #closed stations stay in the graph (the street is still there), they just can't have a charger
+        removed_rows = self.graph.rows(removed)
+        removed_rows = removed_rows[removed_rows >= 0]
+        self.candidates[removed_rows] = False
+        self.chosen.difference_update(removed_rows.tolist())
+        for row in removed_rows.tolist():
+            affected[self.reachable.reachable(row)[0]] = True
+
+        #the streets for station_edges: new stations split their chain, closed ones are merged out of it
+        streets_changed = False
+        for station in removed:
+            streets_changed |= self._remove_station(station)
+        added = [el for el in added if len(el[1]) > 0]
+        for station, edges in added:
+            streets_changed |= self._insert_station(station, edges)
+        if streets_changed:
+            self._index_streets()
+
+        if len(added) > 0:
+            self._add_stations(added)
+            affected = np.concatenate((affected, np.zeros(self.graph.num_nodes - len(affected), dtype=bool)))
+            new_rows = self.graph.rows([el[0] for el in added])
+            #only the nodes within R of the new nodes can reach something new
+            near = dijkstra(self.graph.to_scipy(), directed=False, indices=new_rows, limit=self.max_distance, min_only=True)
+            sources = np.flatnonzero(np.isfinite(near))
+            self.reachable = update_reachability(self.reachable, self.graph, sources)
+            affected[sources] = True
+
+        self._repair(affected)
+        self.runtime = time.perf_counter() - start_time
+        ids = self.graph.node_ids.tolist()
+        return [ids[row] for row in sorted(self.chosen - before)], [ids[row] for row in sorted(before - self.chosen)]
+
+    #new station nodes (or new edges of existing nodes), the rows of the old nodes stay the same
+    def _add_stations(self, added):
+        src, dst, weights = self.graph.edges()
+        ids = self.graph.node_ids
+        new_src = [station for station, edges in added for _ in edges]
+        new_dst = [neighbour for _, edges in added for neighbour, _ in edges]
+        new_weights = [weight for _, edges in added for _, weight in edges]
+        new_ids = [station for station, _ in added if self.graph.row(station) < 0]
+
+        n = self.graph.num_nodes
+        self.graph = CSRGraph.from_edges(np.concatenate((ids[src], np.array(new_src, dtype=ids.dtype))), np.concatenate((ids[dst], np.array(new_dst, dtype=ids.dtype))),
+                                         np.concatenate((weights, new_weights)), node_ids=np.concatenate((ids, np.array(new_ids, dtype=ids.dtype))))
+        grow = self.graph.num_nodes - n
+        self.candidates = np.concatenate((self.candidates, np.zeros(grow, dtype=bool)))
+        self.targets = np.concatenate((self.targets, np.ones(grow, dtype=bool)))
+        self.candidates[self.graph.rows([el[0] for el in added])] = True
+
+    #bool per row of the nodes within max_distance of one of the rows
+    def _near(self, rows):
+        near = np.zeros(self.graph.num_nodes, dtype=bool)
+        for row in np.asarray(rows, dtype=np.int64).tolist():
+            near[self.reachable.reachable(row)[0]] = True
+        return near
+
+    #covers the targets which lost their charger, then removes the chargers in the affected part which aren't needed
+    #only the affected targets and the targets of the affected chargers are looked at, with the candidates which reach them
+    #(every charger of such a target is one of these candidates, so the counts below are complete)
+    def _repair(self, affected):
+        chosen_rows = np.array(sorted(self.chosen), dtype=np.int64)
+        affected_chargers = chosen_rows[affected[chosen_rows]]
+        target_rows = np.flatnonzero((affected | self._near(affected_chargers)) & self.targets)
+        candidate_rows = np.flatnonzero(self._near(target_rows) & self.candidates)
+        coverage = Coverage.from_reachability(self.reachable, candidate_rows, target_rows, self.max_distance)
+        candidate_pos = np.full(self.graph.num_nodes, -1, dtype=np.int64)
+        candidate_pos[candidate_rows] = np.arange(len(candidate_rows))
+        chosen_pos = candidate_pos[chosen_rows]
+        chosen_pos = chosen_pos[chosen_pos >= 0]
+
+        open_targets = coverage.gaps(chosen_pos) > self.max_distance
+        picked = lazy_greedy_cover(coverage, open_targets)
+        chosen_pos = np.concatenate((chosen_pos, picked))
+
+        #number of chargers of every target, a charger is redundant if all its targets have another one
+        count = np.bincount(np.concatenate([coverage.covers(i) for i in chosen_pos.tolist()] + [np.empty(0, dtype=np.int64)]), minlength=coverage.num_targets)
+        for i in chosen_pos.tolist():
+            if not affected[candidate_rows[i]]:
+                continue
+            covered = coverage.covers(i)
+            if np.all(count[covered] >= 2):
+                count[covered] -= 1
+                chosen_pos = chosen_pos[chosen_pos != i]
+        self.chosen = (self.chosen - set(candidate_rows.tolist())) | set(candidate_rows[chosen_pos].tolist())
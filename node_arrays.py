@@ -0,0 +1,148 @@
+import numpy as np
+
+
+#returns True if the overpass node is a junction (highway tag contains 'junction')
+def point_is_junction(row):
+    #point is juction
+    if 'tags' in row and row['tags'] and 'highway' in row['tags'] and row['tags']['highway']:
+        if 'junction' in row['tags']['highway']:
+            return True
+
+    return False
+
+
+#node dict built out of the arrays (NodeArrays.get_row), a change of it would be lost, so it can't be changed
+class NodeRow(dict):
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("rows of NodeArrays are copies and can't be changed (the own_id is the row)")
+
+    __setitem__ = __delitem__ = update = setdefault = pop = popitem = clear = _read_only
+
+    def __reduce__(self):
+        return (NodeRow, (dict(self),))
+
+
+#columnar version of the overpass node list
+#one int64 id, two float64 coordinates and one bit (junction or not) per node
+class NodeArrays:
+    """
+    Nodes stored as NumPy columns instead of a list of dicts.
+
+    Parameters:
+    - ids (array): Overpass ids (int64).
+    - lat (array): Latitudes (float64).
+    - lon (array): Longitudes (float64).
+    - junction_bits (array): Junction flags packed with np.packbits (uint8, 1 bit per node).
+    - order (array): Optional argsort of the ids, computed if it isn't given.
+    - tags (dict): Optional row -> overpass tag dict of the nodes which have tags.
+
+    The row of a node is its position in the arrays (the same as 'own_id' after add_own_id).
+    The node dicts (get_row, iterating) are read only, the own_id is the row.
+    Lookups by overpass id use np.searchsorted on the sorted copy of the ids.
+    """
+
+    def __init__(self, ids, lat, lon, junction_bits, order=None, tags=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.junction_bits = np.asarray(junction_bits, dtype=np.uint8)
+        #without the tags of the source only the junction tag is known
+        self.tags = tags
+
+        #sorted index for the id -> row lookups (order can be given, e.g. out of the cache)
+        if order is None:
+            order = np.argsort(self.ids, kind='stable')
+        self.order = np.asarray(order, dtype=np.int64)
+        self.sorted_ids = self.ids[self.order]
+
+    #builds the arrays out of a list of node dicts (or a NodeStore)
+    @classmethod
+    def from_nodes(cls, nodes):
+        nodes = list(nodes)
+        ids = np.fromiter((el['id'] for el in nodes), dtype=np.int64, count=len(nodes))
+        lat = np.fromiter((el['lat'] for el in nodes), dtype=np.float64, count=len(nodes))
+        lon = np.fromiter((el['lon'] for el in nodes), dtype=np.float64, count=len(nodes))
+        junction = np.fromiter((point_is_junction(el) for el in nodes), dtype=bool, count=len(nodes))
+        tags = {row: el['tags'] for row, el in enumerate(nodes) if el.get('tags')}
+        return cls(ids, lat, lon, np.packbits(junction), tags=tags)
+
+    #builds the arrays straight out of the output of load_json_data (ways are skipped)
+    @classmethod
+    def from_json(cls, json_data):
+        return cls.from_nodes(el for el in json_data["elements"] if el["type"] == "node")
+
+    def __len__(self):
+        return len(self.ids)
+
+    #gives node dicts like the overpass list, so old code can still loop over the nodes
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self.get_row(row)
+
+    def __contains__(self, id):
+        return self.row(id) >= 0
+
+    #bool array with the junction flag of every node
+    @property
+    def junction(self):
+        return np.unpackbits(self.junction_bits, count=len(self.ids)).astype(bool)
+
+    #memory used by the arrays in bytes
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.lat.nbytes + self.lon.nbytes + self.junction_bits.nbytes + self.order.nbytes + self.sorted_ids.nbytes
+
+    #returns the rows of the ids (array), -1 for ids which aren't in the arrays
+    def rows(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        pos = np.searchsorted(self.sorted_ids, ids)
+        pos = np.minimum(pos, len(self.sorted_ids) - 1)
+        found = self.sorted_ids[pos] == ids if len(self.sorted_ids) > 0 else np.zeros(ids.shape, dtype=bool)
+        return np.where(found, self.order[pos], -1)
+
+    #returns the row of one id, -1 if the id isn't in the arrays
+    def row(self, id):
+        return int(self.rows([id])[0])
+
+    def is_junction_row(self, row):
+        return bool(self.junction_bits[row >> 3] & (0x80 >> (row & 7)))
+
+    def is_junction(self, id):
+        return self.is_junction_row(self.row(id))
+
+    #returns a touple of (lat, lon)
+    def coords(self, id):
+        row = self.row(id)
+        return (float(self.lat[row]), float(self.lon[row]))
+
+    #returns a (read only) node dict for the row with all its tags
+    #without the tags of the source, junctions get the tag 'highway': 'motorway_junction'
+    def get_row(self, row):
+        node = {'type': 'node', 'id': int(self.ids[row]), 'lat': float(self.lat[row]), 'lon': float(self.lon[row]), 'own_id': row}
+        if self.tags is not None:
+            if row in self.tags:
+                node['tags'] = self.tags[row]
+        elif self.is_junction_row(row):
+            node['tags'] = {'highway': 'motorway_junction'}
+        return NodeRow(node)
+
+    #returns the node dict with the overpass id, None if there is none
+    def get(self, id):
+        row = self.row(id)
+        if row < 0:
+            return None
+        return self.get_row(row)
+
+    #the own_id of a node is its row
+    def get_own_id(self, own_id):
+        if own_id < 0 or own_id >= len(self.ids):
+            return None
+        return self.get_row(own_id)
+
+
+#returns nodes as NodeArrays (converts lists of node dicts and NodeStores)
+def as_node_arrays(nodes):
+    if isinstance(nodes, NodeArrays):
+        return nodes
+    return NodeArrays.from_nodes(nodes)
@@ -0,0 +1,68 @@
+from node_arrays import NodeArrays
+
+
+#keeps the overpass node dicts and indexes them by 'id' and 'own_id'
+#every lookup is a dict access instead of a scan over all nodes
+class NodeStore:
+    """
+    List of overpass nodes with O(1) lookups by overpass id and by 'own_id'.
+
+    Iterating over the store gives the node dicts in the original order, so it
+    can be used everywhere a list of nodes was used before.
+
+    Parameters:
+    - nodes (list): List of dicts like {'type': 'node', 'id': 304610017, 'lat': 44.88, 'lon': -0.57}.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = list(nodes)
+        self.by_id = {}
+        self.by_own_id = {}
+        self.reindex()
+
+    #rebuilds both indexes, call it after the dicts got changed (e.g. by add_own_id)
+    def reindex(self):
+        self.by_id = {node['id']: node for node in self.nodes}
+        self.by_own_id = {node['own_id']: node for node in self.nodes if 'own_id' in node}
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        return self.nodes[index]
+
+    #node dicts are checked like in the list, anything else is taken as overpass id
+    def __contains__(self, item):
+        if isinstance(item, dict):
+            return self.by_id.get(item.get('id')) == item
+        return item in self.by_id
+
+    #returns the node dict with the overpass id, None if there is none
+    def get(self, id):
+        return self.by_id.get(id)
+
+    #returns the node dict with the 'own_id', None if there is none
+    #the own_ids can be added after the store was built (add_own_id on the list), so a miss reindexes once
+    def get_own_id(self, own_id):
+        row = self.by_own_id.get(own_id)
+        if row is None:
+            self.reindex()
+            row = self.by_own_id.get(own_id)
+        return row
+
+    #returns a touple of (lat, lon)
+    def coords(self, id):
+        row = self.by_id[id]
+        return (row['lat'], row['lon'])
+
+
+#returns nodes as NodeStore (builds one if nodes is still a plain list)
+#NodeArrays have the same lookups, so they are returned as they are
+#a plain list is indexed again on every call, so pass the NodeStore along (split_array_... returns one)
+def as_node_store(nodes):
+    if isinstance(nodes, (NodeStore, NodeArrays)):
+        return nodes
+    return NodeStore(nodes)
@@ -1,6 +1,12 @@
 from shapely.geometry import Polygon, Point, MultiPolygon, GeometryCollection, LineString
 import myBib as my
 import os
+import sys
+#the shared modules (csr_graph, placement, ...) are in the folder above
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from csr_graph import CSRGraph
+from placement import place_chargers
+from shortest_paths import bounded_all_pairs
 import json
 import networkx as nx
 import matplotlib.pyplot as plt
@@ -101,10 +107,9 @@ def create_edges(nodes):
 
     return edges
 
+#returns the graph as CSRGraph (networkx only for plotting: G.to_networkx())
 def create_Graph(all_nodes, edges):
-    G = nx.Graph()
-    G.add_nodes_from(all_nodes.keys())
-    G.add_weighted_edges_from(edges)
+    G = CSRGraph.from_edge_list(edges, node_ids=list(all_nodes.keys()))
     return G
 
 #---------main--------------------
@@ -908,90 +913,78 @@ edges = edges_radius50
 
 #create Graph
 G = create_Graph(all_nodes, edges)
+#networkx version of the graph, only for drawing
+G_plot = G.to_networkx()
 
 # # Create a dictionary to map node IDs to their coordinates
 node_coordinates = {node_id: coords for node_id, coords in all_nodes.items()}
 
 
 # # Get edge labels as a dictionary (edge: weight)
-edge_labels = {(u, v): d['weight'] for u, v, d in G.edges(data=True)}
+edge_labels = {(u, v): d['weight'] for u, v, d in G_plot.edges(data=True)}
 
 
-print(G)
+print(G_plot)
 print("-----------------------------------")
-print(f"len: {len(node_coordinates)}, {len(G)}")
+print(f"len: {len(node_coordinates)}, {G.num_nodes}")
 # # Plot the graph with node labels as coordinates
-nx.draw(G, pos=node_coordinates, with_labels=False, node_color='skyblue', labels={k: str(v) for k, v in node_coordinates.items()})
-# nx.draw_networkx_edge_labels(G, pos=node_coordinates, edge_labels=edge_labels)
+nx.draw(G_plot, pos=node_coordinates, with_labels=False, node_color='skyblue', labels={k: str(v) for k, v in node_coordinates.items()})
+# nx.draw_networkx_edge_labels(G_plot, pos=node_coordinates, edge_labels=edge_labels)
 plt.show()
 
-fw_distances = nx.floyd_warshall(G)
-
-G.add_weighted_edges_from(edges)
-
-# Create a dictionary to map node IDs to their coordinates
-node_coordinates = {node_id: coords for node_id, coords in all_nodes.items()}
-
 # Set the size of the plot
 plt.figure(figsize=(10, 8))  # You can adjust the size as needed
 
 # Plot the graph with smaller node sizes (e.g., node_size=100) and larger plot
-nx.draw(G, pos=node_coordinates, with_labels=False, node_size=100, node_color='skyblue')
+nx.draw(G_plot, pos=node_coordinates, with_labels=False, node_size=100, node_color='skyblue')
 
 
 
 # If you need to draw labels, uncomment the following line
-# nx.draw_networkx_labels(G, pos=node_coordinates, labels={node: str(coords) for node, coords in node_coordinates.items()})
+# nx.draw_networkx_labels(G_plot, pos=node_coordinates, labels={node: str(coords) for node, coords in node_coordinates.items()})
 
 # Omitted the edge labels as per previous instructions
-# nx.draw_networkx_edge_labels(G, pos=node_coordinates, edge_labels=edge_labels)
+# nx.draw_networkx_edge_labels(G_plot, pos=node_coordinates, edge_labels=edge_labels)
 
 # Show the plot
 plt.show()
 plt. savefig("aquitaine.pdf", format="pdf", bbox_inches="tight")
 
-# Compute the Floyd-Warshall distances
-fw_distances = nx.floyd_warshall(G)
+# Compute the distances of all shortest paths within the range of a car (60km, the weights are in m)
+fw_distances = bounded_all_pairs(G, max_distance=60000)
 
 
 #----
-dominating_set = nx.algorithms.dominating_set(G)
+#chargers so that every service station has one within the range of a car (instead of nx.dominating_set, which ignored the distances)
+placement = place_chargers(G, 60000, reachable=fw_distances)
+charger_nodes = set(placement.ids.tolist())
 
 
-print("An approximate minimum dominating set:", dominating_set)
+print(placement.report())
+print("Service stations with a charger:", charger_nodes)
 #----
-# Assuming 'G', 'edges', and 'all_nodes' are defined elsewhere in your code
-G.add_weighted_edges_from(edges)
 
-# Create a dictionary to map node IDs to their coordinates
-node_coordinates = {node_id: coords for node_id, coords in all_nodes.items()}
-
-# Calculate the dominating set for the graph G
-dominating_set = nx.algorithms.dominating_set(G)
-
-# Split nodes into dominating set and others
-dominating_nodes = {node for node in dominating_set}
-other_nodes = set(G.nodes()) - dominating_nodes
+# Split nodes into stations with a charger and others
+other_nodes = set(G.node_ids.tolist()) - charger_nodes
 
 # Set the size of the plot
 plt.figure(figsize=(10, 8))  # You can adjust the size as needed
 
-# Draw nodes not in the dominating set
-nx.draw_networkx_nodes(G, pos=node_coordinates, nodelist=other_nodes, node_size=100, node_color='skyblue')
+# Draw nodes without a charger
+nx.draw_networkx_nodes(G_plot, pos=node_coordinates, nodelist=other_nodes, node_size=100, node_color='skyblue')
 
-# Draw nodes in the dominating set with a different color
-nx.draw_networkx_nodes(G, pos=node_coordinates, nodelist=dominating_nodes, node_size=100, node_color='red')
+# Draw nodes with a charger with a different color
+nx.draw_networkx_nodes(G_plot, pos=node_coordinates, nodelist=charger_nodes, node_size=100, node_color='red')
 
 # Draw the edges
-nx.draw_networkx_edges(G, pos=node_coordinates)
+nx.draw_networkx_edges(G_plot, pos=node_coordinates)
 
 
 # If you need to draw labels, uncomment the following line
-# nx.draw_networkx_labels(G, pos=node_coordinates, labels={node: str(coords) for node, coords in node_coordinates.items()})
+# nx.draw_networkx_labels(G_plot, pos=node_coordinates, labels={node: str(coords) for node, coords in node_coordinates.items()})
 
 # Omitted the edge labels as per previous instructions
-# nx.draw_networkx_edge_labels(G, pos=node_coordinates, edge_labels=edge_labels)
+# nx.draw_networkx_edge_labels(G_plot, pos=node_coordinates, edge_labels=edge_labels)
 
 # Show the plot
 plt.show()
-
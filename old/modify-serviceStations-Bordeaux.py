@@ -1,26 +1,15 @@
 import geopandas as gpd
+import numpy as np
+import shapely
 from shapely.geometry import Polygon, Point, MultiPolygon, GeometryCollection, LineString, MultiPoint
 import pandas as pd
 from shapely.wkt import loads
 import math
 import myBib as my
+from clustering import merge_near_points, isolated_points
+from geometries import POINT, convert_geometry_array, convert_geometries_to_points
+
 
-def convert_geometries_to_points(geom):
-    if isinstance(geom, Polygon):
-        return geom.centroid
-    elif isinstance(geom, MultiPolygon):
-        # If it's a MultiPolygon, calculate the centroid of each polygon and return as a MultiPoint
-        centroids = [polygon.centroid for polygon in geom]
-        return MultiPoint(centroids)
-    elif isinstance(geom, Point):
-        return geom
-    elif isinstance(geom, GeometryCollection):
-        # Handle GeometryCollection by recursively converting each geometry within it
-        new_geometries = [convert_geometries_to_points(sub_geom) for sub_geom in geom.geoms]
-        return GeometryCollection(new_geometries)
-    else:
-        return None  # Skip unknown geometry types
-    
 #Convert Polygons to Points by calculating the average point of each Polygon.
 def convert_polygons_to_points(gdf):
     """
@@ -32,16 +21,11 @@ def convert_polygons_to_points(gdf):
     Returns:
         gpd.GeoDataFrame: GeoDataFrame with Polygons converted to Points.
     """
-    new_features = []
+    # all geometries at once, rows with unknown geometry types are dropped
+    points = convert_geometry_array(gdf.geometry.to_numpy())
+    keep = ~shapely.is_missing(points)
 
-    for index, row in gdf.iterrows():
-        new_geometry = convert_geometries_to_points(row['geometry'])
-        if new_geometry is not None:
-            row['geometry'] = new_geometry
-            new_features.append(row)
-
-    # Create a new GeoDataFrame from the modified features
-    gdf_with_points = gpd.GeoDataFrame(new_features, crs=gdf.crs)
+    gdf_with_points = gdf[keep].set_geometry(points[keep], crs=gdf.crs)
 
     return gdf_with_points
 
@@ -56,63 +40,35 @@ def sort_geodata(gdf):
     Returns:
         gpd.GeoDataFrame: A simplified GeoDataFrame with 'id', 'x', and 'y' columns for each point feature.
     """
-    # Create empty lists to store extracted data
-    ids = []
-    x_coords = []
-    y_coords = []
-
-    # Iterate through the data
-    for index, row in gdf.iterrows():
-        ids.append(row["id"])
-        geo = row["geometry"]
-        x_coords.append(geo.x)
-        y_coords.append(geo.y)
-    
-    # Create new Dataframe
+    # points stay, MultiPoints and collections are represented by their centroid
+    geoms = gdf.geometry.to_numpy().copy()
+    not_point = shapely.get_type_id(geoms) != POINT
+    geoms[not_point] = shapely.centroid(geoms[not_point])
+
     # Create a new GeoDataFrame
-    geometry = [Point(x, y) for x, y in zip(x_coords, y_coords)]
-    new_gdf = gpd.GeoDataFrame({"id": ids, "geometry": geometry})
+    geometry = shapely.points(shapely.get_x(geoms), shapely.get_y(geoms))
+    new_gdf = gpd.GeoDataFrame({"id": gdf["id"].to_numpy(), "geometry": geometry})
 
 
     return(new_gdf)
 
+#merges service stations nearer than max_lenght (km), the first one of every cluster is kept
+#returns the GeoDataFrame and a dict id -> id of the service station which represents it
 def merge_near_service_stations(gdf, max_lenght=0.250):
+    #points are (lon, lat)
+    keep, representative = merge_near_points(gdf.geometry.y.to_numpy(), gdf.geometry.x.to_numpy(), max_lenght)
+    ids = gdf['id'].to_numpy()
+    mapping = dict(zip(ids.tolist(), ids[representative].tolist()))
+
+    print(f"deleated {int((~keep).sum())} service stations, because there is one nearer than {max_lenght}km")
+    return gdf[keep], mapping
+
+
 
-    for index, row in gdf.iterrows():
-        point = row["geometry"]
-        id = row['id']
-        for otherindex, otherrow in gdf.iterrows():
-            if(index == otherindex):
-                continue
-            otherPoint = otherrow["geometry"]
-            otherid = otherrow['id']
-
-            currlen = my.get_Lenght(point, otherPoint)
-            if(currlen < max_lenght):
-                gdf = my.delete_element_by_id(gdf, id)
-                print(f"deleated, beacuse len={len}")
-                break
-                
-    return gdf
-
-
-
-def deleate_Nodes_alone(gdf):
-    #check for every Point, if there is another Point nearer than 60 km
-    for index, row in gdf.iterrows():
-        point = row["geometry"]
-        for otherindex, otherrow in gdf.iterrows():
-            if(index == otherindex):
-                continue
-            otherPoint = otherrow["geometry"]
-            #print(f"Point: {point}, otherPoint: {otherPoint}")
-            lenght = my.get_Lenght(point, otherPoint)
-            #print(f"lenght: {lenght}")
-            if(lenght > 60):
-                gdf = gdf.drop(index)
-                #print(f"Service Station {str(index)} was deleated")
-                break
-    return gdf
+#deleates every service station which has no other one nearer than 60 km
+def deleate_Nodes_alone(gdf, max_lenght=60):
+    alone = isolated_points(gdf.geometry.y.to_numpy(), gdf.geometry.x.to_numpy(), max_lenght)
+    return gdf[~alone]
 
     
 
@@ -149,7 +105,7 @@ my.plot_geo_datafram_service_stations(dataframe3, title=file_name, to_pdf=file_n
 
 #delete nodes alone and merge clusters
 dataframe4 = deleate_Nodes_alone(dataframe3)
-dataframe5 = merge_near_service_stations(dataframe4)
+dataframe5, service_station_mapping = merge_near_service_stations(dataframe4)
 
 #save and print
 file_name = "service-Stations-" + name + "-1.3"
@@ -209,7 +165,7 @@ if dataframe is not None:
 '''
 load_1_2 = my.load_geojson_to_dataframe("serviceStations-Nodes-Bordeaux-1.2.geojson")
 
-fin = merge_near_service_stations(load_1_2)
+fin, _ = merge_near_service_stations(load_1_2)
 my.save_geodataframe_to_geojson(fin, "serviceStations-Nodes-Bordeaux-1.4.geojson")
 my.plot_geo_datafram_service_stations(fin, title="serviceStations-Nodes-Bordeaux-1.3", to_pdf="serviceStations-Nodes-Bordeaux-1.3")
 '''
\ No newline at end of file
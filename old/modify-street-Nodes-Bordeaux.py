@@ -5,6 +5,7 @@ from shapely.wkt import loads
 import math
 import matplotlib.pyplot as plt
 import myBib as my
+from clustering import merge_near_points
 
 #retuns the coordinates of point or LineString of Id
 def get_Points_by_id(gdf, id: int):
@@ -35,39 +36,21 @@ def get_Points_of_row(target_row):
 
 
 #merges junctions to one node
-def merge_junctions(gdf):    
-# deleate all motorway_junction elements if there is a motorway_junction element nearer than distance(100m)  
-    
-    deleated_counter = 0
+#deleate all motorway_junction elements if there is a motorway_junction element nearer than distance(250m),
+#the first junction of every cluster is kept. Returns the GeoDataFrame and a dict id -> id of the junction which represents it
+def merge_junctions(gdf, distance=0.25):
     # Filter the GeoDataFrame based on the "highway" property
-    junction_gdf = gdf[gdf['highway'] == "motorway_junction"]    
+    junction_gdf = gdf[gdf['highway'] == "motorway_junction"]
     print(f"merging all junction Points. Total points: {len(junction_gdf)}")
-    #check for every junction, if there is another one nearer than 100m. If yes, deleate it
-    distance = 0.1 # distance in km
-    for index, row in junction_gdf.iterrows():
-        # Access and work with the data in each row
-        element_id = row['id']  # Access the 'id' column
-        
-        #get coordinates and create point
-        coordinates = get_Points_of_row(row)
-        first_point = Point(coordinates[0],coordinates[1])
-
-        for secindex, secrow in junction_gdf.iterrows():
-            secelement_id = secrow['id']  # Access the 'id' column
-
-            #get coordinates and create point
-            seccoordinates = get_Points_of_row(secrow)
-            second_point = Point(seccoordinates[0],seccoordinates[1])
-
-            #chekc if the two point are nearer than 250m
-            #print(f"Two Points: A:{first_point} - B:{second_point}, lenght: {getLenght(first_point, second_point)}")
-            if(my.get_Lenght(first_point, second_point) < 0.25 and element_id is not secelement_id):
-                my.delete_element_by_id(gdf, element_id)
-                #print(f"point {element_id} deleted, because of {secelement_id}")
-                deleated_counter += 1
-                break
-    print(f"{deleated_counter} Points deleted")
-    return gdf
+
+    #junctions are points (lon, lat)
+    keep, representative = merge_near_points(junction_gdf.geometry.y.to_numpy(), junction_gdf.geometry.x.to_numpy(), distance)
+    ids = junction_gdf['id'].to_numpy()
+    mapping = dict(zip(ids.tolist(), ids[representative].tolist()))
+
+    deleted_ids = set(ids[~keep].tolist())
+    print(f"{len(deleted_ids)} Points deleted")
+    return gdf[~gdf['id'].isin(deleted_ids)], mapping
     
 
 file_path = "street-Nodes-Bordeaux.geojson"
@@ -84,7 +67,7 @@ my.save_geodataframe_to_geojson(dataframe1, file_name)
 my.plot_geo_dataframe_highway(dataframe1, title=file_name, to_pdf=file_name, )
 
 #merge junctions to one point
-dataframe2 = merge_junctions(dataframe1)
+dataframe2, junction_mapping = merge_junctions(dataframe1)
 
 #save and print
 file_name = "street-Nodes-" + name + "-1.1"
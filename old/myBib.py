@@ -5,6 +5,11 @@ from shapely.wkt import loads
 import math
 import matplotlib.pyplot as plt
 import os #to work with files, directories and other system ressourses
+import sys
+
+#the shared modules (distance, ...) are in the main folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from distance import haversine
 
 #Load GeoJSON data from a file into a GeoDataFrame.
 def load_geojson_to_dataframe(file_path):
@@ -72,30 +77,7 @@ def delete_element_by_id(gdf, element_id):
 
 #calculates the distance between two points using habersines euation (in km)
 def get_Lenght(a : Point, b: Point):
-    # Radius of the Earth in kilometers
-    R = 6371.0
-
-    #get Coordinates
-    lat1 = a.x
-    lon1 = a.y
-    lat2 = b.x
-    lon2 = b.y
-
-    # Convert latitude and longitude from degrees to radians
-    lat1_rad = math.radians(lat1)
-    lon1_rad = math.radians(lon1)
-    lat2_rad = math.radians(lat2)
-    lon2_rad = math.radians(lon2)
-
-    # Haversine formula
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
-    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    distance = R * c
-
-    #print(f"distance: {distance}")
-    return distance
+    return haversine(a.x, a.y, b.x, b.y)
 
 #plots the graph ( if to_pdf has a name also to pdf)
 def plot_geo_dataframe_highway(gdf, title="Map", legend_title="Legend", xlabel="Longitude", ylabel="Latitude", legend=True, to_pdf='', display=False):
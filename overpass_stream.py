@@ -0,0 +1,135 @@
+import json
+import re
+from array import array
+
+import numpy as np
+
+from node_arrays import NodeArrays, point_is_junction
+from way_arrays import WayArrays
+
+#bytes read from the file at once
+CHUNK_SIZE = 1 << 16
+
+_ELEMENTS_START = re.compile(r'"elements"\s*:\s*\[')
+_SKIP = re.compile(r'[\s,]*')
+
+
+#yields the elements of an overpass export one after another
+#only the current chunk and the current element are in memory, not the whole file
+def iter_elements(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Walks through the "elements" array of an overpass JSON file.
+
+    Parameters:
+    - file_path (str): The path to the JSON file.
+    - chunk_size (int): Number of characters read at once.
+
+    Returns:
+    - generator: The element dicts (like json_data["elements"]).
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as file:
+        buffer = ''
+        eof = False
+
+        #search the start of the elements array
+        while True:
+            match = _ELEMENTS_START.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            if eof:
+                return
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            #the key could be cut in two, keep the end of the buffer
+            buffer = buffer[-32:] + chunk
+
+        pos = 0
+        while True:
+            pos = _SKIP.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                #element isn't complete yet, read the next chunk
+                if eof:
+                    raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+
+            yield element
+            pos = end
+            #drop the elements which are done, so the buffer stays small
+            if pos > chunk_size:
+                buffer = buffer[pos:]
+                pos = 0
+
+
+#growable columns, the output arrays are the only thing which grows with the file
+class _NodeColumns:
+
+    def __init__(self):
+        self.ids = array('q')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.junction = array('B')
+        self.tags = {}
+
+    def add(self, el):
+        if el.get('tags'):
+            self.tags[len(self.ids)] = el['tags']
+        self.ids.append(el['id'])
+        self.lat.append(el['lat'])
+        self.lon.append(el['lon'])
+        self.junction.append(point_is_junction(el))
+
+    def to_node_arrays(self):
+        junction = np.frombuffer(self.junction, dtype=np.uint8).astype(bool)
+        return NodeArrays(np.frombuffer(self.ids, dtype=np.int64), np.frombuffer(self.lat, dtype=np.float64), np.frombuffer(self.lon, dtype=np.float64), np.packbits(junction), tags=self.tags)
+
+
+class _WayColumns:
+
+    def __init__(self):
+        self.ids = array('q')
+        self.offsets = array('q', [0])
+        self.node_ids = array('q')
+
+    def add(self, el):
+        self.ids.append(el['id'])
+        self.node_ids.extend(el['nodes'])
+        self.offsets.append(len(self.node_ids))
+
+    def to_way_arrays(self):
+        return WayArrays(np.frombuffer(self.ids, dtype=np.int64), np.frombuffer(self.offsets, dtype=np.int64), np.frombuffer(self.node_ids, dtype=np.int64))
+
+
+#reads an overpass export straight into the columnar store
+#replaces load_json_data + split_array_highway / split_array_service_stations
+def load_overpass(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Parses an overpass JSON file into NodeArrays and WayArrays.
+
+    Parameters:
+    - file_path (str): The path to the JSON file.
+    - chunk_size (int): Number of characters read at once.
+
+    Returns:
+    - tuple: (NodeArrays, WayArrays)
+    """
+    nodes = _NodeColumns()
+    ways = _WayColumns()
+    for el in iter_elements(file_path, chunk_size):
+        if el["type"] == "node":
+            nodes.add(el)
+        elif el["type"] == "way":
+            ways.add(el)
+        else:
+            print("ERROR: There shouldn't be another type (exept node and way)")
+    return (nodes.to_node_arrays(), ways.to_way_arrays())
@@ -0,0 +1,247 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+
+from data_cache import array_kind, file_hash, load_arrays, save_arrays
+
+PIPELINE_DIR = os.path.join("cache", "pipeline")
+#only modules in this folder are part of the keys (not numpy, scipy, ...)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+#hash of the code of a function (or class): its source, or the bytecode and constants if there is no source
+def code_hash(func):
+    try:
+        text = inspect.getsource(func)
+    except (OSError, TypeError):
+        code = getattr(func, '__code__', None)
+        text = func.__qualname__ if code is None else code.co_code.hex() + repr(code.co_consts)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+#all global names used by the code, the ones of lambdas and inner functions as well
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+#the module of obj if it is a file of the project, else None
+def _project_module(obj):
+    module = obj if inspect.ismodule(obj) else sys.modules.get(getattr(obj, '__module__', None))
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    path = os.path.abspath(path)
+    if not path.startswith(PROJECT_DIR + os.sep) or 'site-packages' in path:
+        return None
+    return module
+
+
+#hashes of everything a stage function depends on:
+#- functions and classes of the same file as the stage (e.g. the script): their code, and what they use in turn
+#- modules of the project (edge_builder, snapping, ...): the whole file, and the project modules it imports
+#  (depends can name modules which can't be seen in the code, e.g. if a function is looked up by name)
+def dependency_hashes(func, depends=()):
+    hashes = {}
+    seen = set()
+    todo = [func] + [sys.modules[name] if isinstance(name, str) else name for name in depends]
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if inspect.ismodule(obj):
+            module = _project_module(obj)
+            if module is None:
+                continue
+            hashes[module.__name__] = file_hash(module.__file__)
+            todo.extend(value for value in vars(module).values() if inspect.ismodule(value) or inspect.isfunction(value) or inspect.isclass(value))
+            continue
+
+        #the same file as the stage: only the code which is used
+        if inspect.isfunction(obj) and obj.__globals__ is func.__globals__:
+            if obj is not func:
+                hashes[obj.__qualname__] = code_hash(obj)
+            todo.extend(obj.__globals__[name] for name in _global_names(obj.__code__) if name in obj.__globals__)
+            #stages defined inside a function see its variables as closure cells
+            for cell in obj.__closure__ or ():
+                try:
+                    todo.append(cell.cell_contents)
+                except ValueError:
+                    pass
+        elif inspect.isclass(obj) and obj.__module__ == func.__module__:
+            hashes[obj.__qualname__] = code_hash(obj)
+            todo.extend(value for value in vars(obj).values() if inspect.isfunction(value))
+        elif inspect.isfunction(obj) or inspect.isclass(obj):
+            todo.append(_project_module(obj))
+    return hashes
+
+
+#stands in the pickle of a stage result for arrays which are stored as .npy files in the subfolder
+class _StoredArrays:
+
+    def __init__(self, kind, subfolder):
+        self.kind = kind
+        self.subfolder = subfolder
+
+
+#writes the columnar stores of the result (also in tuples and lists) into subfolders of path
+#returns the result with _StoredArrays in their place
+def _split_arrays(result, path, arrays):
+    kind = array_kind(result)
+    if kind is not None:
+        subfolder = str(len(arrays))
+        arrays.append(subfolder)
+        save_arrays(os.path.join(path, subfolder), result)
+        return _StoredArrays(kind, subfolder)
+    if type(result) in (tuple, list):
+        return type(result)(_split_arrays(el, path, arrays) for el in result)
+    return result
+
+
+#the other way round: memory maps the stored arrays
+def _join_arrays(skeleton, path):
+    if isinstance(skeleton, _StoredArrays):
+        return load_arrays(os.path.join(path, skeleton.subfolder), skeleton.kind)
+    if type(skeleton) in (tuple, list):
+        return type(skeleton)(_join_arrays(el, path) for el in skeleton)
+    return skeleton
+
+
+#one step of the pipeline: func(*values of the inputs, **params)
+class Stage:
+
+    def __init__(self, name, func, inputs=(), params=None, files=(), cache=True, version=0, depends=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.files = tuple(files)
+        self.cache = cache
+        self.version = version
+        self.depends = tuple(depends)
+
+
+#runs stages which depend on each other and stores the result of every stage
+#the result is stored under a hash of the stage function, the code it uses, the parameters, the content of the files
+#and the keys of its inputs, so a stage is only computed again if something it depends on changed
+class Pipeline:
+    """
+    Stage runner with content addressed checkpoints.
+
+    Parameters:
+    - cache_dir (str): Folder of the stored results (one folder per stage and key).
+      NodeArrays, WayArrays and StreetArrays in the result (also in tuples and lists) are written as .npy files
+      (data_cache.save_arrays) and memory mapped when they are loaded, the rest is pickled.
+    - verbose (bool): Print for every stage if it was loaded or computed.
+
+    Stages are added with the decorator stage(), pipeline.run(name) returns the result of a stage
+    and computes (or loads) only the stages it needs.
+    """
+
+    def __init__(self, cache_dir=PIPELINE_DIR, verbose=True):
+        self.cache_dir = cache_dir
+        self.verbose = verbose
+        self.stages = {}
+        self.results = {}
+        self._keys = {}
+
+    #decorator to add a stage
+    #inputs: names of the stages whose results are given to the function (in that order)
+    #params: keyword arguments of the function, part of the key (e.g. radius, max_distance)
+    #files: names of params which are file paths, the key uses the content of the files
+    #cache: False for stages which shouldn't be stored (e.g. they have their own cache)
+    #version: has to be changed if something the key doesn't see changes (e.g. the data of a file which isn't in files)
+    #depends: modules (or their names) the stage uses which can't be seen in its code
+    #the code of the stage function, the functions of its file it calls and the project modules it uses
+    #(with the modules they import) are part of the key, see dependency_hashes
+    def stage(self, name, inputs=(), params=None, files=(), cache=True, version=0, depends=()):
+        def add(func):
+            for input_name in inputs:
+                if input_name not in self.stages:
+                    raise ValueError(f"stage {name}: unknown input {input_name}")
+            self.stages[name] = Stage(name, func, inputs, params, files, cache, version, depends)
+            return func
+        return add
+
+    #key of a stage: hash of name, version, code of the function and its dependencies, params, file contents and the keys of the inputs
+    def key(self, name):
+        if name in self._keys:
+            return self._keys[name]
+
+        stage = self.stages[name]
+        description = {
+            'name': name,
+            'version': stage.version,
+            'code': code_hash(stage.func),
+            'depends': dependency_hashes(stage.func, stage.depends),
+            'params': stage.params,
+            'files': {param: file_hash(stage.params[param]) for param in stage.files},
+            'inputs': [self.key(input_name) for input_name in stage.inputs],
+        }
+        key = hashlib.sha1(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+        self._keys[name] = key
+        return key
+
+    #folder of the stored result of a stage, result.pkl in it is written last and marks the result as complete
+    def path(self, name):
+        return os.path.join(self.cache_dir, f"{name}-{self.key(name)[:16]}")
+
+    #returns the result of a stage (from memory, from disk or computed)
+    def run(self, name):
+        if name in self.results:
+            return self.results[name]
+
+        stage = self.stages[name]
+        path = self.path(name)
+        if stage.cache and os.path.exists(os.path.join(path, "result.pkl")):
+            result = self._load(path)
+            self._log(name, "loaded")
+        else:
+            start = time.time()
+            values = [self.run(input_name) for input_name in stage.inputs]
+            result = stage.func(*values, **stage.params)
+            self._log(name, f"computed in {time.time() - start:.2f}s")
+            if stage.cache:
+                self._save(path, result)
+
+        self.results[name] = result
+        return result
+
+    #results of several stages
+    def run_all(self, names=None):
+        if names is None:
+            names = list(self.stages)
+        return {name: self.run(name) for name in names}
+
+    #forgets everything in memory (e.g. after a file changed), the stored results stay
+    def reset(self):
+        self.results = {}
+        self._keys = {}
+
+    def _save(self, path, result):
+        os.makedirs(path, exist_ok=True)
+        arrays = []
+        skeleton = _split_arrays(result, path, arrays)
+        #write to a temp file first, so there is never a half written result
+        temp_path = os.path.join(path, "result.pkl.tmp")
+        with open(temp_path, 'wb') as file:
+            pickle.dump(skeleton, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, os.path.join(path, "result.pkl"))
+
+    def _load(self, path):
+        with open(os.path.join(path, "result.pkl"), 'rb') as file:
+            skeleton = pickle.load(file)
+        return _join_arrays(skeleton, path)
+
+    def _log(self, name, text):
+        if self.verbose:
+            print(f"stage {name}: {text}")
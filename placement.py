@@ -0,0 +1,463 @@
+import heapq
+import math
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from csr_graph import CSRGraph
+from corridors import charger_distances, corridor_cover
+from shortest_paths import bounded_all_pairs
+
+#scipy.optimize.milp (HiGHS) is only in newer scipy versions, the exact mode uses branch and bound without it
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:
+    milp = None
+
+
+#which targets every candidate covers (targets within max_distance of the candidate)
+#stored like a CSR matrix: the covered targets of candidate i are covered[indptr[i]:indptr[i+1]]
+class Coverage:
+    """
+    Covering sets of the candidates.
+
+    Parameters:
+    - indptr (array): Start of the covered targets of every candidate (length candidates+1).
+    - covered (array): Positions (in targets) of the covered targets.
+    - distances (array): Distance of every covered target to the candidate.
+    - candidates (array): Graph rows of the candidates.
+    - targets (array): Graph rows of the targets.
+    """
+
+    def __init__(self, indptr, covered, distances, candidates, targets):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.covered = np.asarray(covered, dtype=np.int64)
+        self.distances = np.asarray(distances, dtype=np.float64)
+        self.candidates = np.asarray(candidates, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+
+    #builds the covering sets out of a Reachability (it needs the rows of all candidates)
+    @classmethod
+    def from_reachability(cls, reachable, candidates, targets, max_distance=None):
+        candidates = np.asarray(candidates, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        #all entries of the candidates at once
+        starts = reachable.indptr[candidates]
+        counts = reachable.indptr[candidates + 1] - starts
+        owner = np.repeat(np.arange(len(candidates)), counts)
+        entries = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+
+        #graph rows -> positions in targets (-1 for the rows which are no targets)
+        target_pos = np.full(reachable.num_nodes, -1, dtype=np.int64)
+        target_pos[targets] = np.arange(len(targets))
+        covered = target_pos[reachable.targets[entries]]
+        distances = reachable.distances[entries]
+        keep = covered >= 0
+        if max_distance is not None:
+            keep &= distances <= max_distance
+
+        indptr = np.zeros(len(candidates) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owner[keep], minlength=len(candidates)), out=indptr[1:])
+        return cls(indptr, covered[keep], distances[keep], candidates, targets)
+
+    @property
+    def num_candidates(self):
+        return len(self.candidates)
+
+    @property
+    def num_targets(self):
+        return len(self.targets)
+
+    #positions of the targets covered by candidate i
+    def covers(self, i):
+        return self.covered[self.indptr[i]:self.indptr[i + 1]]
+
+    #number of targets every candidate covers
+    def sizes(self):
+        return np.diff(self.indptr)
+
+    #the other direction: (indptr, candidate positions) of the candidates which cover every target
+    def transpose(self):
+        owner = np.repeat(np.arange(self.num_candidates), self.sizes())
+        order = np.argsort(self.covered, kind='stable')
+        indptr = np.zeros(self.num_targets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.covered, minlength=self.num_targets), out=indptr[1:])
+        return indptr, owner[order]
+
+    #True for every target which can be covered by any candidate
+    def coverable(self):
+        return np.bincount(self.covered, minlength=self.num_targets) > 0
+
+    #distance of every target to its nearest chosen candidate (inf if none is within range)
+    def gaps(self, chosen):
+        chosen = np.asarray(chosen, dtype=np.int64)
+        gaps = np.full(self.num_targets, np.inf)
+        for i in chosen.tolist():
+            start, end = self.indptr[i], self.indptr[i + 1]
+            np.minimum.at(gaps, self.covered[start:end], self.distances[start:end])
+        return gaps
+
+
+#greedy set cover: always take the candidate which covers the most uncovered targets (the lower one on ties)
+#the gains are decreased when a target gets covered, so every (candidate, target) entry is touched once,
+#but every pick is an argmax over all candidates: O(entries + k * candidates) for k chargers (lazy_greedy_cover uses a heap)
+#returns the positions of the chosen candidates
+def greedy_cover(coverage):
+    target_indptr, target_candidates = coverage.transpose()
+    uncovered = coverage.coverable()
+    gains = np.zeros(coverage.num_candidates, dtype=np.int64)
+    np.add.at(gains, np.repeat(np.arange(coverage.num_candidates), coverage.sizes()), uncovered[coverage.covered])
+
+    chosen = []
+    while True:
+        best = int(np.argmax(gains)) if len(gains) > 0 else 0
+        if len(gains) == 0 or gains[best] == 0:
+            break
+        chosen.append(best)
+        newly = coverage.covers(best)
+        newly = newly[uncovered[newly]]
+        uncovered[newly] = False
+        for target in newly.tolist():
+            np.subtract.at(gains, target_candidates[target_indptr[target]:target_indptr[target + 1]], 1)
+    return np.array(chosen, dtype=np.int64)
+
+
+#the same greedy with lazy evaluation: the gains in the heap are upper bounds (a gain can only get smaller),
+#only the candidate on top is evaluated again. if its gain didn't change it is the best one, otherwise it goes back
+#the heap is ordered by (-gain, position), so on ties the lower candidate is taken like in greedy_cover
+#uncovered: optional bool per target of the targets which still need a charger (default all coverable ones)
+#returns the positions of the chosen candidates (the same as greedy_cover)
+def lazy_greedy_cover(coverage, uncovered=None):
+    uncovered = coverage.coverable() if uncovered is None else uncovered & coverage.coverable()
+    indptr, covered = coverage.indptr, coverage.covered
+    heap = [(-int(size), i) for i, size in enumerate(coverage.sizes().tolist()) if size > 0]
+    heapq.heapify(heap)
+
+    chosen = []
+    while heap:
+        bound, i = heap[0]
+        newly = covered[indptr[i]:indptr[i + 1]]
+        newly = newly[uncovered[newly]]
+        if len(newly) == 0:
+            heapq.heappop(heap)
+        elif len(newly) == -bound:
+            heapq.heappop(heap)
+            chosen.append(i)
+            uncovered[newly] = False
+        else:
+            heapq.heapreplace(heap, (-len(newly), i))
+    return np.array(chosen, dtype=np.int64)
+
+
+#reduction rules for the set cover, applied until nothing changes:
+#- forced picks: a target with only one candidate left, that candidate has to be taken
+#- dominated rows: a target whose candidates are a subset of the ones of another target, the other target is covered anyway
+#- dominated columns: a candidate which covers a subset of what another candidate covers isn't needed (equal sets: the lower one stays)
+#sets: dict candidate -> set of targets, options: dict target -> set of candidates (both are changed)
+#returns the forced candidates
+def reduce_cover(sets, options):
+    forced = []
+    changed = True
+    while changed:
+        changed = False
+
+        for target in [el for el in options if len(options[el]) == 1]:
+            if target not in options:
+                continue
+            candidate = next(iter(options[target]))
+            forced.append(candidate)
+            for covered in sets.pop(candidate):
+                for other in options.pop(covered):
+                    if other != candidate:
+                        sets[other].discard(covered)
+            changed = True
+
+        #a superset of the candidates of a target has to contain its first candidate
+        for target in sorted(options, key=lambda el: len(options[el])):
+            if target not in options:
+                continue
+            first = min(options[target])
+            for other in list(sets[first]):
+                if other != target and options[target] <= options[other]:
+                    for candidate in options.pop(other):
+                        sets[candidate].discard(other)
+                    changed = True
+
+        #a superset of the targets of a candidate has to cover its first target
+        for candidate in sorted(sets, key=lambda el: len(sets[el])):
+            if candidate not in sets:
+                continue
+            if len(sets[candidate]) == 0:
+                del sets[candidate]
+                changed = True
+                continue
+            first = min(sets[candidate])
+            for other in options[first]:
+                if other != candidate and sets[candidate] <= sets[other] and (len(sets[candidate]) < len(sets[other]) or other < candidate):
+                    for covered in sets.pop(candidate):
+                        options[covered].discard(candidate)
+                    changed = True
+                    break
+    return forced
+
+
+#exact minimum set cover with branch and bound, after the reductions of reduce_cover
+#branches on the uncovered target with the fewest candidates, bound: chosen + uncovered / biggest set
+#returns (positions of the chosen candidates, True if it is proven optimal); after time_limit (s) the best one found is returned
+def branch_and_bound_cover(coverage, time_limit=60):
+    deadline = time.perf_counter() + time_limit
+    sets = {i: set(coverage.covers(i).tolist()) for i in range(coverage.num_candidates)}
+    options = {}
+    for i, covered in sets.items():
+        for target in covered:
+            options.setdefault(target, set()).add(i)
+    forced = reduce_cover(sets, options)
+
+    #the rest as arrays: candidates and targets numbered 0..
+    candidates = sorted(sets)
+    target_pos = {target: pos for pos, target in enumerate(sorted(options))}
+    rest = [np.array(sorted(target_pos[el] for el in sets[i]), dtype=np.int64) for i in candidates]
+    rest_options = [[] for _ in target_pos]
+    for pos, covered in enumerate(rest):
+        for target in covered.tolist():
+            rest_options[target].append(pos)
+    max_size = max((len(el) for el in rest), default=1)
+
+    #incumbent: the greedy one (on everything, the reductions don't change the optimum)
+    best = lazy_greedy_cover(coverage).tolist()
+    timed_out = [False]
+
+    def search(chosen, count, uncovered_count):
+        if uncovered_count == 0:
+            if len(forced) + len(chosen) < len(best):
+                best[:] = forced + [candidates[el] for el in chosen]
+            return
+        if len(forced) + len(chosen) + math.ceil(uncovered_count / max_size) >= len(best):
+            return
+        if time.perf_counter() > deadline:
+            timed_out[0] = True
+            return
+
+        #uncovered target with the fewest candidates
+        uncovered = np.flatnonzero(count == 0)
+        sizes = np.array([len(rest_options[t]) for t in uncovered.tolist()])
+        target = int(uncovered[np.argmin(sizes)])
+
+        #try the candidates which cover the most uncovered targets first
+        gains = [(-int(np.sum(count[rest[i]] == 0)), i) for i in rest_options[target]]
+        for gain, i in sorted(gains):
+            count[rest[i]] += 1
+            chosen.append(i)
+            search(chosen, count, uncovered_count + gain)
+            chosen.pop()
+            count[rest[i]] -= 1
+            if timed_out[0]:
+                return
+
+    search([], np.zeros(len(target_pos), dtype=np.int64), len(target_pos))
+    return np.array(sorted(best), dtype=np.int64), not timed_out[0]
+
+
+#exact minimum set cover as integer program (min sum x, every coverable target covered at least once)
+#solved by scipy.optimize.milp (HiGHS), returns (positions of the chosen candidates, True if it is proven optimal)
+#or None if scipy has no milp or no solution was found within time_limit (s)
+def milp_cover(coverage, time_limit=60):
+    if milp is None:
+        return None
+    coverable = np.flatnonzero(coverage.coverable())
+    if len(coverable) == 0:
+        return np.empty(0, dtype=np.int64), True
+
+    #rows: targets, columns: candidates
+    owner = np.repeat(np.arange(coverage.num_candidates), coverage.sizes())
+    matrix = csr_matrix((np.ones(len(owner)), (coverage.covered, owner)), shape=(coverage.num_targets, coverage.num_candidates))[coverable]
+    n = coverage.num_candidates
+    result = milp(np.ones(n), constraints=LinearConstraint(matrix, lb=1, ub=np.inf), integrality=np.ones(n), bounds=Bounds(0, 1), options={'time_limit': time_limit})
+    if result.x is None:
+        return None
+    return np.flatnonzero(result.x > 0.5), result.status == 0
+
+
+#result of place_chargers
+class Placement:
+    """
+    Chosen charging stations.
+
+    Parameters:
+    - chosen (array): Graph rows of the chosen stations.
+    - ids (array): Ids of the chosen stations.
+    - max_node_gap (float): Longest distance from a target node to its nearest charger.
+    - max_road_gap (float): Longest distance from a point on a road between two targets to its nearest charger
+      (a point in the middle of an edge can be farther away than both ends).
+    - uncovered (array): Graph rows of the targets which no candidate can cover within range
+      (with segment_length the split points have the rows after the nodes of the graph).
+    - runtime (float): Seconds the solver needed.
+    - mode (str): The solver which was used.
+    - optimal (bool): True if the size is proven to be minimal.
+
+    The targets in uncovered (and the roads to them) aren't counted in the gaps.
+    """
+
+    def __init__(self, chosen, ids, max_node_gap, max_road_gap, uncovered, runtime, mode, optimal=False):
+        self.chosen = chosen
+        self.ids = ids
+        self.max_node_gap = max_node_gap
+        self.max_road_gap = max_road_gap
+        self.uncovered = uncovered
+        self.runtime = runtime
+        self.mode = mode
+        self.optimal = optimal
+
+    @property
+    def size(self):
+        return len(self.chosen)
+
+    def report(self):
+        text = f"{self.mode}: {self.size} chargers, max gap {self.max_node_gap:.1f} at the nodes and {self.max_road_gap:.1f} on the roads, {self.runtime:.3f}s"
+        if self.optimal:
+            text += " (optimal)"
+        if len(self.uncovered) > 0:
+            text += f", {len(self.uncovered)} nodes out of range of every candidate"
+        return text
+
+    def __repr__(self):
+        return f"Placement({self.report()})"
+
+
+#bool mask or rows -> rows (None means all rows)
+def _to_rows(rows, n):
+    if rows is None:
+        return np.arange(n, dtype=np.int64)
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        return np.flatnonzero(rows)
+    return rows.astype(np.int64)
+
+
+#splits every edge between two targets which is longer than max_length into equal pieces
+#the new points are targets (ids below all other ids), the rows of the old nodes stay the same
+#returns (graph, rows of the new points)
+def split_long_edges(graph, max_length, targets=None):
+    n = graph.num_nodes
+    is_target = np.zeros(n, dtype=bool)
+    is_target[_to_rows(targets, n)] = True
+    src, dst, weights = graph.edges()
+    pieces = np.maximum(np.ceil(weights / max_length), 1).astype(np.int64)
+    pieces[~(is_target[src] & is_target[dst])] = 1
+    split = pieces > 1
+    if not split.any():
+        return graph, np.empty(0, dtype=np.int64)
+
+    ids = graph.node_ids
+    new_ids = min(int(ids.min()), 0) - 1 - np.arange(int((pieces[split] - 1).sum()))
+    new_src, new_dst, new_weights = [], [], []
+    next_id = iter(new_ids.tolist())
+    for a, b, weight, count in zip(ids[src[split]].tolist(), ids[dst[split]].tolist(), weights[split].tolist(), pieces[split].tolist()):
+        chain = [a] + [next(next_id) for _ in range(count - 1)] + [b]
+        new_src.extend(chain[:-1])
+        new_dst.extend(chain[1:])
+        new_weights.extend([weight / count] * count)
+
+    keep = ~split
+    split_graph = CSRGraph.from_edges(np.concatenate((ids[src[keep]], new_src)), np.concatenate((ids[dst[keep]], new_dst)),
+                                      np.concatenate((weights[keep], new_weights)), node_ids=np.concatenate((ids, new_ids)))
+    return split_graph, np.arange(n, split_graph.num_nodes, dtype=np.int64)
+
+
+#longest distance from a point on an edge between two targets to its nearest charger
+#dist: distance of every row to its nearest charger. on an edge of length L with the ends at a and b
+#the farthest point is where both ways are equally long: min((a + b + L) / 2, a + L, b + L)
+def max_road_gap(graph, dist, targets):
+    is_target = np.zeros(graph.num_nodes, dtype=bool)
+    is_target[targets] = True
+    src, dst, weights = graph.edges()
+    both = is_target[src] & is_target[dst]
+    a, b, length = dist[src[both]], dist[dst[both]], weights[both]
+    gaps = np.minimum((a + b + length) / 2, np.minimum(a, b) + length)
+    node_gaps = dist[targets]
+    return float(max(gaps.max(initial=0.0), node_gaps.max(initial=0.0)))
+
+
+#chooses charging stations, so that every target has a charger within max_distance (road distance)
+def place_chargers(graph, max_distance, candidates=None, targets=None, mode='greedy', reachable=None, time_limit=60, hubs=None, segment_length=None):
+    """
+    Range constrained placement of charging stations.
+
+    Parameters:
+    - graph (CSRGraph): The station (or routing) graph.
+    - max_distance (float): Range R, the same unit as the weights.
+    - candidates (array): Rows (or bool mask) of the nodes which can get a charger, default all.
+    - targets (array): Rows (or bool mask) of the nodes which must have a charger within R, default all.
+    - mode (str): 'greedy' (lazy) for big graphs, 'eager' (the same greedy without the heap), 'exact' (milp, branch and bound without scipy.optimize.milp) for regional graphs, 'bnb' (always branch and bound),
+      'corridor' (linear sweep along the junction to junction corridors, see corridor_cover) for national graphs.
+    - reachable (Reachability): Optional bounded_all_pairs result (with a range >= max_distance) of the candidates, the corridor mode doesn't use it.
+    - time_limit (float): Seconds the exact modes may search, then the best placement found is returned.
+    - hubs (array): Bool per row of additional corridor ends for the corridor mode (e.g. junctions).
+    - segment_length (float): Cover the roads between the targets, not only the nodes (see below). None covers the nodes only.
+
+    Returns:
+    - Placement: The chosen stations with size, gaps and runtime.
+
+    Only the nodes are covered by default: a point in the middle of an edge of length L can be up to R + L / 2
+    away from a charger (max_road_gap in the result). With segment_length the edges between targets which are longer
+    are split into pieces of at most segment_length (the new points are targets, the rows of the old nodes stay the same),
+    then every point of a road is at most segment_length / 2 from a target and the targets get a charger within
+    R - segment_length / 2. A given reachable can't be used if an edge was split.
+
+    Targets which no candidate reaches within range (e.g. ends of streets far away from every station) can't be covered,
+    they are left out of the placement and returned in Placement.uncovered.
+    """
+    start_time = time.perf_counter()
+    candidates = _to_rows(candidates, graph.num_nodes)
+    targets = _to_rows(targets, graph.num_nodes)
+
+    if segment_length is not None:
+        if segment_length >= 2 * max_distance:
+            raise ValueError(f"segment_length {segment_length} has to be smaller than 2 * max_distance")
+        graph, points = split_long_edges(graph, segment_length, targets)
+        targets = np.concatenate((targets, points))
+        if hubs is not None:
+            hubs = np.concatenate((np.asarray(hubs, dtype=bool), np.zeros(len(points), dtype=bool)))
+        if len(points) > 0:
+            reachable = None
+        max_distance = max_distance - segment_length / 2
+
+    optimal = False
+    if mode == 'corridor':
+        #no reachability (it is O(n^2) for dense road networks): the corridor walk and two dijkstras from many sources
+        candidate_mask = np.zeros(graph.num_nodes, dtype=bool)
+        candidate_mask[candidates] = True
+        target_mask = np.zeros(graph.num_nodes, dtype=bool)
+        target_mask[targets] = True
+        rows = corridor_cover(graph, max_distance, candidate_mask, target_mask, hubs)
+        coverable = np.isfinite(charger_distances(graph, candidates, max_distance)[targets])
+    else:
+        if reachable is None:
+            reachable = bounded_all_pairs(graph, max_distance, sources=candidates)
+        coverage = Coverage.from_reachability(reachable, candidates, targets, max_distance)
+        if mode == 'greedy':
+            chosen = lazy_greedy_cover(coverage)
+        elif mode == 'eager':
+            chosen = greedy_cover(coverage)
+        elif mode == 'exact':
+            solved = milp_cover(coverage, time_limit)
+            if solved is None:
+                #only the rest of the time_limit is left for the branch and bound
+                solved = branch_and_bound_cover(coverage, max(time_limit - (time.perf_counter() - start_time), 0))
+            chosen, optimal = solved
+        elif mode == 'bnb':
+            chosen, optimal = branch_and_bound_cover(coverage, time_limit)
+        else:
+            raise ValueError(f"unknown placement mode: {mode}")
+        rows = coverage.candidates[chosen]
+        coverable = coverage.coverable()
+
+    #the gaps with the real distances to the chargers (not only the ones within range)
+    dist = charger_distances(graph, rows, np.inf)
+    covered_targets = targets[coverable]
+    max_node_gap = float(dist[covered_targets].max(initial=0.0))
+    road_gap = max_road_gap(graph, dist, covered_targets)
+    runtime = time.perf_counter() - start_time
+    return Placement(rows, graph.node_ids[rows], max_node_gap, road_gap, targets[~coverable], runtime, mode, optimal)
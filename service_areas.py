@@ -0,0 +1,73 @@
+import numpy as np
+
+from clustering import cluster_centroids, cluster_points
+from node_arrays import as_node_arrays
+from way_arrays import as_way_arrays
+
+
+#returns (lats, lons) of the centroid of every area (ways without known nodes are left out)
+#weighted=False: mean of the nodes of the way (like before, the first node of a closed way counts twice)
+#weighted=True: centroid of the polygon area, the mean of the nodes is used for ways without area
+def area_centroids(ways, nodes, weighted=False):
+    ways = as_way_arrays(ways)
+    nodes = as_node_arrays(nodes)
+
+    #node ids which aren't in nodes (row -1) are dropped, the way is shorter then
+    rows = nodes.rows(ways.node_ids)
+    known = rows >= 0
+    rows = rows[known]
+    lengths = np.bincount(np.repeat(np.arange(len(ways)), ways.lengths)[known], minlength=len(ways))
+    starts = (np.cumsum(lengths) - lengths)[lengths > 0]
+    lengths = lengths[lengths > 0]
+    lat = nodes.lat[rows]
+    lon = nodes.lon[rows]
+
+    #all ways in one pass: sums per way with reduceat
+    lat_mean = np.add.reduceat(lat, starts) / lengths if len(starts) > 0 else np.empty(0)
+    lon_mean = np.add.reduceat(lon, starts) / lengths if len(starts) > 0 else np.empty(0)
+    if not weighted or len(starts) == 0:
+        return lat_mean, lon_mean
+
+    #shoelace formula, x = lon, y = lat, relative to the first node of the way (better precision)
+    #the ways are after each other in the flat arrays, the empty ones have no entries
+    way = np.repeat(np.arange(len(starts)), lengths)
+    x = lon - lon[starts][way]
+    y = lat - lat[starts][way]
+
+    #next node, the last node is connected to the first one (for closed ways that is a zero edge)
+    following = np.arange(len(x)) + 1
+    following[starts + lengths - 1] = starts
+    x_next, y_next = x[following], y[following]
+
+    cross = x * y_next - x_next * y
+    area = np.add.reduceat(cross, starts) / 2
+    center_x = np.add.reduceat((x + x_next) * cross, starts)
+    center_y = np.add.reduceat((y + y_next) * cross, starts)
+
+    #no area (line or point): mean of the nodes
+    has_area = np.abs(area) > 1e-14
+    lat_weighted = lat_mean.copy()
+    lon_weighted = lon_mean.copy()
+    lon_weighted[has_area] = lon[starts][has_area] + center_x[has_area] / (6 * area[has_area])
+    lat_weighted[has_area] = lat[starts][has_area] + center_y[has_area] / (6 * area[has_area])
+    return lat_weighted, lon_weighted
+
+
+#returns the (lat, lon) of every service area, areas nearer than merge_distance (km) are one point
+def reduce_service_areas(ways, nodes, merge_distance=0.1, weighted=False):
+    """
+    Centroids of the service station areas, with the near ones merged.
+
+    Parameters:
+    - ways (WayArrays or list): The ways of the areas.
+    - nodes (NodeArrays or list): The nodes of the ways.
+    - merge_distance (float): Centroids connected by steps <= merge_distance (km) become their mean (0 keeps all).
+    - weighted (bool): Area weighted centroids instead of the mean of the nodes.
+
+    Returns:
+    - list: (lat, lon) of every service area.
+    """
+    lats, lons = area_centroids(ways, nodes, weighted)
+    if merge_distance > 0 and len(lats) > 0:
+        lats, lons = cluster_centroids(lats, lons, cluster_points(lats, lons, merge_distance))
+    return list(zip(lats.tolist(), lons.tolist()))
@@ -0,0 +1,321 @@
+import heapq
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+#max. number of entries of one dense block of dijkstra results (rows x nodes)
+BLOCK_ENTRIES = 1 << 24
+#up to this many nodes scipy's dijkstra is used (its result has n entries per source, so it is O(n^2) in total),
+#bigger graphs use a heap dijkstra per source which only touches the nodes within max_distance
+DENSE_MAX_NODES = 20000
+
+
+#sparse result of the bounded all pairs search: for every source only the nodes within max_distance
+#stored like a CSR matrix, the targets of every source are sorted
+class Reachability:
+    """
+    All pairs within a maximum distance.
+
+    Parameters:
+    - indptr (array): Start of the targets of every source (length n+1).
+    - targets (array): Rows of the reachable nodes (sorted per source, the source itself included).
+    - distances (array): Shortest path distance to every target.
+    - predecessors (array): Row before the target on the shortest path from the source (-1 for the source).
+    - max_distance (float): The range which was used.
+    """
+
+    def __init__(self, indptr, targets, distances, predecessors, max_distance):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float64)
+        self.predecessors = np.asarray(predecessors, dtype=np.int32)
+        self.max_distance = max_distance
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    #number of stored (source, target) pairs
+    def __len__(self):
+        return len(self.targets)
+
+    #returns (target rows, distances) of all nodes within max_distance of the source
+    def reachable(self, source):
+        start, end = self.indptr[source], self.indptr[source + 1]
+        return self.targets[start:end], self.distances[start:end]
+
+    #position of (source, target) in the arrays, -1 if the target isn't in range
+    def _find(self, source, target):
+        start, end = self.indptr[source], self.indptr[source + 1]
+        pos = start + np.searchsorted(self.targets[start:end], target)
+        if pos < end and self.targets[pos] == target:
+            return pos
+        return -1
+
+    #shortest path distance, inf if it is longer than max_distance
+    def distance(self, source, target):
+        pos = self._find(source, target)
+        return self.distances[pos] if pos >= 0 else np.inf
+
+    #returns the rows of the shortest path from source to target ([] if not in range)
+    def path(self, source, target):
+        if self._find(source, target) < 0:
+            return []
+        path = [target]
+        while target != source:
+            target = int(self.predecessors[self._find(source, target)])
+            path.append(target)
+        path.reverse()
+        return path
+
+    #scipy sparse matrix of the distances (the zeros on the diagonal are stored explicit)
+    def to_scipy(self):
+        n = self.num_nodes
+        return csr_matrix((self.distances, self.targets, self.indptr), shape=(n, n))
+
+
+#dijkstra from one source over the CSR arrays (python lists), which stops at max_distance
+#returns (targets, distances, predecessors) of the reached nodes, sorted by target (-1 is the predecessor of the source)
+def _bounded_dijkstra(indptr, indices, weights, source, max_distance):
+    dist = {source: 0.0}
+    pred = {source: -1}
+    done = set()
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        for pos in range(indptr[node], indptr[node + 1]):
+            neighbour = indices[pos]
+            new = d + weights[pos]
+            if new <= max_distance and new < dist.get(neighbour, np.inf):
+                dist[neighbour] = new
+                pred[neighbour] = node
+                heapq.heappush(heap, (new, neighbour))
+    targets = sorted(done)
+    return targets, [dist[el] for el in targets], [pred[el] for el in targets]
+
+
+#bounded_all_pairs for big graphs: one heap dijkstra per source, only the (source, target, distance) triples
+#within max_distance are made, so the work grows with the number of pairs and not with n^2
+def sparse_bounded_all_pairs(graph, max_distance=60, sources=None):
+    n = graph.num_nodes
+    sources = np.arange(n) if sources is None else np.unique(np.asarray(sources, dtype=np.int64))
+    indptr, indices, weights = graph.indptr.tolist(), graph.indices.tolist(), graph.weights.tolist()
+
+    counts = np.zeros(n, dtype=np.int64)
+    targets, distances, predecessors = [], [], []
+    for source in sources.tolist():
+        found, dist, pred = _bounded_dijkstra(indptr, indices, weights, source, max_distance)
+        counts[source] = len(found)
+        targets.extend(found)
+        distances.extend(dist)
+        predecessors.extend(pred)
+
+    indptr_out = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr_out[1:])
+    return Reachability(indptr_out, np.array(targets, dtype=np.int32), np.array(distances, dtype=np.float64), np.array(predecessors, dtype=np.int32), max_distance)
+
+
+#runs a dijkstra from every node, which stops at max_distance
+#returns a Reachability with the distances and predecessors of all pairs within max_distance
+#graphs up to dense_max_nodes use scipy: fast, but every source gives a dense row of n entries which is scanned,
+#so time and scanned entries are O(n^2) (the memory is bounded by block_entries). bigger graphs use sparse_bounded_all_pairs
+def bounded_all_pairs(graph, max_distance=60, sources=None, block_entries=BLOCK_ENTRIES, dense_max_nodes=DENSE_MAX_NODES):
+    """
+    Range bounded all pairs shortest paths (replaces the O(n^3) Floyd-Warshall).
+
+    Parameters:
+    - graph (CSRGraph): The graph.
+    - max_distance (float): Range of the car (km, the same unit as the weights).
+    - sources (array): Rows to start from (default all), the result has a row for every node anyway.
+    - block_entries (int): The dijkstra runs for blocks of sources, a block has at most this many dense entries.
+    - dense_max_nodes (int): Bigger graphs use the sparse heap dijkstra instead of the dense scipy blocks.
+
+    Returns:
+    - Reachability: The pairs within max_distance.
+    """
+    n = graph.num_nodes
+    if n > dense_max_nodes:
+        return sparse_bounded_all_pairs(graph, max_distance, sources)
+    matrix = graph.to_scipy()
+    if sources is None:
+        sources = np.arange(n)
+    sources = np.asarray(sources, dtype=np.int64)
+
+    counts = np.zeros(n, dtype=np.int64)
+    target_blocks, distance_blocks, predecessor_blocks = [], [], []
+    block_size = max(1, block_entries // max(n, 1))
+
+    #sources sorted, so the blocks can be put after each other
+    sources = np.unique(sources)
+    for start in range(0, len(sources), block_size):
+        block = sources[start:start + block_size]
+        dist, pred = dijkstra(matrix, directed=False, indices=block, limit=max_distance, return_predecessors=True)
+
+        #dense block -> only the reachable entries
+        block_rows, cols = np.nonzero(np.isfinite(dist))
+        counts[block] = np.bincount(block_rows, minlength=len(block))
+        target_blocks.append(cols.astype(np.int32))
+        distance_blocks.append(dist[block_rows, cols])
+        predecessor_blocks.append(pred[block_rows, cols].astype(np.int32))
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    if target_blocks:
+        targets = np.concatenate(target_blocks)
+        distances = np.concatenate(distance_blocks)
+        predecessors = np.concatenate(predecessor_blocks)
+    else:
+        targets, distances, predecessors = np.empty(0, dtype=np.int32), np.empty(0), np.empty(0, dtype=np.int32)
+
+    #scipy marks the source with -9999
+    predecessors[predecessors < 0] = -1
+    return Reachability(indptr, targets, distances, predecessors, max_distance)
+
+
+#computes the rows of the sources again (after the graph changed near them), the other rows are taken from reachable
+#the graph may have new nodes at the end, their rows have to be in sources
+def update_reachability(reachable, graph, sources):
+    """
+    Bounded all pairs after a local change of the graph.
+
+    Parameters:
+    - reachable (Reachability): The result before the change.
+    - graph (CSRGraph): The changed graph (the old rows stay the same).
+    - sources (array): Rows whose reachable nodes may have changed.
+
+    Returns:
+    - Reachability: The pairs within reachable.max_distance in the changed graph.
+    """
+    n = graph.num_nodes
+    sources = np.unique(np.asarray(sources, dtype=np.int64))
+    fresh = bounded_all_pairs(graph, reachable.max_distance, sources=sources)
+
+    #rows from the old result or the new one
+    old_counts = np.zeros(n, dtype=np.int64)
+    old_counts[:reachable.num_nodes] = np.diff(reachable.indptr)
+    old_starts = np.zeros(n, dtype=np.int64)
+    old_starts[:reachable.num_nodes] = reachable.indptr[:-1]
+    is_fresh = np.zeros(n, dtype=bool)
+    is_fresh[sources] = True
+    counts = np.where(is_fresh, np.diff(fresh.indptr), old_counts)
+    starts = np.where(is_fresh, fresh.indptr[:-1], old_starts)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    entries = np.arange(indptr[-1]) - np.repeat(indptr[:-1], counts) + np.repeat(starts, counts)
+    from_fresh = np.repeat(is_fresh, counts)
+    targets = np.empty(len(entries), dtype=np.int32)
+    distances = np.empty(len(entries))
+    predecessors = np.empty(len(entries), dtype=np.int32)
+    for result, mask in ((fresh, from_fresh), (reachable, ~from_fresh)):
+        targets[mask] = result.targets[entries[mask]]
+        distances[mask] = result.distances[entries[mask]]
+        predecessors[mask] = result.predecessors[entries[mask]]
+    return Reachability(indptr, targets, distances, predecessors, reachable.max_distance)
+
+
+#block size (rows/columns) of the tiled floyd warshall, 256x256 float64 = 512KB fits in L2
+FW_BLOCK_SIZE = 256
+
+
+#dense distance matrix of the edges: 0 on the diagonal, inf without an edge
+#predecessor[i][j] = i for every edge, -1 otherwise
+def dense_matrices(graph):
+    n = graph.num_nodes
+    dist = np.full((n, n), np.inf)
+    rows = np.repeat(np.arange(n), np.diff(graph.indptr))
+    #graph.indices has no duplicates (CSRGraph keeps the smallest weight)
+    dist[rows, graph.indices] = graph.weights
+    np.fill_diagonal(dist, 0.0)
+
+    prev = np.full((n, n), -1, dtype=np.int32)
+    prev[rows, graph.indices] = rows
+    return dist, prev
+
+
+#floyd warshall step for k on the tile dist[I, J] (I, J slices), works in place
+def _relax_tile(dist, prev, I, J, ks):
+    tile = dist[I, J]
+    tile_prev = prev[I, J]
+    #buffers are reused for every k
+    candidate = np.empty(tile.shape)
+    better = np.empty(tile.shape, dtype=bool)
+    for k in ks:
+        np.add(dist[I, k][:, None], dist[k, J][None, :], out=candidate)
+        np.less(candidate, tile, out=better)
+        np.copyto(tile, candidate, where=better)
+        np.copyto(tile_prev, np.broadcast_to(prev[k, J], tile_prev.shape), where=better)
+
+
+#floyd warshall on a dense matrix, the k loop runs as numpy broadcasting
+#dist and prev are changed in place and returned
+def floyd_warshall_matrix(dist, prev):
+    n = len(dist)
+    candidate = np.empty(dist.shape)
+    better = np.empty(dist.shape, dtype=bool)
+    for k in range(n):
+        np.add(dist[:, k, None], dist[None, k, :], out=candidate)
+        np.less(candidate, dist, out=better)
+        np.copyto(dist, candidate, where=better)
+        np.copyto(prev, np.broadcast_to(prev[k], prev.shape), where=better)
+    return dist, prev
+
+
+#cache blocked floyd warshall (same result as floyd_warshall_matrix)
+#for every block of k: first the diagonal tile, then the tiles in its row and column, then all others
+def floyd_warshall_blocked(dist, prev, block_size=FW_BLOCK_SIZE):
+    n = len(dist)
+    blocks = [slice(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+    for K in blocks:
+        ks = range(K.start, K.stop)
+        _relax_tile(dist, prev, K, K, ks)
+        for B in blocks:
+            if B != K:
+                _relax_tile(dist, prev, K, B, ks)
+                _relax_tile(dist, prev, B, K, ks)
+        for I in blocks:
+            if I == K:
+                continue
+            for J in blocks:
+                if J != K:
+                    _relax_tile(dist, prev, I, J, ks)
+    return dist, prev
+
+
+#dense all pairs shortest paths of the graph (for checks which need every pair)
+def floyd_warshall(graph, block_size=None):
+    """
+    Floyd-Warshall on the dense matrix of the graph.
+
+    Parameters:
+    - graph (CSRGraph): The graph.
+    - block_size (int): Use the tiled version with this block size (None: blocked if the matrix doesn't fit in L2).
+
+    Returns:
+    - dist (array): n x n distances (inf if there is no path).
+    - prev (array): n x n int32, prev[u][v] is the row before v on the path from u (-1 for u itself / no path).
+    """
+    dist, prev = dense_matrices(graph)
+    if block_size is None and graph.num_nodes > FW_BLOCK_SIZE:
+        block_size = FW_BLOCK_SIZE
+    if block_size is None:
+        return floyd_warshall_matrix(dist, prev)
+    return floyd_warshall_blocked(dist, prev, block_size)
+
+
+#returns the rows of the path from u to v out of the predecessor matrix ([] if there is no path)
+def get_path(u, v, prev):
+    if u == v:
+        return [u]
+    if prev[u][v] < 0:
+        return []
+    path = [v]
+    while v != u:
+        v = int(prev[u][v])
+        path.append(v)
+    path.reverse()
+    return path
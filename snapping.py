@@ -0,0 +1,206 @@
+import numpy as np
+
+from distance import EARTH_RADIUS, haversine_polyline
+from node_arrays import NodeArrays, as_node_arrays
+from way_arrays import WayArrays, as_way_arrays, drop_unknown_nodes
+
+#size of a grid cell in degrees (about 5.5km x 4km in France)
+CELL_SIZE = 0.05
+#a projection nearer than this (km) to a node of the way uses the node instead of a new one
+NODE_TOLERANCE = 0.001
+
+
+#grid over the street segments (one segment = two following nodes of a way)
+#every segment is put into all cells its bounding box touches, a query only looks at the cells near the point
+class SegmentIndex:
+    """
+    Nearest street segment of a point.
+
+    Parameters:
+    - nodes (NodeArrays or list): The nodes of the ways.
+    - ways (WayArrays or list): The ways, node ids which aren't in nodes are left out (see self.ways).
+    - cell_size (float): Size of the grid cells in degrees.
+
+    The projection is done in a flat (equirectangular) frame around the query point,
+    which is exact enough for the few km a station is away from the street.
+    """
+
+    def __init__(self, nodes, ways, cell_size=CELL_SIZE):
+        self.nodes = as_node_arrays(nodes)
+        self.ways, rows = drop_unknown_nodes(self.nodes, as_way_arrays(ways))
+        self.cell_size = cell_size
+
+        #segments: flat position of the first node (the second one is the next position)
+        lengths = self.ways.lengths
+        way_of_entry = np.repeat(np.arange(len(self.ways)), lengths)
+        is_last = np.zeros(len(self.ways.node_ids), dtype=bool)
+        is_last[self.ways.offsets[1:][lengths > 0] - 1] = True
+        self.segment_starts = np.flatnonzero(~is_last)
+        self.segment_ways = way_of_entry[self.segment_starts]
+
+        self.node_rows = rows
+        lat1, lon1 = self.nodes.lat[rows[self.segment_starts]], self.nodes.lon[rows[self.segment_starts]]
+        lat2, lon2 = self.nodes.lat[rows[self.segment_starts + 1]], self.nodes.lon[rows[self.segment_starts + 1]]
+
+        #distance of every node from the start of its way (km)
+        steps = np.zeros(len(rows))
+        steps[1:] = haversine_polyline(self.nodes.lat[rows], self.nodes.lon[rows])
+        way_starts = self.ways.offsets[:-1][lengths > 0]
+        steps[way_starts] = 0
+        total = np.cumsum(steps)
+        self.along = total - np.repeat(total[way_starts], lengths[lengths > 0])
+
+        #cells of the bounding box of every segment
+        i0 = np.floor(np.minimum(lat1, lat2) / cell_size).astype(np.int64)
+        i1 = np.floor(np.maximum(lat1, lat2) / cell_size).astype(np.int64)
+        j0 = np.floor(np.minimum(lon1, lon2) / cell_size).astype(np.int64)
+        j1 = np.floor(np.maximum(lon1, lon2) / cell_size).astype(np.int64)
+        count_i, count_j = i1 - i0 + 1, j1 - j0 + 1
+        count = count_i * count_j
+
+        segment = np.repeat(np.arange(len(self.segment_starts)), count)
+        k = np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+        cell_i = i0[segment] + k // count_j[segment]
+        cell_j = j0[segment] + k % count_j[segment]
+
+        keys = self._key(cell_i, cell_j)
+        order = np.argsort(keys, kind='stable')
+        self.cell_keys, starts = np.unique(keys[order], return_index=True)
+        self.cell_offsets = np.append(starts, len(keys)).astype(np.int64)
+        self.cell_segments = segment[order]
+
+    @staticmethod
+    def _key(i, j):
+        return (np.asarray(i, dtype=np.int64) << 32) + (np.asarray(j, dtype=np.int64) & 0xFFFFFFFF)
+
+    def __len__(self):
+        return len(self.segment_starts)
+
+    #segments in the cells within radius (km) of the point
+    def candidates(self, lat, lon, radius):
+        d_lat = radius / (np.pi * EARTH_RADIUS / 180)
+        d_lon = d_lat / max(np.cos(np.radians(lat)), 1e-6)
+        i = np.arange(int(np.floor((lat - d_lat) / self.cell_size)), int(np.floor((lat + d_lat) / self.cell_size)) + 1)
+        j = np.arange(int(np.floor((lon - d_lon) / self.cell_size)), int(np.floor((lon + d_lon) / self.cell_size)) + 1)
+        keys = self._key(*[el.ravel() for el in np.meshgrid(i, j, indexing='ij')])
+
+        pos = np.searchsorted(self.cell_keys, keys)
+        found = pos < len(self.cell_keys)
+        pos, keys = pos[found], keys[found]
+        pos = pos[self.cell_keys[pos] == keys]
+        pieces = [self.cell_segments[self.cell_offsets[p]:self.cell_offsets[p + 1]] for p in pos.tolist()]
+        return np.unique(np.concatenate(pieces)) if pieces else np.empty(0, dtype=np.int64)
+
+    #projects the point onto the nearest segment within radius (km)
+    #returns None or a dict with way (row), position (of the first node of the segment in the way),
+    #t (0..1 on the segment), lat, lon (of the projection), distance (point - street) and along (km from the start of the way)
+    def snap(self, lat, lon, radius=1):
+        segments = self.candidates(lat, lon, radius)
+        if len(segments) == 0:
+            return None
+
+        first = self.segment_starts[segments]
+        rows1, rows2 = self.node_rows[first], self.node_rows[first + 1]
+
+        #flat frame in km around the point
+        scale_lat = np.pi * EARTH_RADIUS / 180
+        scale_lon = scale_lat * np.cos(np.radians(lat))
+        x1, y1 = (self.nodes.lon[rows1] - lon) * scale_lon, (self.nodes.lat[rows1] - lat) * scale_lat
+        x2, y2 = (self.nodes.lon[rows2] - lon) * scale_lon, (self.nodes.lat[rows2] - lat) * scale_lat
+        dx, dy = x2 - x1, y2 - y1
+        squared = dx * dx + dy * dy
+        t = np.where(squared > 0, -(x1 * dx + y1 * dy) / np.where(squared > 0, squared, 1), 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        px, py = x1 + t * dx, y1 + t * dy
+        distances = np.sqrt(px * px + py * py)
+
+        best = int(np.argmin(distances))
+        if distances[best] > radius:
+            return None
+
+        segment = segments[best]
+        flat = self.segment_starts[segment]
+        way = int(self.segment_ways[segment])
+        t_best = float(t[best])
+        along = self.along[flat] + t_best * (self.along[flat + 1] - self.along[flat])
+        return {
+            'way': way,
+            'position': int(flat - self.ways.offsets[way]),
+            't': t_best,
+            'lat': float(lat + py[best] / scale_lat),
+            'lon': float(lon + px[best] / scale_lon),
+            'distance': float(distances[best]),
+            'along': float(along),
+        }
+
+    #snap() for many points, a list with one result (or None) per point
+    def snap_many(self, lats, lons, radius=1):
+        return [self.snap(lat, lon, radius) for lat, lon in zip(np.asarray(lats).tolist(), np.asarray(lons).tolist())]
+
+
+#snaps every service station onto its nearest street segment and puts a node there
+#returns (nodes, ways, station_node_ids, along):
+#- nodes / ways: NodeArrays and WayArrays with the new nodes (negative ids, inserted into their way)
+#- station_node_ids: node id of every station (the new node, a node of the way if the projection is on it, None if no street within radius)
+#- along: distance (km) of the station node from the start of its way (None if not snapped)
+def insert_snapped_nodes(nodes, ways, stations, radius=1, index=None, tolerance=NODE_TOLERANCE):
+    """
+    Segment based snapping of the service stations.
+
+    Parameters:
+    - nodes (NodeArrays or list): The street nodes.
+    - ways (WayArrays or list): The streets (node ids which aren't in nodes are left out).
+    - stations (list): (lat, lon) of every service station.
+    - radius (float): Max. distance (km) between the station and the street.
+    - index (SegmentIndex): Optional index over nodes and ways.
+    - tolerance (float): A projection nearer than this (km) to a node of the way uses that node.
+
+    Returns:
+    - tuple: (nodes, ways, station_node_ids, along)
+    """
+    nodes = as_node_arrays(nodes)
+    if index is None:
+        index = SegmentIndex(nodes, ways)
+    #the positions of the index are the ones of its ways (without unknown node ids)
+    ways = index.ways
+
+    station_node_ids = [None] * len(stations)
+    along = [None] * len(stations)
+    #new nodes: (way, position, t, station)
+    inserts = []
+    new_lats, new_lons = [], []
+    for station, (lat, lon) in enumerate(stations):
+        result = index.snap(lat, lon, radius)
+        if result is None:
+            continue
+        along[station] = result['along']
+        flat = ways.offsets[result['way']] + result['position']
+
+        #projection on a node of the way: no new node
+        segment_length = index.along[flat + 1] - index.along[flat]
+        if result['t'] * segment_length <= tolerance:
+            station_node_ids[station] = int(ways.node_ids[flat])
+        elif (1 - result['t']) * segment_length <= tolerance:
+            station_node_ids[station] = int(ways.node_ids[flat + 1])
+        else:
+            station_node_ids[station] = -(len(inserts) + 1)
+            inserts.append((result['way'], result['position'], result['t'], station_node_ids[station]))
+            new_lats.append(result['lat'])
+            new_lons.append(result['lon'])
+
+    if len(inserts) == 0:
+        return nodes, ways, station_node_ids, along
+
+    #new nodes at the end of the node arrays
+    new_ids = np.array([el[3] for el in inserts], dtype=np.int64)
+    junction = np.concatenate((nodes.junction, np.zeros(len(new_ids), dtype=bool)))
+    new_nodes = NodeArrays(np.concatenate((nodes.ids, new_ids)), np.concatenate((nodes.lat, new_lats)), np.concatenate((nodes.lon, new_lons)), np.packbits(junction), tags=nodes.tags)
+
+    #insert them behind the first node of their segment (several on one segment sorted by t)
+    inserts.sort(key=lambda el: (el[0], el[1], el[2]))
+    insert_at = np.array([ways.offsets[el[0]] + el[1] + 1 for el in inserts], dtype=np.int64)
+    node_ids = np.insert(ways.node_ids, insert_at, [el[3] for el in inserts])
+    added_per_way = np.bincount([el[0] for el in inserts], minlength=len(ways))
+    offsets = ways.offsets + np.concatenate(([0], np.cumsum(added_per_way)))
+    new_ways = WayArrays(ways.ids, offsets, node_ids)
+    return new_nodes, new_ways, station_node_ids, along
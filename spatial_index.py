@@ -0,0 +1,155 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from distance import EARTH_RADIUS, haversine_pairwise
+
+
+#converts lat/lon (degrees) to points on the unit sphere (n x 3)
+def to_unit_sphere(lats, lons):
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat_rad)
+    return np.stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)), axis=-1)
+
+
+#great circle distance (km) -> straight line distance on the unit sphere
+def km_to_chord(distance):
+    return 2 * np.sin(np.minimum(np.asarray(distance, dtype=np.float64), np.pi * EARTH_RADIUS) / (2 * EARTH_RADIUS))
+
+
+#KD-tree over points on the unit sphere
+#the straight line distance grows with the great circle distance, so the nearest
+#point in 3D is also the nearest point on the earth
+class SpatialIndex:
+    """
+    Nearest neighbour and radius queries for lat/lon points.
+
+    Parameters:
+    - lats, lons (array like): Coordinates of the indexed points in degrees.
+    - ids (array like): Optional ids of the points (e.g. overpass ids), default are the rows.
+
+    All queries return rows (positions in lats/lons) and distances in km.
+    The distances are the haversine distances, like get_distance.
+    """
+
+    def __init__(self, lats, lons, ids=None):
+        self.lat = np.asarray(lats, dtype=np.float64)
+        self.lon = np.asarray(lons, dtype=np.float64)
+        self.ids = np.arange(len(self.lat)) if ids is None else np.asarray(ids)
+        self.tree = cKDTree(to_unit_sphere(self.lat, self.lon).reshape(-1, 3))
+
+    #builds the index over NodeArrays (ids are the overpass ids)
+    @classmethod
+    def from_nodes(cls, nodes):
+        return cls(nodes.lat, nodes.lon, nodes.ids)
+
+    def __len__(self):
+        return len(self.lat)
+
+    #returns (distances, rows) of the k nearest points, sorted by distance
+    #rows in exclude (set or bool array) are skipped, fewer than k are returned if there aren't enough
+    def nearest(self, lat, lon, k=1, exclude=None):
+        if len(self) == 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+
+        if isinstance(exclude, set):
+            exclude_mask = np.zeros(len(self), dtype=bool)
+            exclude_mask[list(exclude)] = True
+            exclude = exclude_mask
+
+        #ask for more and more points, until k are left after the excluded ones are removed
+        point = to_unit_sphere(lat, lon)
+        kk = min(max(2 * k, 8), len(self)) if exclude is not None else min(k, len(self))
+        while True:
+            _, rows = self.tree.query(point, k=kk)
+            rows = np.atleast_1d(rows)
+            if exclude is not None:
+                rows = rows[~exclude[rows]]
+            if len(rows) >= k or kk == len(self):
+                break
+            kk = min(2 * kk, len(self))
+        rows = rows[:k]
+        return haversine_pairwise(lat, lon, self.lat[rows], self.lon[rows]), rows
+
+    #returns (distances, rows) of the nearest point for every query point
+    def nearest_many(self, lats, lons):
+        _, rows = self.tree.query(to_unit_sphere(lats, lons).reshape(-1, 3), k=1)
+        return haversine_pairwise(lats, lons, self.lat[rows], self.lon[rows]), rows
+
+    #returns the rows of all points with a distance <= radius (km), sorted by row
+    def within(self, lat, lon, radius):
+        #a bit bigger chord, the exact check is done with haversine afterwards
+        chord = km_to_chord(radius) * (1 + 1e-9) + 1e-12
+        rows = np.array(self.tree.query_ball_point(to_unit_sphere(lat, lon), chord, return_sorted=True), dtype=np.intp)
+        distances = haversine_pairwise(lat, lon, self.lat[rows], self.lon[rows])
+        return rows[distances <= radius]
+
+    #within() for many query points, returns a list with one array of rows per point
+    def within_many(self, lats, lons, radius):
+        chord = km_to_chord(radius) * (1 + 1e-9) + 1e-12
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        hits = self.tree.query_ball_point(to_unit_sphere(lats, lons).reshape(-1, 3), chord, return_sorted=True)
+
+        result = []
+        for lat, lon, rows in zip(lats, lons, hits):
+            rows = np.array(rows, dtype=np.intp)
+            distances = haversine_pairwise(lat, lon, self.lat[rows], self.lon[rows])
+            result.append(rows[distances <= radius])
+        return result
+
+    #returns all pairs of indexed points with a distance <= radius (km) as two row arrays (first < second)
+    def pairs(self, radius):
+        chord = km_to_chord(radius) * (1 + 1e-9) + 1e-12
+        found = self.tree.query_pairs(chord, output_type='ndarray')
+        first, second = found[:, 0], found[:, 1]
+        distances = haversine_pairwise(self.lat[first], self.lon[first], self.lat[second], self.lon[second])
+        keep = distances <= radius
+        return first[keep], second[keep]
+
+    #snaps every query point to its nearest point which wasn't taken by an earlier query point
+    #returns (distances, rows), row -1 if all points are taken
+    def nearest_unique(self, lats, lons):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        taken = np.zeros(len(self), dtype=bool)
+        distances = np.full(len(lats), np.inf)
+        rows = np.full(len(lats), -1, dtype=np.intp)
+        if len(self) == 0 or len(lats) == 0:
+            return distances, rows
+
+        #first try the nearest point of every query point at once
+        _, first_rows = self.nearest_many(lats, lons)
+
+        #tree over the points which were free at the last rebuild, it is rebuilt
+        #when too many of its points are taken (clusters of query points far away from the index)
+        free_tree = self.tree
+        free_rows = np.arange(len(self))
+        taken_count = 0
+        for i in range(len(lats)):
+            if taken_count == len(self):
+                break
+            if not taken[first_rows[i]]:
+                rows[i] = first_rows[i]
+            else:
+                #only if it is taken ask for the nearest free one
+                point = to_unit_sphere(lats[i], lons[i])
+                kk = min(8, len(free_rows))
+                while True:
+                    _, candidates = free_tree.query(point, k=kk)
+                    candidates = free_rows[np.atleast_1d(candidates)]
+                    candidates = candidates[~taken[candidates]]
+                    if len(candidates) > 0:
+                        rows[i] = candidates[0]
+                        break
+                    if kk >= 64:
+                        free_rows = np.flatnonzero(~taken)
+                        free_tree = cKDTree(to_unit_sphere(self.lat[free_rows], self.lon[free_rows]).reshape(-1, 3))
+                        kk = 1
+                    kk = min(2 * kk, len(free_rows))
+            taken[rows[i]] = True
+            taken_count += 1
+
+        snapped = rows >= 0
+        distances[snapped] = haversine_pairwise(lats[snapped], lons[snapped], self.lat[rows[snapped]], self.lon[rows[snapped]])
+        return distances, rows
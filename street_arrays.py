@@ -0,0 +1,158 @@
+import json
+import os
+
+import numpy as np
+
+from way_arrays import WayArrays
+
+#arrays of a saved street folder (offsets instead of starts/ends)
+STREET_COLUMNS = ('ids', 'way_ids', 'neighbours', 'offsets', 'node_ids')
+
+
+#columnar version of the reduced streets of go_through_street
+#({'id': , 'old_ids': (way id, neighbour), 'nodes': [...]})
+#the nodes of street i are node_ids[starts[i]:ends[i]] where mask is True
+class StreetArrays:
+    """
+    Streets as a ragged array, which can be memory mapped.
+
+    Parameters:
+    - ids (array): Own id of every street.
+    - way_ids (array): Overpass id of the way the street was made of (old_ids[0]).
+    - neighbours (array): The neighbour of go_through_street (old_ids[1]), -1 for None.
+    - starts (array): Start of the nodes of every street in node_ids.
+    - ends (array): End (exclusive) of the nodes of every street in node_ids.
+    - node_ids (array): The node ids of all streets after each other.
+    - mask (array): Optional bool per entry of node_ids, False for nodes which were removed.
+
+    Selecting streets only changes the per street arrays and removing nodes only changes the mask,
+    node_ids itself is never copied.
+    """
+
+    def __init__(self, ids, way_ids, neighbours, starts, ends, node_ids, mask=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.way_ids = np.asarray(way_ids, dtype=np.int64)
+        self.neighbours = np.asarray(neighbours, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.mask = None if mask is None else np.asarray(mask, dtype=bool)
+
+    #builds the arrays out of a list of street dicts (e.g. loaded from streets1-1.json)
+    @classmethod
+    def from_streets(cls, streets):
+        streets = list(streets)
+        count = len(streets)
+        ids = np.fromiter((el['id'] for el in streets), dtype=np.int64, count=count)
+        way_ids = np.fromiter((el['old_ids'][0] for el in streets), dtype=np.int64, count=count)
+        neighbours = np.fromiter((-1 if el['old_ids'][1] is None else el['old_ids'][1] for el in streets), dtype=np.int64, count=count)
+        lengths = np.fromiter((len(el['nodes']) for el in streets), dtype=np.int64, count=count)
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        node_ids = np.fromiter((node_id for el in streets for node_id in el['nodes']), dtype=np.int64, count=int(offsets[-1]))
+        return cls(ids, way_ids, neighbours, offsets[:-1], offsets[1:], node_ids)
+
+    #memory maps a folder written by save()
+    @classmethod
+    def load(cls, folder, mmap_mode='r'):
+        columns = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode) for name in STREET_COLUMNS}
+        offsets = columns.pop('offsets')
+        return cls(starts=offsets[:-1], ends=offsets[1:], **columns)
+
+    #writes the streets as .npy files (removed nodes and streets are left out)
+    def save(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        compact = self.compact()
+        offsets = np.append(compact.starts, compact.ends[-1] if len(compact) > 0 else 0)
+        for name, values in (('ids', compact.ids), ('way_ids', compact.way_ids), ('neighbours', compact.neighbours), ('offsets', offsets), ('node_ids', compact.node_ids)):
+            np.save(os.path.join(folder, f"{name}.npy"), values)
+        return folder
+
+    def __len__(self):
+        return len(self.ids)
+
+    #gives the street dicts, so old code can still loop over the streets
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self.get_row(row)
+
+    def __getitem__(self, row):
+        return self.get_row(row)
+
+    #number of (not removed) nodes of every street
+    @property
+    def lengths(self):
+        if self.mask is None:
+            return self.ends - self.starts
+        kept = np.concatenate(([0], np.cumsum(self.mask)))
+        return kept[self.ends] - kept[self.starts]
+
+    #the node ids of a street (a view if no node is removed)
+    def nodes_of(self, row):
+        start, end = self.starts[row], self.ends[row]
+        if self.mask is None:
+            return self.node_ids[start:end]
+        return self.node_ids[start:end][self.mask[start:end]]
+
+    def get_row(self, row):
+        neighbour = int(self.neighbours[row])
+        return {'id': int(self.ids[row]), 'old_ids': (int(self.way_ids[row]), None if neighbour < 0 else neighbour), 'nodes': self.nodes_of(row).tolist()}
+
+    def to_list(self):
+        return list(self)
+
+    #returns the streets where keep is True (bool array or rows), node_ids is shared
+    def select(self, keep):
+        return StreetArrays(self.ids[keep], self.way_ids[keep], self.neighbours[keep], self.starts[keep], self.ends[keep], self.node_ids, self.mask)
+
+    #returns the streets with only the nodes where keep (bool per entry of node_ids) is True, node_ids is shared
+    def with_mask(self, keep):
+        keep = np.asarray(keep, dtype=bool)
+        if self.mask is not None:
+            keep = keep & self.mask
+        return StreetArrays(self.ids, self.way_ids, self.neighbours, self.starts, self.ends, self.node_ids, keep)
+
+    #returns True if the streets cover node_ids from the start to the end, in order and without gaps
+    def is_contiguous(self):
+        if self.mask is not None:
+            return False
+        if len(self.ids) == 0:
+            return len(self.node_ids) == 0
+        return self.starts[0] == 0 and self.ends[-1] == len(self.node_ids) and np.array_equal(self.starts[1:], self.ends[:-1])
+
+    #the node ids of all streets after each other (a view if the streets are contiguous)
+    def all_node_ids(self):
+        if self.is_contiguous():
+            return self.node_ids
+        pieces = [self.nodes_of(row) for row in range(len(self.ids))]
+        return np.concatenate(pieces) if pieces else np.empty(0, dtype=np.int64)
+
+    #copy with own node_ids, without removed nodes and gaps
+    def compact(self):
+        if self.is_contiguous():
+            return self
+        lengths = self.lengths
+        offsets = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return StreetArrays(self.ids, self.way_ids, self.neighbours, offsets[:-1], offsets[1:], self.all_node_ids())
+
+    #the streets as WayArrays (for NodeWayIndex and chain_edges)
+    def to_way_arrays(self):
+        compact = self.compact()
+        offsets = np.append(compact.starts, compact.ends[-1] if len(compact) > 0 else 0)
+        return WayArrays(compact.ids, offsets, compact.node_ids)
+
+
+#loads streets out of a .json file (list of street dicts) or a folder written by StreetArrays.save
+def load_streets(path, mmap_mode='r'):
+    if os.path.isdir(path):
+        return StreetArrays.load(path, mmap_mode)
+    with open(path, 'r') as file:
+        return StreetArrays.from_streets(json.load(file))
+
+
+#returns streets as StreetArrays (converts lists of street dicts)
+def as_street_arrays(streets):
+    if isinstance(streets, StreetArrays):
+        return streets
+    return StreetArrays.from_streets(streets)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from node_arrays import as_node_arrays
+from spatial_index import SpatialIndex
+from way_index import NodeWayIndex
+
+
+#answers "which ways have a node within r km of this point"
+#with a KD-tree over the highway nodes and the node -> ways index
+class NeighbourStreetFinder:
+    """
+    Finds the streets near a point.
+
+    Parameters:
+    - nodes_highway (NodeArrays, NodeStore or list): All highway nodes.
+    - way_highway (list): The ways of the highway.
+    """
+
+    def __init__(self, nodes_highway, way_highway):
+        self.nodes = as_node_arrays(nodes_highway)
+        self.index = SpatialIndex.from_nodes(self.nodes)
+        self.way_index = NodeWayIndex(way_highway)
+
+    #returns the rows of the highway nodes within radius (km), sorted by row
+    def nodes_near(self, lat, lon, radius=0.1):
+        return self.index.within(lat, lon, radius)
+
+    #returns (way ids, number of their nodes within radius) of all ways near the point
+    #the ways are sorted by their position in way_highway
+    def ways_near(self, lat, lon, radius=0.1):
+        node_ids = self.nodes.ids[self.nodes_near(lat, lon, radius)]
+        way_rows = np.concatenate([self.way_index.way_rows_of(node_id) for node_id in node_ids]) if len(node_ids) > 0 else np.empty(0, dtype=np.int64)
+        rows, counts = np.unique(way_rows, return_counts=True)
+        return self.way_index.way_ids[rows], counts
+
+    #returns (node ids, votes) of the nodes within radius, every node votes once for every way it is on
+    #the nodes are in the order of nodes_highway
+    def node_votes(self, lat, lon, radius=0.1):
+        node_ids = self.nodes.ids[self.nodes_near(lat, lon, radius)]
+        return node_ids, self.way_index.way_count(node_ids)
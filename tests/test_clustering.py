@@ -0,0 +1,42 @@
+import numpy as np
+
+from clustering import DisjointSet, cluster_centroids, cluster_points, isolated_points, merge_near_points
+
+
+def test_disjoint_set():
+    sets = DisjointSet(6)
+    assert sets.union(4, 5)
+    sets.union_many([1, 2], [2, 4])
+    assert not sets.union(1, 5)
+    assert sets.find(1) == sets.find(5)
+    assert sets.labels().tolist() == [0, 1, 1, 2, 1, 1]
+
+
+#0.0005 degrees of latitude are about 55 m, the points 0-1-2 are a chain, 3 is alone
+def points():
+    return np.array([44.0, 44.0005, 44.001, 44.1]), np.array([0.0, 0.0, 0.0, 0.0])
+
+
+def test_cluster_points_over_other_points():
+    lats, lons = points()
+    assert cluster_points(lats, lons, 0.06).tolist() == [0, 0, 0, 1]
+    assert cluster_points(lats, lons, 0.05).tolist() == [0, 1, 2, 3]
+
+
+def test_centroids_and_representatives():
+    lats, lons = points()
+    labels = cluster_points(lats, lons, 0.06)
+    center_lats, center_lons = cluster_centroids(lats, lons, labels)
+    assert np.allclose(center_lats, [44.0005, 44.1])
+
+    keep, representative = merge_near_points(lats, lons, 0.06)
+    assert keep.tolist() == [True, False, False, True]
+    assert representative.tolist() == [0, 0, 0, 3]
+
+
+def test_isolated_points():
+    lats, lons = points()
+    assert isolated_points(lats, lons, 0.06).tolist() == [False, False, False, True]
+    assert isolated_points(lats[:1], lons[:1], 0.06).tolist() == [True]
+    #two points at the same place
+    assert isolated_points([44.0, 44.0], [0.0, 0.0], 0.01).tolist() == [False, False]
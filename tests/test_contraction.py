@@ -0,0 +1,60 @@
+import numpy as np
+from scipy.sparse.csgraph import dijkstra
+
+import contraction
+from contraction import contract_degree2
+from csr_graph import CSRGraph
+
+
+#junctions 1 and 5, a chain 1 - 2 - 3 - 4 - 5, a shorter parallel chain 1 - 6 - 5,
+#a loop 5 - 7 - 8 - 5, a dead end 1 - 9 - 10 and a circle 11 - 12 - 13 - 11 without any junction
+def street_graph():
+    edges = [(1, 2, 1.0), (2, 3, 2.0), (3, 4, 3.0), (4, 5, 4.0),
+             (1, 6, 2.5), (6, 5, 2.5),
+             (5, 7, 1.0), (7, 8, 1.0), (8, 5, 1.0),
+             (1, 9, 3.0), (9, 10, 1.5),
+             (11, 12, 1.0), (12, 13, 1.0), (13, 11, 1.0),
+             (5, 14, 2.0)]
+    return CSRGraph.from_edge_list(edges)
+
+
+def edge_weight(graph, a, b):
+    neighbours, weights = graph.neighbours(graph.row(a))
+    return float(weights[neighbours == graph.row(b)][0])
+
+
+def distances(graph, ids):
+    rows = graph.rows(ids)
+    return dijkstra(graph.to_scipy(), directed=False, indices=rows)[:, rows]
+
+
+def test_distances_between_kept_nodes_stay_the_same():
+    graph = street_graph()
+    contraction = contract_degree2(graph, keep=[3])
+    kept = contraction.graph.node_ids.tolist()
+    assert 3 in kept and 2 not in kept and 7 not in kept
+    assert contraction.graph.num_nodes < graph.num_nodes
+    assert np.allclose(distances(graph, kept), distances(contraction.graph, kept))
+
+
+def test_expand_gives_the_street_nodes():
+    graph = street_graph()
+    contraction = contract_degree2(graph)
+    assert contraction.expand_edge(1, 5) == [1, 6, 5]
+    assert contraction.expand_edge(5, 1) == [5, 6, 1]
+    assert contraction.expand([10, 1, 5]) == [10, 9, 1, 6, 5]
+
+    #the length of every edge is the length of its street nodes
+    src, dst, weights = contraction.graph.edges()
+    ids = contraction.graph.node_ids
+    for a, b, weight in zip(ids[src].tolist(), ids[dst].tolist(), weights.tolist()):
+        chain = contraction.expand_edge(a, b)
+        assert np.isclose(sum(edge_weight(graph, u, v) for u, v in zip(chain, chain[1:])), weight)
+
+
+#a node id of a way which isn't in the nodes is left out, the street goes on to the next node
+def test_street_graph_without_unknown_nodes():
+    nodes = [{'type': 'node', 'id': i, 'lat': 44.0, 'lon': 0.01 * i} for i in (1, 2, 3)]
+    graph = contraction.street_graph(nodes, [{'type': 'way', 'id': 100, 'nodes': [1, 99, 2, 3]}])
+    assert graph.node_ids.tolist() == [1, 2, 3]
+    assert graph.num_edges == 2
@@ -0,0 +1,43 @@
+import networkx as nx
+
+from csr_graph import CSRGraph
+
+
+def test_from_edges_keeps_the_smallest_weight():
+    graph = CSRGraph.from_edge_list([(10, 20, 5.0), (20, 10, 3.0), (20, 30, 1.0), (30, 30, 2.0)])
+    assert graph.node_ids.tolist() == [10, 20, 30]
+    assert graph.num_nodes == 3
+    assert graph.num_edges == 2
+    assert graph.degree().tolist() == [1, 2, 1]
+
+    neighbours, weights = graph.neighbours(graph.row(20))
+    assert dict(zip(graph.node_ids[neighbours].tolist(), weights.tolist())) == {10: 3.0, 30: 1.0}
+
+
+def test_nodes_without_edges_and_rows():
+    graph = CSRGraph.from_edges([1], [2], [4.0], node_ids=[3, 2, 1])
+    assert graph.node_ids.tolist() == [3, 2, 1]
+    assert graph.degree().tolist() == [0, 1, 1]
+    assert graph.row(7) == -1
+    assert graph.rows([1, 3, 7]).tolist() == [2, 0, -1]
+
+
+def test_edges_and_scipy():
+    graph = CSRGraph.from_edge_list([(1, 2, 4.0), (2, 3, 1.5)])
+    src, dst, weights = graph.edges()
+    assert (src < dst).all()
+    assert sorted(zip(src.tolist(), dst.tolist(), weights.tolist())) == [(0, 1, 4.0), (1, 2, 1.5)]
+    matrix = graph.to_scipy().toarray()
+    assert (matrix == matrix.T).all()
+    assert matrix[0, 1] == 4.0
+
+
+def test_networkx_round_trip():
+    g = nx.Graph()
+    g.add_weighted_edges_from([('a', 'b', 2.0), ('b', 'c', 3.0)])
+    g.add_node('d')
+    graph = CSRGraph.from_networkx(g)
+    back = graph.to_networkx(label={'a': 'A'})
+    assert set(back.nodes()) == {'a', 'b', 'c', 'd'}
+    assert back['b']['c']['weight'] == 3.0
+    assert back.nodes['a']['label'] == 'A'
@@ -0,0 +1,69 @@
+import json
+import os
+
+import data_cache
+from data_cache import cache_is_valid, cache_path, file_hash, load_overpass_cached
+
+
+def write(path, lat=44.5):
+    path.write_text(json.dumps({'elements': [
+        {'type': 'node', 'id': 1, 'lat': lat, 'lon': -0.5, 'tags': {'highway': 'motorway_junction'}},
+        {'type': 'node', 'id': 2, 'lat': 44.6, 'lon': -0.4},
+        {'type': 'way', 'id': 10, 'nodes': [1, 2]}]}))
+    return str(path)
+
+
+def test_round_trip(tmp_path):
+    source = write(tmp_path / 'export.json')
+    cache_dir = str(tmp_path / 'cache')
+    nodes, ways = load_overpass_cached(source, cache_dir)
+
+    #second time out of the memory mapped .npy files
+    assert cache_is_valid(source, cache_path(source, cache_dir))
+    nodes, ways = load_overpass_cached(source, cache_dir)
+    assert sorted(os.listdir(cache_path(source, cache_dir))) == ['manifest.json', 'node_ids.npy', 'node_junction_bits.npy', 'node_lat.npy',
+                                                            'node_lon.npy', 'node_order.npy', 'node_tags.json', 'way_ids.npy',
+                                                            'way_node_ids.npy', 'way_offsets.npy']
+    assert nodes.ids.tolist() == [1, 2]
+    assert nodes.lat.tolist() == [44.5, 44.6]
+    assert nodes.junction.tolist() == [True, False]
+    assert nodes.get(1)['tags'] == {'highway': 'motorway_junction'}
+    assert nodes.row(2) == 1
+    assert ways.nodes_of(0).tolist() == [1, 2]
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    source = write(tmp_path / 'export.json')
+    cache_dir = str(tmp_path / 'cache')
+    load_overpass_cached(source, cache_dir)
+
+    write(tmp_path / 'export.json', lat=45.5)
+    assert not cache_is_valid(source, cache_path(source, cache_dir))
+    nodes, _ = load_overpass_cached(source, cache_dir)
+    assert nodes.lat.tolist() == [45.5, 44.6]
+
+
+#only touched (same content): the hash decides and the new mtime is stored
+def test_touched_file_keeps_the_cache(tmp_path):
+    source = write(tmp_path / 'export.json')
+    folder = cache_path(source, str(tmp_path / 'cache'))
+    load_overpass_cached(source, str(tmp_path / 'cache'))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert cache_is_valid(source, folder)
+    with open(os.path.join(folder, 'manifest.json')) as file:
+        manifest = json.load(file)
+    assert manifest['mtime'] == stat.st_mtime_ns + 10 ** 9
+    assert manifest['sha1'] == file_hash(source)
+
+
+def test_other_version_or_no_manifest(tmp_path, monkeypatch):
+    source = write(tmp_path / 'export.json')
+    folder = cache_path(source, str(tmp_path / 'cache'))
+    load_overpass_cached(source, str(tmp_path / 'cache'))
+
+    monkeypatch.setattr(data_cache, 'CACHE_VERSION', data_cache.CACHE_VERSION + 1)
+    assert not cache_is_valid(source, folder)
+    os.remove(os.path.join(folder, 'manifest.json'))
+    assert not cache_is_valid(source, folder)
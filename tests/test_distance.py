@@ -0,0 +1,35 @@
+import numpy as np
+
+from distance import haversine, haversine_matrix, haversine_one_to_many, haversine_pairwise, haversine_polyline, iter_haversine_tiles
+
+
+def points(count=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(43, 46, count), rng.uniform(-2, 1, count)
+
+
+def test_known_distance():
+    #one degree of latitude
+    assert np.isclose(haversine(44, 0, 45, 0), 6371.0 * np.pi / 180)
+    assert haversine(44.5, -0.5, 44.5, -0.5) == 0
+
+
+def test_single_pairs_match_the_batch():
+    lats, lons = points()
+    batch = haversine_pairwise(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    single = [haversine(a, b, c, d) for a, b, c, d in zip(lats[:-1], lons[:-1], lats[1:], lons[1:])]
+    assert batch.tolist() == single
+
+
+def test_polyline_and_one_to_many():
+    lats, lons = points()
+    assert np.array_equal(haversine_polyline(lats, lons), haversine_pairwise(lats[:-1], lons[:-1], lats[1:], lons[1:]))
+    assert np.array_equal(haversine_one_to_many(lats[0], lons[0], lats, lons), haversine_pairwise(lats[0], lons[0], lats, lons))
+
+
+def test_tiles_give_the_matrix():
+    lats, lons = points(37)
+    full = haversine_pairwise(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+    assert np.allclose(haversine_matrix(lats, lons, block_size=8), full)
+    assert sum(tile.size for _, _, tile in iter_haversine_tiles(lats, lons, block_size=8)) == 37 * 37
+    assert np.allclose(haversine_matrix(lats, lons, dtype=np.float32), full, atol=1e-2)
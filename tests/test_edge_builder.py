@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from distance import haversine
+from edge_builder import EdgeBuilder, chain_edges
+
+
+def test_min_keeps_the_smallest_weight():
+    builder = EdgeBuilder()
+    builder.add(1, 2, 5.0)
+    builder.add(2, 1, 3.0)
+    builder.add(1, 2, 4.0)
+    assert len(builder) == 1
+    assert (2, 1) in builder
+    assert builder.to_list() == [(1, 2, 3.0)]
+
+
+def test_first_keeps_the_first_weight():
+    builder = EdgeBuilder('first')
+    builder.add_many([(2, 1, 5.0), (1, 2, 3.0)])
+    assert builder.to_list() == [(1, 2, 5.0)]
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        EdgeBuilder('max')
+
+
+def test_no_self_loops():
+    builder = EdgeBuilder()
+    builder.add(3, 3, 1.0)
+    assert len(builder) == 0
+
+
+def test_to_arrays():
+    builder = EdgeBuilder()
+    builder.add_many([5, 1, 3], [4, 2, 1], [10.0, 60.0, 59.9])
+    src, dst, weight = builder.to_arrays()
+    assert sorted(zip(src.tolist(), dst.tolist())) == [(1, 2), (1, 3), (4, 5)]
+    assert (src < dst).all()
+
+    #the edges with weight >= max_distance are left out
+    src, dst, weight = builder.to_arrays(max_distance=60)
+    assert sorted(zip(src.tolist(), dst.tolist(), weight.tolist())) == [(1, 3, 59.9), (4, 5, 10.0)]
+
+
+#street 1 - 2 - 3 - 4 with a bend at 2 and 3, a second street 4 - 5, node 99 isn't in the nodes
+def streets():
+    coords = {1: (44.0, 0.0), 2: (44.0, 0.01), 3: (44.01, 0.01), 4: (44.01, 0.02), 5: (44.02, 0.02)}
+    nodes = [{'type': 'node', 'id': key, 'lat': lat, 'lon': lon} for key, (lat, lon) in coords.items()]
+    ways = [{'type': 'way', 'id': 100, 'nodes': [1, 2, 99, 3, 4]}, {'type': 'way', 'id': 200, 'nodes': [4, 5]}]
+    return nodes, ways, coords
+
+
+#the weight is the length along the street, not the straight line between the retained nodes
+def test_chain_edges_along_the_ways():
+    nodes, ways, coords = streets()
+    along = sum(haversine(*coords[a], *coords[b]) for a, b in ((1, 2), (2, 3), (3, 4)))
+    edges = dict(((a, b), weight) for a, b, weight in chain_edges(nodes, ways, {1, 4, 5}).to_list())
+    assert edges.keys() == {(1, 4), (4, 5)}
+    assert edges[(1, 4)] == pytest.approx(along)
+    assert edges[(1, 4)] > haversine(*coords[1], *coords[4])
+    assert edges[(4, 5)] == pytest.approx(haversine(*coords[4], *coords[5]))
+
+
+def test_chain_edges_retained_as_bool_array():
+    nodes, ways, _ = streets()
+    retained = np.array([True, False, True, True, True])
+    assert sorted((a, b) for a, b, _ in chain_edges(nodes, ways, retained).to_list()) == [(1, 3), (3, 4), (4, 5)]
+
+
+#the last retained node of one way isn't connected to the first one of the next way
+def test_chain_edges_only_on_the_same_way():
+    nodes, ways, _ = streets()
+    assert chain_edges(nodes, ways, {3, 5}).to_list() == []
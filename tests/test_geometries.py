@@ -0,0 +1,38 @@
+import pytest
+
+shapely = pytest.importorskip('shapely')
+from shapely.geometry import GeometryCollection, LineString, MultiPolygon, Point, Polygon
+
+from geometries import convert_geometries_to_points, convert_geometry_array
+
+
+def square(x, y, size=2):
+    return Polygon([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+def test_convert_geometry_array():
+    geoms = [Point(1, 2), square(0, 0), MultiPolygon([square(0, 0), square(10, 10)]), LineString([(0, 0), (1, 1)])]
+    points = convert_geometry_array(geoms)
+    assert points[0].equals(Point(1, 2))
+    assert points[1].equals(Point(1, 1))
+    assert points[2].geom_type == 'MultiPoint'
+    assert [(p.x, p.y) for p in points[2].geoms] == [(1, 1), (11, 11)]
+    #unknown types are dropped
+    assert points[3] is None
+
+
+def test_collections_are_converted_per_part():
+    inner = GeometryCollection([square(4, 4), LineString([(0, 0), (1, 1)])])
+    geoms = [GeometryCollection([Point(0, 0), square(2, 2), inner]), GeometryCollection()]
+    points = convert_geometry_array(geoms)
+    parts = list(points[0].geoms)
+    assert parts[0].equals(Point(0, 0))
+    assert parts[1].equals(Point(3, 3))
+    #the line of the nested collection is left out
+    assert [part.equals(Point(5, 5)) for part in parts[2].geoms] == [True]
+    assert points[1].is_empty
+
+
+def test_one_geometry():
+    assert convert_geometries_to_points(square(2, 0)).equals(Point(3, 1))
+    assert convert_geometry_array([]).tolist() == []
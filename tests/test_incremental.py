@@ -0,0 +1,89 @@
+import numpy as np
+
+from contraction import contract_degree2, street_graph
+from csr_graph import CSRGraph
+from incremental import IncrementalPlacement
+from placement import Coverage, place_chargers
+from shortest_paths import bounded_all_pairs
+
+
+#road 0 - 1 - ... - 20 with 10 km edges, stations at every even node
+def line_graph():
+    return CSRGraph.from_edge_list([(i, i + 1, 10.0) for i in range(20)])
+
+
+#chargers of the incremental placement compared to a placement from scratch on the changed graph
+def check_against_recompute(incremental):
+    graph = incremental.graph
+    candidates = np.flatnonzero(incremental.candidates)
+    targets = np.flatnonzero(incremental.targets)
+    fresh = place_chargers(graph, incremental.max_distance, candidates, targets)
+
+    reachable = bounded_all_pairs(graph, incremental.max_distance)
+    assert np.allclose(incremental.reachable.to_scipy().toarray(), reachable.to_scipy().toarray())
+
+    #the same targets are covered and not many more chargers are used
+    coverage = Coverage.from_reachability(reachable, candidates, targets, incremental.max_distance)
+    candidate_pos = {row: pos for pos, row in enumerate(candidates.tolist())}
+    chosen = [candidate_pos[row] for row in sorted(incremental.chosen)]
+    assert set(incremental.chosen) <= set(candidates.tolist())
+    assert np.array_equal(np.isfinite(coverage.gaps(chosen)), coverage.coverable())
+    assert len(incremental.chosen) <= fresh.size + 1
+
+
+def test_close_a_charger():
+    graph = line_graph()
+    incremental = IncrementalPlacement(graph, 20, graph.rows(range(0, 21, 2)))
+    closed_id = int(incremental.chosen_ids[1])
+    opened, closed = incremental.apply_delta(removed=[closed_id])
+    assert closed_id in closed
+    assert closed_id not in incremental.chosen_ids.tolist()
+    check_against_recompute(incremental)
+
+
+def test_open_a_station():
+    graph = line_graph()
+    #only the ends have a station, the middle can't be covered
+    incremental = IncrementalPlacement(graph, 20, graph.rows([0, 20]))
+    opened, closed = incremental.apply_delta(added=[(100, [(9, 5.0), (10, 5.0)])])
+    assert opened == [100]
+    assert incremental.graph.row(100) == graph.num_nodes
+    check_against_recompute(incremental)
+
+
+def test_open_and_close():
+    graph = line_graph()
+    incremental = IncrementalPlacement(graph, 20, graph.rows(range(0, 21, 2)))
+    closed_id = int(incremental.chosen_ids[0])
+    incremental.apply_delta(added=[(100, [(5, 2.0)]), (101, [(15, 1.0)])], removed=[closed_id])
+    check_against_recompute(incremental)
+
+
+#street 1 - 2 - 3 - 4 going east on the equator (about 11 km between the nodes), stations at both ends
+def street_placement():
+    nodes = [{'type': 'node', 'id': i, 'lat': 0.0, 'lon': 0.1 * (i - 1)} for i in range(1, 5)]
+    contraction = contract_degree2(street_graph(nodes, [{'type': 'way', 'id': 1, 'nodes': [1, 2, 3, 4]}]), keep=[1, 4])
+    return IncrementalPlacement.from_contraction(nodes, contraction, [1, 4], 20)
+
+
+def test_new_stations_split_the_street():
+    incremental = street_placement()
+    assert incremental.chain_keys == [(1, 4)]
+
+    edges = incremental.station_edges(0.001, 0.15)
+    assert [el[0] for el in edges] == [1, 4]
+    incremental.apply_delta(added=[(-1, edges)])
+    assert sorted(incremental.chain_keys) == [(-1, 1), (-1, 4)]
+    assert incremental.chains[(-1, 4)] == [-1, 3, 4]
+
+    #the next station on the street is connected to the first one
+    edges = incremental.station_edges(0.0, 0.25)
+    assert sorted(el[0] for el in edges) == [-1, 4]
+    incremental.apply_delta(added=[(-2, edges)])
+    check_against_recompute(incremental)
+
+    #closed stations are taken out of the street again
+    incremental.apply_delta(removed=[-1, -2])
+    assert incremental.chain_keys == [(1, 4)]
+    assert incremental.chains[(1, 4)] == [1, 2, -1, 3, -2, 4]
+    check_against_recompute(incremental)
@@ -0,0 +1,65 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from node_arrays import as_node_arrays, NodeArrays, point_is_junction
+from way_arrays import as_way_arrays, drop_unknown_nodes
+
+
+def nodes():
+    return [{'type': 'node', 'id': 30, 'lat': 44.0, 'lon': -0.5},
+            {'type': 'node', 'id': 10, 'lat': 45.0, 'lon': -0.6, 'tags': {'highway': 'motorway_junction', 'ref': '12'}},
+            {'type': 'node', 'id': 20, 'lat': 46.0, 'lon': -0.7, 'tags': {'name': 'Aire de Saugon'}}]
+
+
+def test_rows_of_ids():
+    arrays = NodeArrays.from_nodes(nodes())
+    assert arrays.rows([10, 20, 30, 99]).tolist() == [1, 2, 0, -1]
+    assert arrays.row(99) == -1
+    assert 20 in arrays and 99 not in arrays
+    assert arrays.coords(20) == (46.0, -0.7)
+    assert arrays.get(99) is None
+
+
+def test_junctions_and_tags():
+    arrays = NodeArrays.from_nodes(nodes())
+    assert arrays.junction.tolist() == [False, True, False]
+    assert arrays.is_junction(10) and not arrays.is_junction(20)
+    #all tags are kept, not only the junction flag
+    assert arrays.get(10)['tags'] == {'highway': 'motorway_junction', 'ref': '12'}
+    assert arrays.get(20)['tags'] == {'name': 'Aire de Saugon'}
+    assert 'tags' not in arrays.get(30)
+    assert [point_is_junction(el) for el in arrays] == [False, True, False]
+
+
+def test_rows_are_read_only():
+    arrays = NodeArrays.from_nodes(nodes())
+    row = arrays.get_own_id(2)
+    assert row['own_id'] == 2 and row['id'] == 20
+    with pytest.raises(TypeError):
+        row['lat'] = 0.0
+    assert pickle.loads(pickle.dumps(row)) == row
+
+
+def test_as_node_arrays():
+    arrays = as_node_arrays(nodes())
+    assert as_node_arrays(arrays) is arrays
+    assert np.array_equal(arrays.ids, [30, 10, 20])
+
+
+def test_way_arrays():
+    ways = as_way_arrays([{'type': 'way', 'id': 1, 'nodes': [30, 10]}, {'type': 'way', 'id': 2, 'nodes': []}, {'type': 'way', 'id': 3, 'nodes': [10, 20, 30]}])
+    assert ways.lengths.tolist() == [2, 0, 3]
+    assert ways.nodes_of(2).tolist() == [10, 20, 30]
+    assert ways[0] == {'type': 'way', 'id': 1, 'nodes': [30, 10]}
+    assert [el['id'] for el in ways] == [1, 2, 3]
+
+
+#ids which aren't in the nodes are dropped, the other ways stay as they are
+def test_drop_unknown_nodes():
+    ways = as_way_arrays([{'type': 'way', 'id': 1, 'nodes': [30, 99, 10]}, {'type': 'way', 'id': 2, 'nodes': [98]}, {'type': 'way', 'id': 3, 'nodes': [10, 20]}])
+    known, rows = drop_unknown_nodes(as_node_arrays(nodes()), ways)
+    assert known.lengths.tolist() == [2, 0, 2]
+    assert known.node_ids.tolist() == [30, 10, 10, 20]
+    assert rows.tolist() == [0, 1, 1, 2]
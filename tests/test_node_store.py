@@ -0,0 +1,40 @@
+from node_store import as_node_store, NodeStore
+
+
+def nodes():
+    return [{'type': 'node', 'id': 10, 'lat': 44.0, 'lon': -0.5}, {'type': 'node', 'id': 20, 'lat': 45.0, 'lon': -0.6}]
+
+
+def test_lookups():
+    store = NodeStore(nodes())
+    assert len(store) == 2
+    assert store.get(20)['lat'] == 45.0
+    assert store.get(30) is None
+    assert store.coords(10) == (44.0, -0.5)
+    assert [el['id'] for el in store] == [10, 20]
+
+
+def test_contains_ids_and_dicts():
+    store = NodeStore(nodes())
+    assert 10 in store and 30 not in store
+    assert nodes()[0] in store
+    assert {'type': 'node', 'id': 10, 'lat': 0.0, 'lon': 0.0} not in store
+
+
+def test_own_ids_added_later():
+    store = NodeStore(nodes())
+    for i, el in enumerate(store):
+        el['own_id'] = i
+    assert store.get_own_id(1)['id'] == 20
+
+
+def test_as_node_store_sees_changed_lists():
+    plain = nodes()
+    assert as_node_store(plain).get(20)['lat'] == 45.0
+    #the same list with a changed node (same length) must not give the old data
+    plain[1] = {'type': 'node', 'id': 30, 'lat': 46.0, 'lon': -0.7}
+    assert as_node_store(plain).get(20) is None
+    assert as_node_store(plain).get(30)['lat'] == 46.0
+
+    store = NodeStore(plain)
+    assert as_node_store(store) is store
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from overpass_stream import iter_elements, load_overpass
+
+
+def elements():
+    return [{'type': 'node', 'id': 1, 'lat': 44.5, 'lon': -0.5},
+            {'type': 'node', 'id': 2, 'lat': 44.6, 'lon': -0.4, 'tags': {'highway': 'motorway_junction', 'name': 'a "b" [c]'}},
+            {'type': 'way', 'id': 10, 'nodes': [1, 2], 'tags': {'highway': 'motorway'}},
+            {'type': 'way', 'id': 11, 'nodes': [2, 1, 2]}]
+
+
+def write(tmp_path, data):
+    path = tmp_path / 'export.json'
+    path.write_text(json.dumps(data, indent=1))
+    return str(path)
+
+
+#tiny chunks, so the key and the elements are cut in pieces
+@pytest.mark.parametrize('chunk_size', [3, 17, 1 << 16])
+def test_iter_elements(tmp_path, chunk_size):
+    path = write(tmp_path, {'version': 0.6, 'osm3s': {'copyright': '...'}, 'elements': elements()})
+    assert list(iter_elements(path, chunk_size)) == elements()
+
+
+def test_empty_and_missing_elements(tmp_path):
+    assert list(iter_elements(write(tmp_path, {'elements': []}))) == []
+    assert list(iter_elements(write(tmp_path, {'version': 0.6}))) == []
+
+
+def test_broken_file(tmp_path):
+    path = tmp_path / 'export.json'
+    path.write_text('{"elements": [{"type": "node", "id": 1')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_elements(str(path), 8))
+
+
+def test_load_overpass(tmp_path):
+    nodes, ways = load_overpass(write(tmp_path, {'elements': elements()}), chunk_size=5)
+    assert nodes.ids.tolist() == [1, 2]
+    assert nodes.lat.tolist() == [44.5, 44.6]
+    assert nodes.junction.tolist() == [False, True]
+    assert nodes.get(2)['tags']['name'] == 'a "b" [c]'
+    assert ways.ids.tolist() == [10, 11]
+    assert ways.nodes_of(1).tolist() == [2, 1, 2]
+    assert ways.offsets.tolist() == [0, 2, 5]
@@ -0,0 +1,115 @@
+import importlib
+import os
+import sys
+
+import pipeline as pipeline_module
+from node_arrays import NodeArrays
+from pipeline import Pipeline
+from street_arrays import StreetArrays
+
+
+def helper(x):
+    return x + 1
+
+
+def other_helper(x):
+    return x + 2
+
+
+def make(cache_dir, calls, n=3):
+    pipeline = Pipeline(str(cache_dir), verbose=False)
+
+    @pipeline.stage('numbers', params={'n': n})
+    def numbers(n):
+        calls.append('numbers')
+        return list(range(n))
+
+    @pipeline.stage('total', inputs=('numbers',))
+    def total(numbers):
+        calls.append('total')
+        return helper(sum(numbers))
+
+    return pipeline
+
+
+def test_results_are_stored(tmp_path):
+    calls = []
+    assert make(tmp_path, calls).run('total') == 4
+    assert calls == ['numbers', 'total']
+
+    #a new pipeline loads both stages
+    again = make(tmp_path, calls)
+    assert again.run('total') == 4
+    assert calls == ['numbers', 'total']
+
+
+#a function of the same file which the stage calls is part of the key
+def test_key_sees_the_called_functions(tmp_path, monkeypatch):
+    pipeline = make(tmp_path, [])
+    key = pipeline.key('total')
+    monkeypatch.setitem(globals(), 'helper', other_helper)
+    pipeline.reset()
+    assert pipeline.key('total') != key
+    #numbers doesn't use helper
+    assert make(tmp_path, []).key('numbers') == pipeline.key('numbers')
+
+
+#a project module the stage uses is hashed as a whole file
+def test_key_sees_the_modules(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, 'PROJECT_DIR', str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / 'extra_step.py').write_text("def step(x):\n    return x * 2\n")
+    importlib.invalidate_caches()
+    extra_step = importlib.import_module('extra_step')
+
+    pipeline = Pipeline(str(tmp_path / 'cache'), verbose=False)
+
+    @pipeline.stage('doubled')
+    def doubled():
+        return extra_step.step(21)
+
+    @pipeline.stage('by_name', depends=('extra_step',))
+    def by_name():
+        return getattr(sys.modules['extra_step'], 'step')(1)
+
+    keys = (pipeline.key('doubled'), pipeline.key('by_name'))
+    (tmp_path / 'extra_step.py').write_text("def step(x):\n    return x * 3\n")
+    pipeline.reset()
+    assert pipeline.key('doubled') != keys[0]
+    assert pipeline.key('by_name') != keys[1]
+    del sys.modules['extra_step']
+
+
+def test_changed_input_computes_again(tmp_path):
+    calls = []
+    make(tmp_path, calls).run('total')
+    assert make(tmp_path, calls, n=6).run('total') == 16
+    assert calls == ['numbers', 'total', 'numbers', 'total']
+
+
+#the columnar stores are written as .npy files and memory mapped, the rest is pickled
+def test_arrays_are_stored_as_npy(tmp_path):
+    nodes = NodeArrays.from_nodes([{'type': 'node', 'id': 5, 'lat': 44.0, 'lon': 0.5},
+                                   {'type': 'node', 'id': 3, 'lat': 44.1, 'lon': 0.6, 'tags': {'highway': 'motorway_junction'}}])
+    streets = StreetArrays.from_streets([{'id': 0, 'old_ids': (1, None), 'nodes': [5, 3]}])
+
+    def build(cache_dir):
+        pipeline = Pipeline(str(cache_dir), verbose=False)
+
+        @pipeline.stage('arrays')
+        def arrays():
+            return nodes, [streets, 'text']
+        return pipeline
+
+    build(tmp_path).run('arrays')
+    pipeline = build(tmp_path)
+    folder = pipeline.path('arrays')
+    assert sorted(os.listdir(folder)) == ['0', '1', 'result.pkl']
+    assert 'node_ids.npy' in os.listdir(os.path.join(folder, '0'))
+
+    loaded_nodes, (loaded_streets, text) = pipeline.run('arrays')
+    assert text == 'text'
+    assert loaded_nodes.ids.tolist() == [5, 3]
+    assert loaded_nodes.row(3) == 1
+    assert loaded_nodes.get(3)['tags'] == {'highway': 'motorway_junction'}
+    assert loaded_streets.to_list() == streets.to_list()
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from csr_graph import CSRGraph
+from placement import branch_and_bound_cover, Coverage, greedy_cover, lazy_greedy_cover, milp_cover, place_chargers, reduce_cover, split_long_edges
+from shortest_paths import bounded_all_pairs
+
+
+#greedy trap: C covers t1, t2, t4, t5 and is taken first, then A and B are still needed for t3 and t6
+#the optimum is A and B
+def trap_graph():
+    edges = [('A', 't1', 5), ('A', 't2', 5), ('A', 't3', 5),
+             ('B', 't4', 5), ('B', 't5', 5), ('B', 't6', 5),
+             ('C', 't1', 5), ('C', 't2', 5), ('C', 't4', 5), ('C', 't5', 5)]
+    return CSRGraph.from_edge_list(edges)
+
+
+def trap_coverage():
+    graph = trap_graph()
+    candidates = graph.rows(['A', 'B', 'C'])
+    targets = graph.rows(['t1', 't2', 't3', 't4', 't5', 't6'])
+    return Coverage.from_reachability(bounded_all_pairs(graph, 5), candidates, targets, 5)
+
+
+def covers_all(coverage, chosen):
+    return np.all(np.isfinite(coverage.gaps(chosen)[coverage.coverable()]))
+
+
+def test_greedy_takes_the_trap():
+    coverage = trap_coverage()
+    chosen = greedy_cover(coverage)
+    assert covers_all(coverage, chosen)
+    assert sorted(coverage.candidates[chosen].tolist()) == sorted(trap_graph().rows(['A', 'B', 'C']).tolist())
+
+
+def test_coverage_of_the_candidates():
+    coverage = trap_coverage()
+    assert coverage.sizes().tolist() == [3, 3, 4]
+    assert coverage.coverable().all()
+    assert coverage.gaps([2])[[0, 1, 3, 4]].tolist() == [5, 5, 5, 5]
+    assert np.isinf(coverage.gaps([2])[[2, 5]]).all()
+
+
+@pytest.mark.parametrize('mode', ['greedy', 'eager', 'exact', 'bnb', 'corridor'])
+def test_place_chargers_covers_the_roads(mode):
+    #line 0 - 1 - 2 - 3 with 30 km edges, a charger can only be at 0 and 3
+    graph = CSRGraph.from_edge_list([(0, 1, 30), (1, 2, 30), (2, 3, 30)])
+    candidates = graph.rows([0, 3])
+
+    #the nodes 1 and 2 are within 50 of one station each, but the middle of 1 - 2 is 45 away from both
+    placement = place_chargers(graph, 50, candidates=candidates, mode=mode)
+    assert placement.size == 2
+    assert placement.max_node_gap == 30
+    assert placement.max_road_gap == 45
+
+    #with the roads split the targets need a charger within 40 - 10 / 2, the middle of 1 - 2 can't be covered
+    placement = place_chargers(graph, 40, candidates=candidates, mode=mode, segment_length=10)
+    assert placement.max_road_gap <= 40
+    assert len(placement.uncovered) > 0
+
+
+def test_split_long_edges_keeps_the_distances():
+    graph = CSRGraph.from_edge_list([(10, 11, 25), (11, 12, 4), (12, 10, 50)])
+    split, points = split_long_edges(graph, 10)
+    assert split.weights.max() <= 10
+    assert split.node_ids[:graph.num_nodes].tolist() == graph.node_ids.tolist()
+    assert len(points) == split.num_nodes - graph.num_nodes == 2 + 4
+    before = bounded_all_pairs(graph, 100).to_scipy().toarray()
+    after = bounded_all_pairs(split, 100).to_scipy().toarray()[:graph.num_nodes, :graph.num_nodes]
+    assert np.allclose(before, after)
+
+
+def test_lazy_greedy_is_greedy():
+    coverage = trap_coverage()
+    assert lazy_greedy_cover(coverage).tolist() == greedy_cover(coverage).tolist()
+
+    rng = np.random.default_rng(0)
+    n, m = 80, 120
+    graph = CSRGraph.from_edges(rng.integers(0, n, m), rng.integers(0, n, m), rng.uniform(1, 30, m), node_ids=np.arange(n))
+    candidates = rng.choice(n, 30, replace=False)
+    coverage = Coverage.from_reachability(bounded_all_pairs(graph, 40), candidates, np.arange(n), 40)
+    assert greedy_cover(coverage).tolist() == lazy_greedy_cover(coverage).tolist()
+
+
+def test_lazy_greedy_only_the_open_targets():
+    coverage = trap_coverage()
+    uncovered = np.zeros(coverage.num_targets, dtype=bool)
+    uncovered[[2, 5]] = True
+    assert sorted(coverage.candidates[lazy_greedy_cover(coverage, uncovered)].tolist()) == sorted(trap_graph().rows(['A', 'B']).tolist())
+
+
+def test_exact_finds_the_optimum():
+    coverage = trap_coverage()
+    optimum = sorted(trap_graph().rows(['A', 'B']).tolist())
+    chosen, optimal = branch_and_bound_cover(coverage)
+    assert optimal
+    assert sorted(coverage.candidates[chosen].tolist()) == optimum
+
+    solved = milp_cover(coverage)
+    if solved is not None:
+        assert solved[1]
+        assert sorted(coverage.candidates[solved[0]].tolist()) == optimum
+
+    placement = place_chargers(trap_graph(), 5, candidates=trap_graph().rows(['A', 'B', 'C']), targets=trap_graph().rows(['t1', 't2', 't3', 't4', 't5', 't6']), mode='exact')
+    assert placement.size == 2 and placement.optimal
+
+
+def test_branch_and_bound_without_time():
+    #no time left: still a cover, at most the greedy one
+    coverage = trap_coverage()
+    chosen, _ = branch_and_bound_cover(coverage, time_limit=0)
+    assert covers_all(coverage, chosen)
+    assert len(chosen) <= len(greedy_cover(coverage))
+
+
+def test_reduce_cover():
+    #t1 has only candidate 0, candidate 2 covers a subset of candidate 1
+    sets = {0: {'t1', 't2'}, 1: {'t3', 't4'}, 2: {'t3'}}
+    options = {'t1': {0}, 't2': {0}, 't3': {1, 2}, 't4': {1}}
+    forced = reduce_cover(sets, options)
+    assert sorted(forced) == [0, 1]
+    assert sets == {} and options == {}
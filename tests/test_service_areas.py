@@ -0,0 +1,41 @@
+import pytest
+
+from service_areas import area_centroids, reduce_service_areas
+
+
+def nodes():
+    #square of 0.01 x 0.01 degrees with one extra node on its lower edge
+    coords = {1: (44.0, 0.0), 2: (44.0, 0.01), 3: (44.01, 0.01), 4: (44.01, 0.0), 5: (44.0, 0.005),
+              6: (45.0, 1.0), 7: (45.0, 1.0005)}
+    return [{'type': 'node', 'id': key, 'lat': lat, 'lon': lon} for key, (lat, lon) in coords.items()]
+
+
+def test_mean_of_the_nodes():
+    lats, lons = area_centroids([{'type': 'way', 'id': 1, 'nodes': [1, 2, 3, 4]}], nodes())
+    assert lats.tolist() == pytest.approx([44.005])
+    assert lons.tolist() == pytest.approx([0.005])
+
+
+#the extra node pulls the mean down, the area centroid stays in the middle of the square
+def test_weighted_centroid():
+    ways = [{'type': 'way', 'id': 1, 'nodes': [1, 5, 2, 3, 4, 1]}, {'type': 'way', 'id': 2, 'nodes': [6, 7]}]
+    lats, lons = area_centroids(ways, nodes())
+    assert lats[0] < 44.005
+    lats, lons = area_centroids(ways, nodes(), weighted=True)
+    assert lats.tolist() == pytest.approx([44.005, 45.0])
+    assert lons.tolist() == pytest.approx([0.005, 1.00025])
+
+
+#ids which aren't in the nodes are dropped, a way without any known node is left out
+def test_unknown_ids_are_dropped():
+    ways = [{'type': 'way', 'id': 1, 'nodes': [99, 98]}, {'type': 'way', 'id': 2, 'nodes': [6, 99, 7]}]
+    lats, lons = area_centroids(ways, nodes())
+    assert lats.tolist() == pytest.approx([45.0])
+    assert lons.tolist() == pytest.approx([1.00025])
+
+
+def test_near_areas_are_merged():
+    ways = [{'type': 'way', 'id': 1, 'nodes': [6]}, {'type': 'way', 'id': 2, 'nodes': [7]}, {'type': 'way', 'id': 3, 'nodes': [1]}]
+    assert len(reduce_service_areas(ways, nodes(), merge_distance=0)) == 3
+    merged = reduce_service_areas(ways, nodes(), merge_distance=0.1)
+    assert merged == [pytest.approx((45.0, 1.00025)), pytest.approx((44.0, 0.0))]
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from csr_graph import CSRGraph
+from shortest_paths import (bounded_all_pairs, dense_matrices, floyd_warshall, floyd_warshall_blocked, floyd_warshall_matrix,
+                            get_path, sparse_bounded_all_pairs, update_reachability)
+
+
+#random connected graph: a path through all nodes plus some random edges
+def random_graph(n=40, extra=60, seed=0):
+    rng = np.random.default_rng(seed)
+    src = np.concatenate((np.arange(n - 1), rng.integers(0, n, extra)))
+    dst = np.concatenate((np.arange(1, n), rng.integers(0, n, extra)))
+    return CSRGraph.from_edges(src, dst, rng.uniform(1, 20, len(src)), node_ids=np.arange(n))
+
+
+def path_length(graph, path):
+    matrix = graph.to_scipy().toarray()
+    return sum(matrix[a, b] for a, b in zip(path[:-1], path[1:]))
+
+
+#the pairs within max_distance and their distances are the ones of a full dijkstra
+@pytest.mark.parametrize('search', [bounded_all_pairs, sparse_bounded_all_pairs])
+def test_bounded_all_pairs(search):
+    graph = random_graph()
+    full = dijkstra(graph.to_scipy(), directed=False)
+    reachable = search(graph, max_distance=30)
+
+    for source in range(graph.num_nodes):
+        targets, distances = reachable.reachable(source)
+        expected = np.flatnonzero(full[source] <= 30)
+        assert targets.tolist() == expected.tolist()
+        assert np.allclose(distances, full[source, expected])
+    assert reachable.distance(0, int(np.argmax(full[0]))) == np.inf
+
+
+def test_dense_and_sparse_agree():
+    graph = random_graph(seed=1)
+    dense = bounded_all_pairs(graph, max_distance=25, block_entries=100)
+    sparse = bounded_all_pairs(graph, max_distance=25, dense_max_nodes=0)
+    assert dense.indptr.tolist() == sparse.indptr.tolist()
+    assert dense.targets.tolist() == sparse.targets.tolist()
+    assert np.allclose(dense.distances, sparse.distances)
+
+
+def test_path():
+    graph = random_graph(seed=2)
+    reachable = bounded_all_pairs(graph, max_distance=40)
+    for source in (0, 7, 19):
+        for target in reachable.reachable(source)[0].tolist():
+            path = reachable.path(source, target)
+            assert path[0] == source and path[-1] == target
+            assert path_length(graph, path) == pytest.approx(reachable.distance(source, target))
+    assert reachable.path(0, 0) == [0]
+
+
+def test_only_some_sources():
+    graph = random_graph(seed=3)
+    reachable = bounded_all_pairs(graph, max_distance=30, sources=[5, 2])
+    assert len(reachable.reachable(0)[0]) == 0
+    assert reachable.reachable(2)[0].tolist() == bounded_all_pairs(graph, max_distance=30).reachable(2)[0].tolist()
+
+
+#after a new edge only the rows near it are computed again, the result is the same as a recompute
+def test_update_reachability():
+    graph = random_graph(seed=4)
+    before = bounded_all_pairs(graph, max_distance=30)
+
+    src, dst, weights = graph.edges()
+    changed = CSRGraph.from_edges(np.append(src, 3), np.append(dst, 30), np.append(weights, 2.0), node_ids=graph.node_ids)
+    near = np.union1d(before.reachable(3)[0], before.reachable(30)[0])
+    updated = update_reachability(before, changed, near)
+    again = bounded_all_pairs(changed, max_distance=30)
+
+    assert updated.indptr.tolist() == again.indptr.tolist()
+    assert updated.targets.tolist() == again.targets.tolist()
+    assert np.allclose(updated.distances, again.distances)
+
+
+#the tiled and the plain floyd warshall give the distances of dijkstra
+@pytest.mark.parametrize('block_size', [None, 7, 16, 64])
+def test_floyd_warshall(block_size):
+    graph = random_graph(seed=5)
+    dist, prev = floyd_warshall(graph, block_size=block_size)
+    assert np.allclose(dist, dijkstra(graph.to_scipy(), directed=False))
+    assert prev.dtype == np.int32
+
+
+def test_blocked_is_the_same_as_the_matrix_version():
+    graph = random_graph(n=50, seed=6)
+    plain = floyd_warshall_matrix(*dense_matrices(graph))
+    blocked = floyd_warshall_blocked(*dense_matrices(graph), block_size=8)
+    assert np.allclose(plain[0], blocked[0])
+    for u in range(0, 50, 7):
+        for v in range(50):
+            assert path_length(graph, get_path(u, v, blocked[1])) == pytest.approx(blocked[0][u, v])
+
+
+def test_get_path_without_a_path():
+    graph = CSRGraph.from_edges([0, 2], [1, 3], [1.0, 1.0], node_ids=[0, 1, 2, 3])
+    dist, prev = floyd_warshall(graph)
+    assert dist[0, 3] == np.inf
+    assert get_path(0, 3, prev) == []
+    assert get_path(2, 2, prev) == [2]
+    assert get_path(1, 0, prev) == [1, 0]
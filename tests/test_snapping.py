@@ -0,0 +1,72 @@
+import pytest
+
+from distance import haversine
+from snapping import SegmentIndex, insert_snapped_nodes
+
+
+#one straight street east along lat 44 (nodes 1 - 2 - 3, 0.01 degrees apart) and a short one far away
+def street():
+    nodes = [{'type': 'node', 'id': i, 'lat': 44.0, 'lon': 0.01 * (i - 1)} for i in (1, 2, 3)]
+    nodes += [{'type': 'node', 'id': 4, 'lat': 45.0, 'lon': 1.0}, {'type': 'node', 'id': 5, 'lat': 45.0, 'lon': 1.01}]
+    ways = [{'type': 'way', 'id': 100, 'nodes': [1, 2, 3]}, {'type': 'way', 'id': 200, 'nodes': [4, 5]}]
+    return nodes, ways
+
+
+def test_snap_onto_the_segment():
+    nodes, ways = street()
+    index = SegmentIndex(nodes, ways)
+    assert len(index) == 3
+
+    found = index.snap(44.002, 0.015, radius=1)
+    assert found['way'] == 0
+    assert found['position'] == 1
+    assert found['t'] == pytest.approx(0.5)
+    assert found['lat'] == pytest.approx(44.0)
+    assert found['lon'] == pytest.approx(0.015)
+    assert found['distance'] == pytest.approx(haversine(44.002, 0.015, 44.0, 0.015), rel=1e-3)
+    assert found['along'] == pytest.approx(haversine(44.0, 0.0, 44.0, 0.015), rel=1e-3)
+
+
+def test_nothing_within_radius():
+    nodes, ways = street()
+    index = SegmentIndex(nodes, ways)
+    assert index.snap(44.1, 0.015, radius=1) is None
+    #behind the end of the street the end node is the nearest point
+    assert index.snap(44.0, 0.03, radius=1)['t'] == pytest.approx(1.0)
+    assert [el is None for el in index.snap_many([44.1, 45.001], [0.0, 1.005])] == [True, False]
+
+
+def test_insert_snapped_nodes():
+    nodes, ways = street()
+    stations = [(44.002, 0.015), (44.001, 0.01), (44.5, 0.5), (44.001, 0.005)]
+    new_nodes, new_ways, station_node_ids, along = insert_snapped_nodes(nodes, ways, stations, radius=1)
+
+    #new nodes get negative ids and are inserted into their segment (sorted along the way),
+    #a projection onto a node uses the node, a station without street gets None
+    assert station_node_ids == [-1, 2, None, -2]
+    assert new_ways.nodes_of(0).tolist() == [1, -2, 2, -1, 3]
+    assert new_ways.nodes_of(1).tolist() == [4, 5]
+    assert new_nodes.ids.tolist() == [1, 2, 3, 4, 5, -1, -2]
+    assert new_nodes.coords(-1) == pytest.approx((44.0, 0.015))
+    assert along[2] is None
+    assert along[0] == pytest.approx(haversine(44.0, 0.0, 44.0, 0.015), rel=1e-3)
+
+
+#node ids which aren't in the nodes are left out of the index and the ways of the result
+def test_unknown_node_ids():
+    nodes, ways = street()
+    ways[0]['nodes'] = [1, 99, 2, 3]
+    index = SegmentIndex(nodes, ways)
+    assert len(index) == 3
+    assert index.snap(44.002, 0.015)['position'] == 1
+
+    _, new_ways, station_node_ids, _ = insert_snapped_nodes(nodes, ways, [(44.002, 0.015)], index=index)
+    assert new_ways.nodes_of(0).tolist() == [1, 2, -1, 3]
+
+
+def test_no_station_snapped():
+    nodes, ways = street()
+    new_nodes, new_ways, station_node_ids, _ = insert_snapped_nodes(nodes, ways, [(10.0, 10.0)])
+    assert station_node_ids == [None]
+    assert len(new_nodes) == 5
+    assert new_ways.node_ids.tolist() == [1, 2, 3, 4, 5]
@@ -0,0 +1,47 @@
+import numpy as np
+
+from distance import haversine_pairwise
+from spatial_index import SpatialIndex
+
+
+def index(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return SpatialIndex(rng.uniform(44, 45, count), rng.uniform(-1, 0, count), ids=np.arange(1000, 1000 + count))
+
+
+def brute_force(idx, lat, lon):
+    return haversine_pairwise(lat, lon, idx.lat, idx.lon)
+
+
+def test_nearest_is_the_brute_force_one():
+    idx = index()
+    for lat, lon in [(44.5, -0.5), (44.01, -0.99), (43.0, 1.0)]:
+        distances, rows = idx.nearest(lat, lon, k=3)
+        assert rows.tolist() == np.argsort(brute_force(idx, lat, lon))[:3].tolist()
+        assert np.all(np.diff(distances) >= 0)
+
+
+def test_nearest_with_excluded_rows():
+    idx = index()
+    best = np.argsort(brute_force(idx, 44.5, -0.5))
+    _, rows = idx.nearest(44.5, -0.5, k=2, exclude={int(best[0])})
+    assert rows.tolist() == best[1:3].tolist()
+
+
+def test_within_and_pairs():
+    idx = index()
+    dist = brute_force(idx, 44.5, -0.5)
+    assert idx.within(44.5, -0.5, 10).tolist() == np.flatnonzero(dist <= 10).tolist()
+    assert [el.tolist() for el in idx.within_many([44.5], [-0.5], 10)] == [np.flatnonzero(dist <= 10).tolist()]
+
+    first, second = idx.pairs(3)
+    all_pairs = haversine_pairwise(idx.lat[:, None], idx.lon[:, None], idx.lat[None, :], idx.lon[None, :])
+    expected = {(a, b) for a, b in zip(*np.nonzero(all_pairs <= 3)) if a < b}
+    assert set(zip(first.tolist(), second.tolist())) == expected
+
+
+def test_nearest_unique_takes_every_point_once():
+    idx = SpatialIndex([44.0, 44.1, 44.2], [0.0, 0.0, 0.0])
+    distances, rows = idx.nearest_unique([44.0, 44.0, 44.0, 44.0], [0.0, 0.0, 0.0, 0.0])
+    assert rows.tolist() == [0, 1, 2, -1]
+    assert distances[0] == 0 and np.isinf(distances[3])
@@ -0,0 +1,54 @@
+import numpy as np
+
+from street_arrays import StreetArrays, as_street_arrays, load_streets
+
+
+#streets like go_through_street makes them
+def streets():
+    return [{'id': 0, 'old_ids': (100, None), 'nodes': [1, 2, 3]},
+            {'id': 1, 'old_ids': (100, 200), 'nodes': [3, 4]},
+            {'id': 2, 'old_ids': (200, None), 'nodes': [5, 6, 7, 8]}]
+
+
+def test_round_trip_of_the_dicts():
+    found = StreetArrays.from_streets(streets())
+    assert found.to_list() == streets()
+    assert isinstance(found[1]['old_ids'], tuple)
+    assert found.lengths.tolist() == [3, 2, 4]
+    assert as_street_arrays(found) is found
+
+
+def test_mask_and_select():
+    found = StreetArrays.from_streets(streets())
+    masked = found.with_mask(found.node_ids != 2).with_mask(found.node_ids != 7)
+    assert masked.lengths.tolist() == [2, 2, 3]
+    assert masked.nodes_of(2).tolist() == [5, 6, 8]
+    assert not masked.is_contiguous()
+
+    selected = masked.select([0, 2])
+    assert selected.node_ids is found.node_ids
+    assert [el['nodes'] for el in selected] == [[1, 3], [5, 6, 8]]
+
+    compact = selected.compact()
+    assert compact.is_contiguous()
+    assert compact.node_ids.tolist() == [1, 3, 5, 6, 8]
+    assert compact.to_list() == selected.to_list()
+
+
+def test_save_and_load(tmp_path):
+    found = StreetArrays.from_streets(streets())
+    found = found.with_mask(found.node_ids != 4).select([1, 2])
+    found.save(str(tmp_path / 'streets'))
+
+    loaded = load_streets(str(tmp_path / 'streets'))
+    assert isinstance(loaded.node_ids, np.ndarray)
+    assert loaded.to_list() == found.to_list()
+    assert loaded.is_contiguous()
+
+
+def test_to_way_arrays():
+    found = StreetArrays.from_streets(streets())
+    ways = found.select([2, 0]).to_way_arrays()
+    assert ways.ids.tolist() == [2, 0]
+    assert ways.nodes_of(0).tolist() == [5, 6, 7, 8]
+    assert ways.nodes_of(1).tolist() == [1, 2, 3]
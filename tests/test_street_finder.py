@@ -0,0 +1,30 @@
+from street_finder import NeighbourStreetFinder
+
+
+#two parallel streets 1 - 2 - 3 and 4 - 5 - 6 about 50 m apart, node 2 is also on a third way
+def finder():
+    nodes = [{'type': 'node', 'id': i, 'lat': 44.0, 'lon': 0.001 * (i - 1)} for i in (1, 2, 3)]
+    nodes += [{'type': 'node', 'id': i, 'lat': 44.00045, 'lon': 0.001 * (i - 4)} for i in (4, 5, 6)]
+    nodes.append({'type': 'node', 'id': 7, 'lat': 44.1, 'lon': 0.0})
+    ways = [{'type': 'way', 'id': 100, 'nodes': [1, 2, 3]},
+            {'type': 'way', 'id': 200, 'nodes': [4, 5, 6]},
+            {'type': 'way', 'id': 300, 'nodes': [2, 7]}]
+    return NeighbourStreetFinder(nodes, ways)
+
+
+def test_nodes_near():
+    found = finder()
+    assert found.nodes.ids[found.nodes_near(44.0, 0.001, 0.01)].tolist() == [2]
+    assert found.nodes.ids[found.nodes_near(44.0, 0.001, 0.06)].tolist() == [2, 5]
+
+
+def test_ways_near():
+    way_ids, counts = finder().ways_near(44.0, 0.001, 0.06)
+    assert way_ids.tolist() == [100, 200, 300]
+    assert counts.tolist() == [1, 1, 1]
+
+
+def test_node_votes():
+    node_ids, votes = finder().node_votes(44.0, 0.001, 0.06)
+    assert node_ids.tolist() == [2, 5]
+    assert votes.tolist() == [2, 1]
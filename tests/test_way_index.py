@@ -0,0 +1,25 @@
+from way_index import NodeWayIndex
+
+
+#node 2 is on both ways, way 200 is closed (node 4 is twice in it)
+def index():
+    return NodeWayIndex([{'type': 'way', 'id': 100, 'nodes': [1, 2, 3]},
+                         {'type': 'way', 'id': 200, 'nodes': [4, 2, 5, 4]}])
+
+
+def test_ways_of():
+    found = index()
+    assert found.ways_of(2).tolist() == [100, 200]
+    assert found.ways_of(4).tolist() == [200]
+    assert found.way_rows_of(1).tolist() == [0]
+    assert found.ways_of(9).tolist() == []
+
+
+def test_way_count():
+    assert index().way_count([1, 2, 4, 9]).tolist() == [1, 2, 1, 0]
+
+
+def test_empty():
+    found = NodeWayIndex([])
+    assert found.ways_of(1).tolist() == []
+    assert found.way_count([1]).tolist() == [0]
@@ -0,0 +1,83 @@
+import numpy as np
+
+
+#columnar version of the overpass way list (ragged array)
+#the nodes of way i are node_ids[offsets[i]:offsets[i+1]]
+class WayArrays:
+    """
+    Ways stored as NumPy arrays instead of a list of dicts.
+
+    Parameters:
+    - ids (array): Overpass ids of the ways (int64).
+    - offsets (array): Start of the nodes of every way in node_ids (int64, length n+1).
+    - node_ids (array): The node ids of all ways after each other (int64).
+    """
+
+    def __init__(self, ids, offsets, node_ids):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+
+    #builds the arrays out of a list of way dicts
+    @classmethod
+    def from_ways(cls, ways):
+        ways = list(ways)
+        ids = np.fromiter((el['id'] for el in ways), dtype=np.int64, count=len(ways))
+        lengths = np.fromiter((len(el['nodes']) for el in ways), dtype=np.int64, count=len(ways))
+        offsets = np.zeros(len(ways) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        node_ids = np.fromiter((node_id for el in ways for node_id in el['nodes']), dtype=np.int64, count=int(offsets[-1]))
+        return cls(ids, offsets, node_ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    #gives way dicts like the overpass list, so old code can still loop over the ways
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self.get_row(row)
+
+    def __getitem__(self, row):
+        return self.get_row(row)
+
+    #number of nodes of every way
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.offsets.nbytes + self.node_ids.nbytes
+
+    #the node ids of a way (view, nothing is copied)
+    def nodes_of(self, row):
+        return self.node_ids[self.offsets[row]:self.offsets[row + 1]]
+
+    #returns a way dict for the row
+    def get_row(self, row):
+        return {'type': 'way', 'id': int(self.ids[row]), 'nodes': self.nodes_of(row).tolist()}
+
+    #returns the ways with only the entries of node_ids where keep is True
+    def select_nodes(self, keep):
+        keep = np.asarray(keep, dtype=bool)
+        offsets = np.concatenate(([0], np.cumsum(keep)))[self.offsets]
+        return WayArrays(self.ids, offsets, self.node_ids[keep])
+
+
+#returns (ways, rows of their node ids in nodes) without the node ids which aren't in nodes (row -1)
+#the way goes straight from the node before a dropped one to the one after it
+def drop_unknown_nodes(nodes, ways):
+    rows = nodes.rows(ways.node_ids)
+    known = rows >= 0
+    if known.all():
+        return ways, rows
+    return ways.select_nodes(known), rows[known]
+
+
+#returns ways as WayArrays (converts lists of way dicts and StreetArrays)
+def as_way_arrays(ways):
+    if isinstance(ways, WayArrays):
+        return ways
+    if hasattr(ways, 'to_way_arrays'):
+        return ways.to_way_arrays()
+    return WayArrays.from_ways(ways)
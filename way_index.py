@@ -0,0 +1,60 @@
+import numpy as np
+
+from way_arrays import as_way_arrays
+
+
+#inverted index node id -> ways the node is on
+#built once out of the way list, stored like a CSR matrix (sorted node ids + offsets)
+class NodeWayIndex:
+    """
+    Maps every node id to the ways it is part of.
+
+    Parameters:
+    - ways (WayArrays or list): List of way dicts like {'type': 'way', 'id': 4545354, 'nodes': [28329111, ...]}.
+      The reduced streets of go_through_street ({'id', 'old_ids', 'nodes'}) work as well.
+    """
+
+    def __init__(self, ways):
+        #all ways after each other in one array
+        ways = as_way_arrays(ways)
+        self.way_ids = ways.ids
+        flat_nodes = ways.node_ids
+        flat_ways = np.repeat(np.arange(len(ways), dtype=np.int64), ways.lengths)
+
+        #one entry per place of a node on a way, sorted by node id (then way)
+        order = np.lexsort((flat_ways, flat_nodes))
+        sorted_nodes = flat_nodes[order]
+        self.way_rows = flat_ways[order]
+        self.node_ids, starts = np.unique(sorted_nodes, return_index=True)
+        self.offsets = np.append(starts, len(sorted_nodes)).astype(np.int64)
+
+        #a node which is twice in the same way (closed ways) counts only once for that way
+        new_way = np.ones(len(sorted_nodes), dtype=np.int64)
+        new_way[1:] = (sorted_nodes[1:] != sorted_nodes[:-1]) | (self.way_rows[1:] != self.way_rows[:-1])
+        self.distinct_way_counts = np.add.reduceat(new_way, starts) if len(starts) > 0 else np.empty(0, dtype=np.int64)
+
+    #positions of the node ids in self.node_ids, -1 if the node isn't on any way
+    def _positions(self, node_ids):
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        if len(self.node_ids) == 0:
+            return np.full(node_ids.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.node_ids, node_ids), len(self.node_ids) - 1)
+        return np.where(self.node_ids[pos] == node_ids, pos, -1)
+
+    #returns the rows (positions in the way list) of the ways containing the node
+    def way_rows_of(self, node_id):
+        pos = int(self._positions([node_id])[0])
+        if pos < 0:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(self.way_rows[self.offsets[pos]:self.offsets[pos + 1]])
+
+    #returns the overpass ids of the ways containing the node
+    def ways_of(self, node_id):
+        return self.way_ids[self.way_rows_of(node_id)]
+
+    #returns for every node id the number of different ways containing it
+    def way_count(self, node_ids):
+        pos = self._positions(node_ids)
+        if len(self.node_ids) == 0:
+            return np.zeros(pos.shape, dtype=np.int64)
+        return np.where(pos >= 0, self.distinct_way_counts[pos], 0)